@@ -0,0 +1,107 @@
+import os
+import pandas as pd
+
+# ACS subject tables read for the city panel: folder under Data and table id
+ACS_TABLES = {
+    'poverty': ('Poverty', 'S1701'),
+    'mean_income': ('Income', 'S1902'),
+    'median_income': ('Income', 'S1903'),
+}
+
+# Universe segment that the 2017+ S1701 labels insert between the column group and the row
+POVERTY_UNIVERSE = "Population for whom poverty status is determined"
+
+# Output column -> (table, column group, section, accepted row labels). Labels in the
+# Column-Metadata files are "Group!!Estimate!!Section!!...!!Row" up to 2016 and
+# "Estimate!!Group!!...!!Section!!...!!Row" from 2017, so a column is matched on its
+# group, the section it sits under (None for top-level rows) and its final segment.
+ACS_VARIABLES = {
+    'Total_Pop': ('poverty', "Total", None, [POVERTY_UNIVERSE]),
+    'Total_BelowPov': ('poverty', "Below poverty level", None, [POVERTY_UNIVERSE]),
+    'Total_BelowPovPer': ('poverty', "Percent below poverty level", None, [POVERTY_UNIVERSE]),
+    'White_Pop': ('poverty', "Total", "RACE AND HISPANIC OR LATINO ORIGIN", ["White alone", "White"]),
+    'LessHS_Pop': ('poverty', "Total", "EDUCATIONAL ATTAINMENT", ["Less than high school graduate"]),
+    'HS_Pop': ('poverty', "Total", "EDUCATIONAL ATTAINMENT", ["High school graduate (includes equivalency)"]),
+    'SomeCollege_Pop': ('poverty', "Total", "EDUCATIONAL ATTAINMENT", ["Some college, associate's degree"]),
+    'Bachelor_Pop': ('poverty', "Total", "EDUCATIONAL ATTAINMENT", ["Bachelor's degree or higher"]),
+    'LaborForce_Pop': ('poverty', "Total", "EMPLOYMENT STATUS", ["Civilian labor force 16 years and over"]),
+    'Employed_Pop': ('poverty', "Total", "EMPLOYMENT STATUS", ["Employed"]),
+    'Unemployed_Pop': ('poverty', "Total", "EMPLOYMENT STATUS", ["Unemployed"]),
+    'MeanInc': ('mean_income', "Mean income (dollars)", None, ["All households"]),
+    'MedianInc': ('median_income', "Median income (dollars)", None, ["Households"]),
+}
+
+def get_table_paths(year, table_key, data_directory):
+    """
+    Return the metadata and data file paths for one ACS table and year.
+
+    Args:
+        year (int): The ACS 5-year release year.
+        table_key (str): A key of ACS_TABLES.
+        data_directory (str): The Data folder holding the Poverty and Income folders.
+
+    Returns:
+        tuple: (metadata_path, data_path).
+    """
+    folder, table_id = ACS_TABLES[table_key]
+    prefix = os.path.join(data_directory, folder, f"ACSST5Y{year}.{table_id}")
+    return prefix + "-Column-Metadata.csv", prefix + "-Data.csv"
+
+def _estimate_labels(metadata_df):
+    """Split the Estimate column labels into (group, parts) keyed by column code."""
+    labels = {}
+    for code, label in zip(metadata_df['Column Name'], metadata_df['Label']):
+        parts = str(label).split('!!')
+        if 'Estimate' not in parts:
+            continue
+        # The group is the segment next to "Estimate", before it up to 2016 and after it from 2017
+        position = parts.index('Estimate')
+        group = parts[position - 1] if position > 0 else parts[position + 1]
+        rest = [part for i, part in enumerate(parts) if i != position and part != group]
+        labels[code] = (group, rest)
+    return labels
+
+def resolve_acs_columns(metadata_path, table_key):
+    """
+    Resolve the output variables of one table to its column codes using the
+    table's Column-Metadata file.
+
+    Args:
+        metadata_path (str): Path to the *-Column-Metadata.csv file.
+        table_key (str): A key of ACS_TABLES.
+
+    Returns:
+        tuple: (dict mapping output column -> column code, list of unresolved output columns).
+
+    Raises:
+        ValueError: If a variable matches more than one column at the same depth.
+    """
+    metadata_df = pd.read_csv(metadata_path, dtype=str)
+    labels = _estimate_labels(metadata_df)
+
+    resolved = {}
+    missing = []
+    for name, (table, group, section, row_labels) in ACS_VARIABLES.items():
+        if table != table_key:
+            continue
+
+        matches = []
+        for code, (column_group, rest) in labels.items():
+            if column_group != group or not rest or rest[-1] not in row_labels:
+                continue
+            headers = [part for part in rest[:-1] if part != POVERTY_UNIVERSE]
+            # Top-level rows may only sit under upper-case table headers
+            if section is None and all(part.isupper() for part in headers) or section in headers:
+                matches.append((len(rest), code))
+        if not matches:
+            missing.append(name)
+            continue
+
+        # Prefer the shallowest row when the same row label repeats under a sub-heading
+        matches.sort()
+        if len(matches) > 1 and matches[0][0] == matches[1][0]:
+            raise ValueError(f"'{name}' matches several columns in {os.path.basename(metadata_path)}: "
+                             f"{[code for depth, code in matches if depth == matches[0][0]]}")
+        resolved[name] = matches[0][1]
+
+    return resolved, missing
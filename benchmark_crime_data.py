@@ -0,0 +1,548 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+import statistics
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from crime_data_logger import CrimeDataLogger
+from crime_data_schema import get_crime_schema
+
+# openpyxl writes the synthetic .xlsx workbooks; xlwt is only needed for .xls
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+try:
+    import xlwt
+except ImportError:
+    xlwt = None
+
+# Modules whose import dominates start-up; the startup benchmark reports which ones a command loaded
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'xlrd', 'pyarrow')
+
+# Data rows one synthetic workbook can hold (sheet limits minus title, header and notes rows)
+MAX_ROWS_PER_WORKBOOK = {'xlsx': 1_048_000, 'xls': 65_000}
+
+SYNTHETIC_STATES = [
+    "ALABAMA", "ALASKA", "ARIZONA", "ARKANSAS", "CALIFORNIA", "COLORADO", "CONNECTICUT", "DELAWARE",
+    "FLORIDA", "GEORGIA", "IDAHO", "ILLINOIS", "INDIANA", "IOWA", "KANSAS", "KENTUCKY", "LOUISIANA",
+    "MAINE", "MARYLAND", "MASSACHUSETTS", "MICHIGAN", "MINNESOTA", "MISSISSIPPI", "MISSOURI",
+    "MONTANA", "NEBRASKA", "NEVADA", "NEW HAMPSHIRE", "NEW JERSEY", "NEW MEXICO", "NEW YORK",
+    "NORTH CAROLINA", "NORTH DAKOTA", "OHIO", "OKLAHOMA", "OREGON", "PENNSYLVANIA", "RHODE ISLAND",
+    "SOUTH CAROLINA", "SOUTH DAKOTA", "TENNESSEE", "TEXAS", "UTAH", "VERMONT", "VIRGINIA",
+    "WASHINGTON", "WEST VIRGINIA", "WISCONSIN", "WYOMING",
+]
+CITY_PREFIXES = ["Spring", "Green", "Oak", "River", "Lake", "Fair", "Mill", "Ash", "Clear", "Pine",
+                 "North", "West", "Maple", "Cedar", "Rock", "Sun", "Glen", "Red", "White", "Elm"]
+CITY_SUFFIXES = ["field", "ville", "ton", "wood", "burg", "port", "dale", " City", " Heights",
+                 "view", "ford", "land", " Park", "brook", "mont", " Falls"]
+EXTRA_HEADERS = ["Property\ncrime", "Burglary", "Larceny-\ntheft", "Motor\nvehicle\ntheft", "Arson3"]
+
+def make_synthetic_drop_set(n_rows, seed=0):
+    """
+    Build a synthetic frame shaped like the rows handed to log_batch_dropped.
+
+    Args:
+        n_rows (int): Number of dropped rows to generate.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: State/City/Population/Violent Crime rows with some missing values.
+    """
+    rng = np.random.default_rng(seed)
+    states = np.array([f"STATE {i}" for i in range(50)], dtype=object)
+    df = pd.DataFrame({
+        'State': states[rng.integers(0, 50, n_rows)],
+        'City': np.char.add('City ', rng.integers(0, 20000, n_rows).astype(str)).astype(object),
+        'Population': rng.integers(100, 500000, n_rows).astype(float),
+        'Violent Crime': rng.integers(0, 5000, n_rows).astype(float),
+    })
+    df.loc[rng.random(n_rows) < 0.01, 'City'] = np.nan
+    df.loc[rng.random(n_rows) < 0.05, 'Violent Crime'] = np.nan
+    return df
+
+def _legacy_log_batch_dropped(records, year, dropped_df, reason, step):
+    """The previous per-row logging path: iterrows plus one dict and timestamp per row."""
+    for _, row in dropped_df.iterrows():
+        state = row.get('State', 'UNKNOWN')
+        city = row.get('City', 'UNKNOWN')
+        original_value = row['Violent Crime'] if 'Violent Crime' in row else None
+        records.append({
+            'Year': year,
+            'State': state if pd.notna(state) else 'UNKNOWN',
+            'City': city if pd.notna(city) else 'UNKNOWN',
+            'Reason': reason,
+            'Original_Value': str(original_value) if original_value is not None else '',
+            'Processing_Step': step if step else 'Unknown',
+            'Timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+
+def make_synthetic_table8_rows(year, n_rows, rng):
+    """
+    Build the cell rows of an FBI-style Table 8 sheet for one year.
+
+    The sheet has three title rows, a header with newline-split names taken from
+    get_crime_schema() for the year, the state name only on the first row of each
+    state block, footnote digits on some state and city names, comma-formatted
+    numbers stored as text, blank totals that must be rebuilt from the components,
+    zero totals with non-zero components, and a trailing notes block.
+
+    Args:
+        year (int): Year whose schema names are used for the header.
+        n_rows (int): Number of city rows.
+        rng (np.random.Generator): Random source.
+
+    Returns:
+        list: Rows of cell values (None for blank cells).
+    """
+    year_schema = get_crime_schema()[year]
+    measure_headers = [year_schema["Violent Crime"]] + year_schema["Components"]
+    header = ["State", "City", "Population"] + [name.replace(' ', '\n') for name in measure_headers] + EXTRA_HEADERS
+    n_components = len(year_schema["Components"])
+
+    rows = [["Table 8"], ["Offenses Known to Law Enforcement"], [f"by State by City, {year}"], header]
+
+    components = rng.poisson(lam=rng.gamma(1.0, 20.0, size=(n_rows, 1)), size=(n_rows, n_components))
+    totals = components.sum(axis=1).astype(object)
+    population = rng.integers(500, 900_000, n_rows)
+    extras = rng.integers(0, 5000, size=(n_rows, len(EXTRA_HEADERS)))
+    flags = rng.random((n_rows, 4))
+
+    # Blank totals, zero totals over non-zero components, and comma-formatted text
+    totals[flags[:, 0] < 0.02] = None
+    totals[(flags[:, 1] < 0.005) & (components.sum(axis=1) > 0)] = 0
+    formatted = (flags[:, 2] < 0.2) & (components.sum(axis=1) >= 1000)
+    totals[formatted] = [f"{value:,}" for value in components.sum(axis=1)[formatted]]
+
+    prefixes = rng.integers(0, len(CITY_PREFIXES), n_rows)
+    suffixes = rng.integers(0, len(CITY_SUFFIXES), n_rows)
+    state_starts = set(np.linspace(0, n_rows, len(SYNTHETIC_STATES), endpoint=False).astype(int).tolist())
+    state_index = 0
+
+    for i in range(n_rows):
+        state = None
+        if i in state_starts:
+            state = SYNTHETIC_STATES[state_index % len(SYNTHETIC_STATES)]
+            state += str(rng.integers(1, 9)) if flags[i, 3] < 0.1 else ""
+            state_index += 1
+        city = CITY_PREFIXES[prefixes[i]] + CITY_SUFFIXES[suffixes[i]]
+        if flags[i, 3] > 0.97:
+            city += str(rng.integers(1, 9))
+        rows.append([state, city, int(population[i]), totals[i]] + components[i].tolist() + extras[i].tolist())
+
+    rows.append([])
+    rows.append(["1 The figures shown in this column for the offense of rape were reported using the revised definition."])
+    rows.append(["2 The figures shown in this column for the offense of rape were reported using the legacy definition."])
+    rows.append(["NOTE: Although the FBI makes every effort through its editing procedures to ensure data quality, "
+                 "some agencies submit incomplete data."])
+    return rows
+
+def write_synthetic_table8(file_path, year, n_rows, seed=0):
+    """
+    Write a synthetic Table 8 workbook as .xlsx (openpyxl) or .xls (xlwt).
+
+    Args:
+        file_path (str): Output path; the extension picks the format.
+        year (int): Year whose schema names are used for the header.
+        n_rows (int): Number of city rows.
+        seed (int): Random seed.
+    """
+    rows = make_synthetic_table8_rows(year, n_rows, np.random.default_rng(seed))
+
+    if file_path.endswith('.xlsx'):
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        for row in rows:
+            sheet.append(row)
+        workbook.save(file_path)
+    else:
+        workbook = xlwt.Workbook()
+        sheet = workbook.add_sheet("Table 8")
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                if value is not None:
+                    sheet.write(r, c, value)
+        workbook.save(file_path)
+
+def generate_synthetic_dataset(data_directory, n_rows, file_format='xlsx', seed=0):
+    """
+    Write one synthetic workbook per schema year, splitting n_rows evenly across the years.
+
+    Args:
+        data_directory (str): Directory for the workbooks.
+        n_rows (int): Total number of city rows.
+        file_format (str): 'xlsx' or 'xls'.
+        seed (int): Random seed.
+
+    Returns:
+        list: The years written, or an empty list if the format can't hold n_rows
+              or its writer is not installed.
+    """
+    if file_format == 'xlsx' and openpyxl is None:
+        print("Warning: openpyxl not installed. Install with: pip install openpyxl")
+        return []
+    if file_format == 'xls' and xlwt is None:
+        print("Warning: xlwt not installed. Install with: pip install xlwt")
+        print("This is needed to write synthetic .xls files")
+        return []
+
+    years = sorted(get_crime_schema())
+    rows_per_year = -(-n_rows // len(years))
+    if rows_per_year > MAX_ROWS_PER_WORKBOOK[file_format]:
+        print(f"Warning: {n_rows:,} rows need {rows_per_year:,} rows per .{file_format} workbook, "
+              f"more than the {MAX_ROWS_PER_WORKBOOK[file_format]:,} the format allows. Skipping.")
+        return []
+
+    os.makedirs(data_directory, exist_ok=True)
+    remaining = n_rows
+    for i, year in enumerate(years):
+        year_rows = min(rows_per_year, remaining)
+        file_name = f"Table_8_Offenses_Known_to_Law_Enforcement_by_State_by_City_{year}.{file_format}"
+        write_synthetic_table8(os.path.join(data_directory, file_name), year, year_rows, seed + i)
+        remaining -= year_rows
+    return years
+
+def _peak_rss_mb():
+    return CrimeDataLogger._peak_rss_mb()
+
+def _run_pipeline(data_directory, output_directory, years, workers):
+    """Run consolidate_crime_data_efficiently quietly and collect its timings (runs in a fresh process)."""
+    from process_crime_data import consolidate_crime_data_efficiently, processing_log_name
+
+    output_filename = os.path.join(output_directory, "synthetic_panel.csv")
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        consolidate_crime_data_efficiently(years[0], years[-1], data_directory, output_filename,
+                                           output_directory, workers=workers)
+    wall = time.perf_counter() - start
+
+    log_name = processing_log_name(output_filename)
+    with open(os.path.join(output_directory, os.path.splitext(log_name)[0] + "_timings.json")) as f:
+        year_timings = json.load(f)['years']
+
+    stages = {}
+    for timings in year_timings.values():
+        for stage, timing in timings.items():
+            totals = stages.setdefault(stage, {'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0})
+            totals['wall_s'] += timing['wall_s']
+            totals['cpu_s'] += timing['cpu_s']
+            totals['rows'] += timing['rows'] or 0
+    for totals in stages.values():
+        totals['rows_per_s'] = round(totals['rows'] / totals['wall_s'], 1) if totals['wall_s'] > 0 else None
+        totals['wall_s'] = round(totals['wall_s'], 4)
+        totals['cpu_s'] = round(totals['cpu_s'], 4)
+
+    output_rows = len(pd.read_csv(output_filename, usecols=['Year']))
+    return {
+        'wall_s': round(wall, 4),
+        'cpu_s': round(time.process_time() - cpu_start, 4),
+        'peak_rss_mb': _peak_rss_mb(),
+        'output_rows': output_rows,
+        'stages': stages,
+    }
+
+def _in_fresh_process(function, *args):
+    """Run a benchmark in a spawned process so its peak RSS is not inflated by earlier runs."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(function, *args).result()
+
+def benchmark_pipeline(n_rows, file_format='xlsx', workers=1, seed=0):
+    """
+    Time consolidate_crime_data_efficiently on a synthetic workbook set.
+
+    Args:
+        n_rows (int): Total number of city rows across all years.
+        file_format (str): 'xlsx' or 'xls'.
+        workers (int): Worker processes passed to the pipeline.
+        seed (int): Random seed.
+
+    Returns:
+        dict or None: End-to-end and per-stage timings, or None if the set could not be generated.
+    """
+    print(f"\nPipeline benchmark: {n_rows:,} rows in .{file_format} workbooks, {workers} worker(s)")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_directory = os.path.join(tmp_dir, "Crime")
+        start = time.perf_counter()
+        years = generate_synthetic_dataset(data_directory, n_rows, file_format, seed)
+        if not years:
+            return None
+        print(f"  Generated {len(years)} workbooks in {time.perf_counter() - start:.1f}s")
+
+        result = _in_fresh_process(_run_pipeline, data_directory, tmp_dir, years, workers)
+
+    result.update({'rows': n_rows, 'format': file_format, 'workers': workers})
+    print(f"  Total: {result['wall_s']:.2f}s wall - {n_rows / result['wall_s']:,.0f} rows/s, "
+          f"peak RSS {result['peak_rss_mb'] or 0:.0f} MB, {result['output_rows']:,} output rows")
+    for stage, timing in result['stages'].items():
+        rate = f", {timing['rows_per_s']:,.0f} rows/s" if timing['rows_per_s'] else ""
+        print(f"    {stage}: {timing['wall_s']:.3f}s wall, {timing['cpu_s']:.3f}s CPU{rate}")
+    return result
+
+def benchmark_logger(n_rows, batches=12, skip_legacy=False, spill=False):
+    """
+    Time logging a synthetic drop set through the columnar logger and the legacy
+    per-row path, including building the summary and writing the log.
+
+    Args:
+        n_rows (int): Total number of dropped rows, split evenly over the batches.
+        batches (int): Number of log_batch_dropped calls (one per year).
+        skip_legacy (bool): Skip the legacy per-row path, which is slow at 1M rows.
+        spill (bool): Spill the columnar logger's records to disk as they are logged.
+
+    Returns:
+        dict: Wall times of the columnar logger (and the legacy path) and peak RSS.
+    """
+    df = make_synthetic_drop_set(n_rows)
+    chunks = np.array_split(np.arange(n_rows), batches)
+
+    print(f"\nLogger benchmark: {n_rows:,} dropped rows in {batches} batches")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        logger = CrimeDataLogger("benchmark_log.csv", spill_directory=tmp_dir if spill else None)
+        for i, chunk in enumerate(chunks):
+            logger.log_batch_dropped(2012 + i, df.iloc[chunk], "Synthetic drop", "Benchmark")
+        log_time = time.perf_counter() - start
+        logger.get_summary_statistics()
+        summary_time = time.perf_counter() - start - log_time
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            logger.save_log(tmp_dir)
+        columnar_time = time.perf_counter() - start
+
+    print(f"  {'Spilling' if spill else 'Columnar'} logger: {columnar_time:.2f}s total "
+          f"(log {log_time:.3f}s, summary {summary_time:.3f}s) - {n_rows / columnar_time:,.0f} rows/s")
+
+    result = {
+        'rows': n_rows,
+        'wall_s': round(columnar_time, 4),
+        'log_s': round(log_time, 4),
+        'summary_s': round(summary_time, 4),
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+    if skip_legacy:
+        return result
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        records = []
+        for i, chunk in enumerate(chunks):
+            _legacy_log_batch_dropped(records, 2012 + i, df.iloc[chunk], "Synthetic drop", "Benchmark")
+        legacy_df = pd.DataFrame(records)
+        legacy_df['Year'].value_counts()
+        legacy_df.to_csv(os.path.join(tmp_dir, "benchmark_log.csv"), index=False)
+        legacy_time = time.perf_counter() - start
+
+    print(f"  Legacy per-row logger: {legacy_time:.2f}s - {n_rows / legacy_time:,.0f} rows/s")
+    print(f"  Speedup: {legacy_time / columnar_time:.1f}x")
+    result['legacy_wall_s'] = round(legacy_time, 4)
+    return result
+
+def _heavy_modules_loaded(command):
+    """HEAVY_MODULES a command imports, from its -X importtime report."""
+    report = subprocess.run([sys.executable, '-X', 'importtime'] + command, capture_output=True, text=True).stderr
+    loaded = set()
+    for line in report.splitlines():
+        package = line.rsplit('|', 1)[-1].strip().split('.')[0]
+        if line.startswith('import time:') and package in HEAVY_MODULES:
+            loaded.add(package)
+    return sorted(loaded)
+
+def _time_command(command, repeats, cwd):
+    """Median and fastest wall time of a command in fresh interpreters, and the heavy modules it loads."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + command, cwd=cwd, capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+    return {
+        'wall_s': round(statistics.median(times), 4),
+        'min_s': round(min(times), 4),
+        'heavy_modules': _heavy_modules_loaded(command),
+    }
+
+def benchmark_startup(repeats=5, file_format='xlsx'):
+    """
+    Time cold starts of the processing scripts in fresh interpreters: importing
+    the modules, summarizing a saved drop log and --plan, with and without an
+    existing output whose manifest records the workbook headers.
+
+    Args:
+        repeats (int): Runs per command; the median is reported.
+        file_format (str): Format of the synthetic workbooks --plan probes.
+
+    Returns:
+        dict: Per command, the median and fastest wall time and the heavy modules it loaded.
+    """
+    from process_crime_data import default_output_name, processing_log_name
+
+    print(f"\nStartup benchmark: median of {repeats} cold starts")
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_directory = os.path.join(tmp_dir, "Crime")
+        if not generate_synthetic_dataset(data_directory, 1_200, file_format):
+            return results
+        output_directory = os.path.join(tmp_dir, "out")
+        process_script = os.path.join(script_dir, "process_crime_data.py")
+        # Drop log of the default output the build below writes
+        log_name = processing_log_name(default_output_name(sorted(get_crime_schema())))
+        plan = [process_script, "--plan", "--input-dir", data_directory, "--output-dir", output_directory]
+
+        commands = [
+            ('import process_crime_data', ['-c', 'import process_crime_data']),
+            ('import crime_data_logger', ['-c', 'import crime_data_logger']),
+            ('plan (new output)', plan),
+            # The output run gives the log summary a log and --plan a manifest to read
+            ('build output', None),
+            ('log summary', [os.path.join(script_dir, "crime_data_logger.py"),
+                             os.path.join(output_directory, log_name)]),
+            ('plan (unchanged output)', plan),
+        ]
+        for name, command in commands:
+            if command is None:
+                subprocess.run([sys.executable, process_script, "--input-dir", data_directory, "--output-dir",
+                                output_directory, "--formats", "csv", "--no-cache"], capture_output=True, check=True)
+                continue
+            results[name] = _time_command(command, repeats, script_dir)
+            modules = ', '.join(results[name]['heavy_modules']) or 'none'
+            print(f"  {name}: {results[name]['wall_s']:.3f}s (fastest {results[name]['min_s']:.3f}s), "
+                  f"heavy modules: {modules}")
+    return results
+
+def run_suite(sizes, formats, workers=1, baseline_path=None, output_path=None, tolerance=0.2):
+    """
+    Run the pipeline and logger benchmarks for every size and format, save the
+    results as JSON and report stages that got slower than a saved baseline.
+
+    Args:
+        sizes (list): Total row counts, e.g. [10_000, 100_000, 1_000_000, 5_000_000].
+        formats (list): Workbook formats ('xlsx', 'xls').
+        workers (int): Worker processes passed to the pipeline.
+        baseline_path (str, optional): Results JSON of an earlier run to compare against.
+        output_path (str, optional): Where to save the results JSON.
+        tolerance (float): Slowdown ratio above which a stage is reported as a regression.
+
+    Returns:
+        dict: The results, keyed by benchmark name.
+    """
+    results = {}
+    for n_rows in sizes:
+        for file_format in formats:
+            pipeline = benchmark_pipeline(n_rows, file_format, workers)
+            if pipeline is not None:
+                results[f"pipeline/{file_format}/{n_rows}"] = pipeline
+        results[f"logger/{n_rows}"] = _in_fresh_process(benchmark_logger, n_rows, 12, True)
+    for name, timing in benchmark_startup().items():
+        results[f"startup/{name}"] = timing
+
+    suite = {
+        'generated': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': sys.version.split()[0],
+        'pandas': pd.__version__,
+        'results': results,
+    }
+    if output_path:
+        with open(output_path, 'w') as f:
+            json.dump(suite, f, indent=2)
+        print(f"\nBenchmark results saved to: {output_path}")
+
+    if baseline_path:
+        compare_to_baseline(results, baseline_path, tolerance)
+    return suite
+
+def compare_to_baseline(results, baseline_path, tolerance=0.2):
+    """
+    Print every benchmark and pipeline stage whose wall time grew by more than tolerance.
+
+    Args:
+        results (dict): Results from run_suite.
+        baseline_path (str): Results JSON saved by an earlier run_suite.
+        tolerance (float): Allowed slowdown ratio, e.g. 0.2 for 20%.
+
+    Returns:
+        list: (benchmark, stage, baseline seconds, current seconds) for each regression.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        pairs = [('total', previous['wall_s'], current['wall_s'])]
+        for stage, timing in current.get('stages', {}).items():
+            if stage in previous.get('stages', {}):
+                pairs.append((stage, previous['stages'][stage]['wall_s'], timing['wall_s']))
+        for stage, before, after in pairs:
+            # Ignore sub-10ms stages, whose timings are mostly noise
+            if after > 0.01 and after > before * (1 + tolerance):
+                regressions.append((name, stage, before, after))
+
+    if regressions:
+        print(f"\n⚠️ {len(regressions)} timings regressed by more than {tolerance:.0%} against {baseline_path}:")
+        for name, stage, before, after in regressions:
+            print(f"    {name} - {stage}: {before:.3f}s → {after:.3f}s")
+    else:
+        print(f"\n✅ No timings regressed by more than {tolerance:.0%} against {baseline_path}")
+    return regressions
+
+# --- Main execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks for the crime data processing scripts.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    logger_parser = subparsers.add_parser("logger", help="Benchmark CrimeDataLogger drop logging.")
+    logger_parser.add_argument("--rows", type=int, default=1_000_000, help="Number of dropped rows.")
+    logger_parser.add_argument("--spill", action="store_true", help="Spill the drop log to disk while logging.")
+    logger_parser.add_argument("--skip-legacy", action="store_true", help="Skip the legacy per-row path.")
+
+    pipeline_parser = subparsers.add_parser("pipeline", help="Benchmark consolidate_crime_data_efficiently on synthetic workbooks.")
+    pipeline_parser.add_argument("--rows", type=int, default=100_000, help="Total city rows across all years.")
+    pipeline_parser.add_argument("--format", choices=["xlsx", "xls"], default="xlsx", help="Workbook format.")
+    pipeline_parser.add_argument("--workers", type=int, default=1, help="Worker processes for the pipeline.")
+
+    suite_parser = subparsers.add_parser("suite", help="Run the pipeline and logger benchmarks over several sizes.")
+    suite_parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 5_000_000],
+                              help="Total row counts to benchmark.")
+    suite_parser.add_argument("--formats", nargs="+", choices=["xlsx", "xls"], default=["xlsx", "xls"],
+                              help="Workbook formats to benchmark.")
+    suite_parser.add_argument("--workers", type=int, default=1, help="Worker processes for the pipeline.")
+    suite_parser.add_argument("--output", default="benchmark_results.json", help="Where to save the results JSON.")
+    suite_parser.add_argument("--baseline", help="Results JSON of an earlier run to check for regressions.")
+    suite_parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown ratio before reporting.")
+
+    startup_parser = subparsers.add_parser("startup", help="Benchmark cold starts of the processing scripts.")
+    startup_parser.add_argument("--repeats", type=int, default=5, help="Runs per command.")
+    startup_parser.add_argument("--format", choices=["xlsx", "xls"], default="xlsx", help="Workbook format --plan probes.")
+
+    generate_parser = subparsers.add_parser("generate", help="Write a synthetic Table 8 workbook set to a directory.")
+    generate_parser.add_argument("directory", help="Output directory.")
+    generate_parser.add_argument("--rows", type=int, default=100_000, help="Total city rows across all years.")
+    generate_parser.add_argument("--format", choices=["xlsx", "xls"], default="xlsx", help="Workbook format.")
+    generate_parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+
+    args = parser.parse_args()
+    if args.command == "logger":
+        benchmark_logger(args.rows, skip_legacy=args.skip_legacy, spill=args.spill)
+    elif args.command == "pipeline":
+        benchmark_pipeline(args.rows, args.format, args.workers)
+    elif args.command == "suite":
+        run_suite(args.sizes, args.formats, args.workers, args.baseline, args.output, args.tolerance)
+    elif args.command == "startup":
+        benchmark_startup(args.repeats, args.format)
+    elif args.command == "generate":
+        years = generate_synthetic_dataset(args.directory, args.rows, args.format, args.seed)
+        if years:
+            print(f"Wrote {len(years)} synthetic workbooks ({years[0]}-{years[-1]}) to {args.directory}")
@@ -0,0 +1,247 @@
+import pandas as pd
+import numpy as np
+import os
+from crime_data_logger import create_logger
+from crime_data_output import read_existing_panel
+
+def normalize_place_names(names):
+    """
+    Canonical form used to match place and state names: trimmed, inner whitespace
+    collapsed and case-folded. Only the distinct values are normalized.
+
+    Args:
+        names (pd.Series): City or state names.
+
+    Returns:
+        pd.Series: The canonical names, aligned with the input (NaN stays NaN).
+    """
+    codes, uniques = pd.factorize(names)
+    canonical = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    canonical = canonical.str.replace(r'\s+', ' ', regex=True).str.casefold()
+    # Code -1 (missing name) picks the trailing None
+    canonical = np.append(canonical.to_numpy(dtype=object), None)
+    return pd.Series(canonical[codes], index=names.index, dtype=object)
+
+class PlaceIndex:
+    """
+    Integer key index over the ACS places. A place key is the position of a
+    (state code, canonical place name) pair in the index, so both sides of the
+    join are reduced to integer arrays once and every later step (balanced-panel
+    counts, membership tests, the join itself) works on those integers.
+    """
+
+    def __init__(self, acs_df, state_column='state_name', code_column='state_code',
+                 city_column='city_name', place_column='place_id'):
+        """
+        Build the index from the ACS rows.
+
+        Args:
+            acs_df (pd.DataFrame): ACS place-year rows, e.g. Data/ACS/ready_to_merge.csv.
+            state_column (str): Column with the state name.
+            code_column (str): Column with the state FIPS code.
+            city_column (str): Column with the place name without its "city"/"town" suffix.
+            place_column (str): Column with the ACS place identifier.
+        """
+        self.city_column = city_column
+        self.place_column = place_column
+        states = normalize_place_names(acs_df[state_column])
+        cities = normalize_place_names(acs_df[city_column])
+        state_codes = pd.to_numeric(acs_df[code_column], errors='coerce')
+
+        state_lookup = pd.DataFrame({'state': states, 'code': state_codes}).dropna().drop_duplicates('state')
+        self._state_names = pd.Index(state_lookup['state'])
+        # Trailing -1 is picked by unknown states (position -1)
+        self._state_codes = np.append(state_lookup['code'].astype('int64').to_numpy(), -1)
+        self._city_names = pd.Index(cities.dropna().unique())
+
+        pair_keys = self._pair_keys(states, cities)
+        self._pair_index = pd.Index(np.unique(pair_keys[pair_keys >= 0]))
+
+        # One row per place key, describing the place it stands for
+        self.acs_keys = self._pair_index.get_indexer(pair_keys)
+        places = acs_df[[state_column, city_column, place_column]][self.acs_keys >= 0]
+        places = places.assign(place_key=self.acs_keys[self.acs_keys >= 0],
+                               state_code=pair_keys[self.acs_keys >= 0] // len(self._city_names))
+        places = places.drop_duplicates('place_key')
+        self.places = places.set_index('place_key').sort_index()
+
+    def __len__(self):
+        return len(self._pair_index)
+
+    def _pair_keys(self, states, cities):
+        """Encode canonical (state, city) pairs as state_code * n_cities + city position, -1 if unknown."""
+        state_pos = self._state_names.get_indexer(states)
+        city_pos = self._city_names.get_indexer(cities)
+        codes = self._state_codes[state_pos]
+        known = (codes >= 0) & (city_pos >= 0)
+        return np.where(known, codes * len(self._city_names) + city_pos, -1)
+
+    def state_codes(self, states):
+        """Map canonical state names to their FIPS codes, -1 where the state is unknown."""
+        return self._state_codes[self._state_names.get_indexer(states)]
+
+    def lookup(self, states, cities):
+        """
+        Map state and city names to place keys.
+
+        Args:
+            states (pd.Series): State names, in any case (e.g. "CALIFORNIA").
+            cities (pd.Series): City names.
+
+        Returns:
+            np.ndarray: The place key for each row, -1 where there is no ACS place.
+        """
+        pair_keys = self._pair_keys(normalize_place_names(states), normalize_place_names(cities))
+        return self._pair_index.get_indexer(pair_keys)
+
+def count_years_per_place(place_keys, years, n_places):
+    """
+    Count the distinct years per place key with a single bincount.
+
+    Args:
+        place_keys (np.ndarray): Place key per row (-1 rows are ignored).
+        years (np.ndarray): Year per row.
+        n_places (int): Number of place keys in the index.
+
+    Returns:
+        np.ndarray: Number of distinct years per place key.
+    """
+    pairs = pd.DataFrame({'place_key': place_keys, 'year': years})
+    pairs = pairs[pairs['place_key'] >= 0].drop_duplicates()
+    return np.bincount(pairs['place_key'].to_numpy(), minlength=n_places)
+
+def _log_by_year(logger, rows, reason, step="ACS Join"):
+    """Log dropped crime rows to the logger, one batch per year."""
+    if logger is None or rows.empty:
+        return
+    for year, year_rows in rows.groupby('Year', sort=True):
+        logger.log_batch_dropped(year, year_rows, reason, step)
+
+def join_crime_acs(crime_df, acs_df, place_index=None, logger=None, balanced_crime=True,
+                   year_column='year', linker=None):
+    """
+    Join the consolidated crime panel onto the ACS places.
+
+    Crime rows are restricted to the ACS years and mapped to place keys. Places
+    kept are the ones present in every ACS year and, with balanced_crime, in
+    every ACS year of the crime panel too (otherwise in at least one). The ACS
+    rows of those places are left-joined with their violent crime count.
+
+    Args:
+        crime_df (pd.DataFrame): State/City/Violent Crime/Year rows from
+                                 consolidate_crime_data_efficiently.
+        acs_df (pd.DataFrame): ACS place-year rows.
+        place_index (PlaceIndex, optional): A prebuilt index over acs_df. Built if None.
+        logger (CrimeDataLogger, optional): Receives the crime rows that are left out.
+        balanced_crime (bool): Require crime data in every ACS year.
+        year_column (str): Year column of acs_df.
+        linker (PlaceLinker, optional): Maps crime names to place keys, including
+                                        fuzzy matches. Exact matching only if None.
+
+    Returns:
+        pd.DataFrame: The ACS rows of the kept places with place_key and violent_crime columns.
+    """
+    if place_index is None:
+        place_index = PlaceIndex(acs_df)
+    n_places = len(place_index)
+
+    acs_years = np.sort(acs_df[year_column].unique())
+    n_years = len(acs_years)
+    crime = crime_df[crime_df['Year'].isin(acs_years)].copy()
+    place_lookup = linker.lookup if linker is not None else place_index.lookup
+    crime['place_key'] = place_lookup(crime['State'], crime['City'])
+
+    unmatched = crime['place_key'].to_numpy() < 0
+    _log_by_year(logger, crime[unmatched], "No matching ACS place")
+    crime = crime[~unmatched]
+
+    duplicated = crime.duplicated(['place_key', 'Year'])
+    _log_by_year(logger, crime[duplicated], "Duplicate city in year")
+    crime = crime[~duplicated]
+
+    acs_keys = place_index.acs_keys
+    acs_counts = count_years_per_place(acs_keys, acs_df[year_column].to_numpy(), n_places)
+    crime_counts = count_years_per_place(crime['place_key'].to_numpy(), crime['Year'].to_numpy(), n_places)
+
+    keep = acs_counts == n_years
+    keep &= (crime_counts == n_years) if balanced_crime else (crime_counts > 0)
+
+    incomplete = ~keep[crime['place_key'].to_numpy()]
+    _log_by_year(logger, crime[incomplete], "Not in every panel year")
+    crime = crime[~incomplete]
+
+    in_panel = (acs_keys >= 0) & keep[acs_keys.clip(0)]
+    acs_rows = acs_df[in_panel].copy()
+    acs_rows['place_key'] = acs_keys[in_panel]
+
+    merged = acs_rows.merge(
+        crime[['place_key', 'Year', 'Violent Crime']].rename(columns={'Year': year_column,
+                                                                      'Violent Crime': 'violent_crime'}),
+        on=['place_key', year_column], how='left'
+    )
+
+    print(f"\nACS places in every year: {int((acs_counts == n_years).sum())} of {n_places}")
+    print(f"Places kept for the panel: {int(keep.sum())}")
+    print(f"Merged data rows: {len(merged)}")
+    print(f"Missing violent crime values: {int(merged['violent_crime'].isna().sum())}")
+    return merged
+
+def run_crime_acs_join(crime_panel_path, acs_path, output_directory, min_confidence=0.9):
+    """
+    Join a consolidated crime panel onto the ACS places and save the result.
+
+    Crime names are linked with a PlaceLinker whose match table is kept in
+    output_directory, so later runs only score new names.
+
+    Args:
+        crime_panel_path (str): Path of the consolidated crime CSV (or its Parquet dataset).
+        acs_path (str): Path of the ACS place-year CSV.
+        output_directory (str): Directory for the joined panel, match table and drop log.
+        min_confidence (float): Fuzzy matches below this confidence are not used.
+
+    Returns:
+        pd.DataFrame or None: The joined panel, or None if an input is missing.
+    """
+    crime_df = read_existing_panel(crime_panel_path, ('csv', 'parquet'))
+    if crime_df is None:
+        print(f"❌ Error: Crime panel not found. Run process_crime_data.py first.")
+        print(f"   Checked for: {crime_panel_path}")
+        return None
+    if not os.path.exists(acs_path):
+        print(f"❌ Error: ACS places not found at the expected path.")
+        print(f"   Checked for: {acs_path}")
+        return None
+
+    os.makedirs(output_directory, exist_ok=True)
+    acs_df = pd.read_csv(acs_path, dtype={'geo_id': str, 'state_code': str, 'place_code': str, 'place_id': str})
+    logger = create_logger("crime_acs_join_log.csv")
+
+    # Imported here because the linkage module builds on this one
+    from crime_acs_linkage import PlaceLinker
+    place_index = PlaceIndex(acs_df)
+    linker = PlaceLinker(place_index, os.path.join(output_directory, "crime_acs_match_table.csv"),
+                         min_confidence=min_confidence)
+
+    merged_df = join_crime_acs(crime_df, acs_df, place_index=place_index, logger=logger, linker=linker)
+    linker.save_match_table()
+    output_path = os.path.join(output_directory, "merged_crime_acs.csv")
+    merged_df.to_csv(output_path, index=False)
+    print(f"\nJoined panel saved to: {output_path}")
+
+    logger.print_final_summary()
+    logger.save_log(output_directory)
+    return merged_df
+
+# --- Main execution ---
+if __name__ == "__main__":
+    try:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        script_dir = os.path.abspath('.')
+
+    CRIME_PANEL_PATH = os.path.join(script_dir, "Data", "consolidated_violent_crime_data_2012-2023_reconstructed.csv")
+    ACS_PATH = os.path.join(script_dir, "Data", "ACS", "ready_to_merge.csv")
+    OUTPUT_DIRECTORY = os.path.join(script_dir, "Data", "ACS")
+    MIN_MATCH_CONFIDENCE = 0.9
+
+    run_crime_acs_join(CRIME_PANEL_PATH, ACS_PATH, OUTPUT_DIRECTORY, min_confidence=MIN_MATCH_CONFIDENCE)
@@ -0,0 +1,242 @@
+import pandas as pd
+import numpy as np
+import os
+import re
+import hashlib
+import difflib
+from collections import defaultdict, Counter
+from crime_acs_join import normalize_place_names
+
+# rapidfuzz is an optional dependency (pip install rapidfuzz): a much faster drop-in for
+# the difflib ratio. Matching gives the same results without it, only slower.
+try:
+    from rapidfuzz import fuzz
+except ImportError:
+    fuzz = None
+
+MATCH_TABLE_COLUMNS = ['State', 'City', 'place_id', 'ACS_City', 'Confidence', 'Method', 'Index_Hash']
+
+# Abbreviations FBI and Census names disagree on, expanded on both sides
+NAME_ABBREVIATIONS = {
+    'st': 'saint', 'ste': 'sainte', 'ft': 'fort', 'mt': 'mount', 'pt': 'point',
+    'twp': 'township', 'hts': 'heights', 'spgs': 'springs', 'n': 'north',
+    's': 'south', 'e': 'east', 'w': 'west',
+}
+
+# Place-type words that follow ACS place names ("Gilbert town", "Anchorage municipality")
+PLACE_TYPE_SUFFIX = re.compile(
+    r'\s+(city|town|village|borough|township|municipality|cdp|city and borough|'
+    r'unified government|consolidated government|metro government|metropolitan government|'
+    r'urban county|charter township)$'
+)
+
+def standardize_place_name(name, strip_place_type=False):
+    """
+    Reduce a canonical place name to the form used for fuzzy matching.
+
+    Footnote digits, punctuation and "(balance)" are removed and common
+    abbreviations are expanded, so "St. Louis", "Saint Louis3" and "St Louis"
+    all become "saint louis".
+
+    Args:
+        name (str): A name from normalize_place_names.
+        strip_place_type (bool): Also drop a trailing place type ("Gilbert town").
+                                 Only used for ACS names: in FBI names "Township"
+                                 or "Village" usually marks a separate agency.
+
+    Returns:
+        str: The standardized name.
+    """
+    name = re.sub(r'\(balance\)', ' ', name)
+    name = re.sub(r'\d+', ' ', name)
+    name = re.sub(r"[.,'’/-]", ' ', name)
+    tokens = [NAME_ABBREVIATIONS.get(token, token) for token in name.split()]
+    name = ' '.join(tokens)
+    previous = None if strip_place_type else name
+    while previous != name:
+        previous = name
+        name = PLACE_TYPE_SUFFIX.sub('', name)
+    return name.strip()
+
+def place_name_variants(name):
+    """
+    Standardized forms an ACS name can be matched on: with and without its place
+    type, and for "A (B)" also A and B on their own.
+    """
+    forms = [name]
+    inner = re.search(r'\(([^)]*)\)', name)
+    if inner and inner.group(1) != 'balance':
+        forms += [inner.group(1), name[:inner.start()] + name[inner.end():]]
+    variants = {standardize_place_name(form, strip_place_type) for form in forms for strip_place_type in (False, True)}
+    return sorted(variant for variant in variants if variant)
+
+def _ratio(a, b):
+    """Normalized indel similarity of two strings, in [0, 1]."""
+    if fuzz is not None:
+        return fuzz.ratio(a, b) / 100.0
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+def name_similarity(a, b):
+    """
+    Confidence in [0, 1] that two standardized names are the same place.
+
+    The character similarity of the full names, halved unless the names have
+    the same number of words and every word pair starts with the same letter
+    and is itself similar. Typos score high, while "West Orange"/"East Orange"
+    or "Arkansas City"/"Kansas City" stay below any useful threshold.
+    """
+    score = _ratio(a, b)
+    words_a, words_b = a.split(), b.split()
+    aligned = len(words_a) == len(words_b) and all(
+        x[0] == y[0] and _ratio(x, y) >= 0.8 for x, y in zip(words_a, words_b)
+    )
+    return score if aligned else score / 2
+
+def _trigrams(name):
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class PlaceLinker:
+    """
+    Links crime panel (State, City) names to ACS place keys.
+
+    Exact canonical matches come from the PlaceIndex. The remaining names are
+    compared with the ACS places that share their state and at least one name
+    trigram (the blocking index), and only the best-scoring candidates are
+    compared with the string-similarity measure. The best candidate of every
+    name is kept in a match table, with its confidence, that can be saved and
+    reused by later runs so only new names are scored.
+    """
+
+    def __init__(self, place_index, match_table_path=None, min_confidence=0.9, max_candidates=10):
+        """
+        Build the blocking index and load a saved match table.
+
+        Args:
+            place_index (PlaceIndex): The index over the ACS places.
+            match_table_path (str, optional): CSV file the match table is read from and saved to.
+            min_confidence (float): Fuzzy matches below this confidence are not used.
+            max_candidates (int): Candidates per name that are scored, picked by shared trigrams.
+        """
+        self.place_index = place_index
+        self.match_table_path = match_table_path
+        self.min_confidence = min_confidence
+        self.max_candidates = max_candidates
+
+        places = place_index.places
+        self._place_ids = places[place_index.place_column].astype(str).to_numpy()
+        self._place_cities = places[place_index.city_column].astype(str).to_numpy()
+        self._place_key_of_id = dict(zip(self._place_ids, places.index))
+
+        # Blocking index: (state code, trigram) -> place keys, plus exact standardized names
+        self._names = {}
+        self._exact = {}
+        self._blocks = defaultdict(set)
+        for place_key, state_code, city in zip(places.index, places['state_code'], normalize_place_names(places[place_index.city_column])):
+            for variant in place_name_variants(city):
+                self._names.setdefault(place_key, []).append(variant)
+                self._exact.setdefault((state_code, variant.replace(' ', '')), place_key)
+                for gram in _trigrams(variant):
+                    self._blocks[(state_code, gram)].add(place_key)
+
+        fingerprint = '\n'.join(sorted(f"{key}|{'|'.join(names)}" for key, names in self._names.items()))
+        self.index_hash = hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()[:16]
+        self.match_table = self._load_match_table()
+        self.scored = 0
+
+    def _load_match_table(self):
+        """Read the saved match table, keeping only rows scored against the current ACS places."""
+        if not self.match_table_path or not os.path.exists(self.match_table_path):
+            return pd.DataFrame(columns=MATCH_TABLE_COLUMNS)
+
+        table = pd.read_csv(self.match_table_path, dtype={'place_id': str, 'Index_Hash': str}, keep_default_na=False)
+        table = table[table['Index_Hash'] == self.index_hash]
+        table['Confidence'] = table['Confidence'].astype(float)
+        print(f"Loaded {len(table)} saved place matches from {self.match_table_path}")
+        return table.reset_index(drop=True)
+
+    def save_match_table(self):
+        """Write the match table to match_table_path."""
+        if not self.match_table_path:
+            return
+        self.match_table.sort_values(['State', 'City']).to_csv(self.match_table_path, index=False)
+        print(f"Match table saved to: {self.match_table_path}")
+
+    def _best_candidate(self, state_code, name):
+        """Score the blocked candidates of one standardized name."""
+        exact = self._exact.get((state_code, name.replace(' ', '')))
+        if exact is not None:
+            return exact, 1.0, 'standardized'
+
+        shared = Counter()
+        for gram in _trigrams(name):
+            shared.update(self._blocks.get((state_code, gram), ()))
+        if not shared:
+            return -1, 0.0, 'no candidates'
+
+        best_key, best_score = -1, 0.0
+        for place_key, _ in shared.most_common(self.max_candidates):
+            score = max(name_similarity(name, variant) for variant in self._names[place_key])
+            if score > best_score:
+                best_key, best_score = place_key, score
+        return best_key, best_score, 'fuzzy'
+
+    def link(self, states, cities):
+        """
+        Add any unseen (State, City) names to the match table.
+
+        Args:
+            states (pd.Series): State names.
+            cities (pd.Series): City names.
+        """
+        names = pd.DataFrame({
+            'State': normalize_place_names(states).to_numpy(),
+            'City': normalize_place_names(cities).to_numpy(),
+        }).dropna().drop_duplicates()
+        seen = pd.MultiIndex.from_frame(self.match_table[['State', 'City']])
+        names = names[~pd.MultiIndex.from_frame(names).isin(seen)]
+        if names.empty:
+            return
+        if fuzz is None:
+            print(f"Info: rapidfuzz not installed, scoring {len(names)} new names with difflib. "
+                  f"Install with: pip install rapidfuzz")
+
+        exact_keys = self.place_index.lookup(names['State'], names['City'])
+        state_codes = self.place_index.state_codes(names['State'])
+
+        rows = []
+        for state, city, exact_key, state_code in zip(names['State'], names['City'], exact_keys, state_codes):
+            if exact_key >= 0:
+                place_key, confidence, method = exact_key, 1.0, 'exact'
+            elif state_code < 0:
+                place_key, confidence, method = -1, 0.0, 'unknown state'
+            else:
+                place_key, confidence, method = self._best_candidate(state_code, standardize_place_name(city))
+                self.scored += 1
+            rows.append((state, city,
+                         self._place_ids[place_key] if place_key >= 0 else '',
+                         self._place_cities[place_key] if place_key >= 0 else '',
+                         round(confidence, 4), method, self.index_hash))
+
+        new_rows = pd.DataFrame(rows, columns=MATCH_TABLE_COLUMNS)
+        self.match_table = pd.concat([self.match_table, new_rows], ignore_index=True) if len(self.match_table) else new_rows
+
+    def lookup(self, states, cities):
+        """
+        Map state and city names to place keys, using matches at or above min_confidence.
+
+        Args:
+            states (pd.Series): State names.
+            cities (pd.Series): City names.
+
+        Returns:
+            np.ndarray: The place key for each row, -1 where there is no accepted match.
+        """
+        self.link(states, cities)
+        accepted = self.match_table[(self.match_table['Confidence'] >= self.min_confidence)
+                                    & (self.match_table['place_id'] != '')]
+        accepted_index = pd.MultiIndex.from_frame(accepted[['State', 'City']])
+        accepted_keys = np.append(accepted['place_id'].map(self._place_key_of_id).to_numpy(dtype='int64'), -1)
+
+        query = pd.MultiIndex.from_arrays([normalize_place_names(states), normalize_place_names(cities)])
+        return accepted_keys[accepted_index.get_indexer(query)]
@@ -0,0 +1,289 @@
+import os
+import json
+import argparse
+import time
+import hashlib
+from crime_data_logger import LOG_COLUMNS
+from lazy_imports import lazy_import, is_available
+
+pd = lazy_import('pandas')
+
+# Parquet is preferred for cached frames; fall back to pickle when pyarrow is missing
+CACHE_FRAME_FORMAT = 'parquet' if is_available('pyarrow') else 'pkl'
+
+# Bump whenever the cleaning logic in process_crime_year changes so stale entries are ignored
+CACHE_VERSION = 7
+
+class CrimeDataCache:
+    """
+    A content-addressed cache for cleaned Table 8 results.
+    Entries are keyed on the workbook's content hash plus its compiled schema entry, so a
+    year is only re-read from Excel when its file or schema changes. Different tables and
+    measure selections of the same workbook keep separate entries.
+    """
+
+    def __init__(self, cache_directory, max_size_mb=500, max_age_days=90):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_directory (str): Directory holding the cache entries.
+            max_size_mb (float, optional): Total size above which the oldest entries are evicted.
+            max_age_days (float, optional): Age after which unused entries are evicted.
+        """
+        self.cache_directory = cache_directory
+        self.max_size_mb = max_size_mb
+        self.max_age_days = max_age_days
+        os.makedirs(cache_directory, exist_ok=True)
+
+    @staticmethod
+    def hash_file(file_path, chunk_size=1 << 20):
+        """Return the SHA-256 hex digest of a file's contents."""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def make_key(self, file_path, year_schema):
+        """
+        Build the cache key for a workbook and its schema entry.
+
+        Args:
+            file_path (str): Path to the source Excel file.
+            year_schema (YearSchema): The compiled schema entry for the year.
+
+        Returns:
+            str: Hex digest identifying the entry.
+        """
+        digest = hashlib.sha256()
+        digest.update(f"v{CACHE_VERSION}".encode())
+        digest.update(self.hash_file(file_path).encode())
+        digest.update(year_schema.fingerprint().encode())
+        return digest.hexdigest()
+
+    def _entry_paths(self, year, key):
+        base = os.path.join(self.cache_directory, f"{year}_{key}")
+        return f"{base}.{CACHE_FRAME_FORMAT}", f"{base}.json"
+
+    def _entry_files(self):
+        """List (year, path) for every file in the cache directory."""
+        entries = []
+        for name in os.listdir(self.cache_directory):
+            year = name.split('_', 1)[0]
+            if year.isdigit():
+                entries.append((int(year), os.path.join(self.cache_directory, name)))
+        return entries
+
+    def _entries(self):
+        """Group the cache files by entry: (newest mtime, total size, paths) per entry."""
+        grouped = {}
+        for _, path in self._entry_files():
+            grouped.setdefault(os.path.splitext(path)[0], []).append(path)
+        entries = []
+        for paths in grouped.values():
+            stats = [os.stat(path) for path in paths]
+            entries.append((max(stat.st_mtime for stat in stats), sum(stat.st_size for stat in stats), paths))
+        return entries
+
+    def get(self, year, file_path, year_schema):
+        """
+        Look up the cleaned result for a year.
+
+        Args:
+            year (int): Year of the data.
+            file_path (str): Path to the source Excel file.
+            year_schema (YearSchema): The compiled schema entry for the year.
+
+        Returns:
+            tuple or None: (yearly DataFrame, processing stats, dropped city records),
+                           or None on a cache miss.
+        """
+        frame_path, meta_path = self._entry_paths(year, self.make_key(file_path, year_schema))
+        if not (os.path.exists(frame_path) and os.path.exists(meta_path)):
+            return None
+
+        try:
+            if CACHE_FRAME_FORMAT == 'parquet':
+                yearly_data = pd.read_parquet(frame_path)
+            else:
+                yearly_data = pd.read_pickle(frame_path)
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except Exception as e:
+            print(f"    Warning: Could not read cache entry for {year} ({e}). Re-reading workbook.")
+            return None
+
+        # Touch the entry so eviction treats it as recently used
+        now = time.time()
+        for path in (frame_path, meta_path):
+            os.utime(path, (now, now))
+
+        dropped_cities = pd.DataFrame(meta['dropped'], columns=LOG_COLUMNS)
+        return yearly_data, meta['stats'], dropped_cities
+
+    def contains(self, year, file_path, year_schema):
+        """Check whether a year has an entry for this workbook and schema, without loading it."""
+        frame_path, meta_path = self._entry_paths(year, self.make_key(file_path, year_schema))
+        return os.path.exists(frame_path) and os.path.exists(meta_path)
+
+    def put(self, year, file_path, year_schema, yearly_data, year_stats, dropped_cities):
+        """
+        Store the cleaned result for a year.
+
+        Args:
+            year (int): Year of the data.
+            file_path (str): Path to the source Excel file.
+            year_schema (YearSchema): The compiled schema entry for the year.
+            yearly_data (pd.DataFrame): The cleaned State/City/Violent Crime/Year rows.
+            year_stats (dict): The logger's processing stats for the year.
+            dropped_cities (pd.DataFrame): The logger's dropped city records for the year.
+        """
+        # Drop superseded versions of this selection first; other tables and measures keep their entries
+        key = self.make_key(file_path, year_schema)
+        selection = _selection(file_path, year_schema)
+        self._remove_superseded(year, key, selection)
+
+        frame_path, meta_path = self._entry_paths(year, key)
+        if CACHE_FRAME_FORMAT == 'parquet':
+            yearly_data.to_parquet(frame_path, index=False)
+        else:
+            yearly_data.to_pickle(frame_path)
+
+        meta = {
+            'version': CACHE_VERSION,
+            'year': year,
+            **selection,
+            'stats': year_stats,
+            'dropped': dropped_cities.to_dict('records'),
+        }
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f, default=_json_default)
+
+    def _remove_superseded(self, year, key, selection):
+        """
+        Remove a year's entries for the same workbook, table and measures under another
+        key, and its entries written by another cache version, which can no longer be hit.
+        """
+        prefix = f"{year}_"
+        for name in os.listdir(self.cache_directory):
+            if not (name.startswith(prefix) and name.endswith('.json')) or name == f"{year}_{key}.json":
+                continue
+            meta_path = os.path.join(self.cache_directory, name)
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            same_selection = all(meta.get(field) == value for field, value in selection.items())
+            if meta.get('version') != CACHE_VERSION or same_selection:
+                base = meta_path[:-len('.json')]
+                for path in (f"{base}.parquet", f"{base}.pkl", meta_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    def invalidate(self, year=None):
+        """
+        Remove cached entries.
+
+        Args:
+            year (int, optional): Only remove entries for this year. Removes everything if None.
+
+        Returns:
+            int: Number of files removed.
+        """
+        removed = 0
+        for entry_year, path in self._entry_files():
+            if year is None or entry_year == year:
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def evict(self, max_size_mb=None, max_age_days=None):
+        """
+        Evict entries older than max_age_days, then the least recently used
+        entries until the cache fits in max_size_mb. An entry's frame and
+        metadata files are always removed together.
+
+        Args:
+            max_size_mb (float, optional): Size limit; defaults to the instance setting.
+            max_age_days (float, optional): Age limit; defaults to the instance setting.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        max_size_mb = self.max_size_mb if max_size_mb is None else max_size_mb
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+
+        entries = sorted(self._entries())
+        evicted = []
+        if max_age_days is not None:
+            cutoff = time.time() - max_age_days * 86400
+            while entries and entries[0][0] < cutoff:
+                evicted.append(entries.pop(0))
+
+        if max_size_mb is not None:
+            total_size = sum(size for _, size, _ in entries)
+            while entries and total_size > max_size_mb * 1024 * 1024:
+                evicted.append(entries.pop(0))
+                total_size -= evicted[-1][1]
+
+        for _, _, paths in evicted:
+            for path in paths:
+                os.remove(path)
+        return len(evicted)
+
+    def print_info(self):
+        """Print the cached years and the total cache size."""
+        entries = self._entry_files()
+        total_size = sum(os.path.getsize(path) for _, path in entries)
+        years = sorted({year for year, _ in entries})
+        print(f"Cache directory: {self.cache_directory}")
+        print(f"  Format: {CACHE_FRAME_FORMAT}")
+        print(f"  Cached years: {', '.join(str(y) for y in years) if years else 'none'}")
+        print(f"  Total size: {total_size / 1024 / 1024:.2f} MB")
+
+def _selection(file_path, year_schema):
+    """What an entry holds apart from its contents: the workbook, the table and the measures read."""
+    return {'source_file': os.path.basename(file_path), 'table': year_schema.table,
+            'measures': list(year_schema.entry)}
+
+def _json_default(value):
+    """Convert numpy scalars in log records to plain Python values."""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+# --- Cache maintenance commands ---
+if __name__ == "__main__":
+    try:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        script_dir = os.path.abspath('.')
+
+    parser = argparse.ArgumentParser(description="Inspect and trim the parse cache of process_crime_data.py.")
+    parser.add_argument("--cache-dir", default=os.path.join(script_dir, "Data", ".crime_cache"),
+                        help="Cache directory: <--output-dir>/.crime_cache of the processing runs "
+                             "(default: Data/.crime_cache).")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("info", help="Show the cached years and the cache size (default).")
+    invalidate = commands.add_parser("invalidate", help="Remove every entry, or the entries of one year.")
+    invalidate.add_argument("year", nargs="?", type=int, help="Only remove this year's entries.")
+    evict = commands.add_parser("evict", help="Remove old and least recently used entries.")
+    evict.add_argument("max_size_mb", nargs="?", type=float, help="Size limit (default: 500).")
+    evict.add_argument("max_age_days", nargs="?", type=float, help="Age limit (default: 90).")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.cache_dir):
+        print(f"❌ Error: Cache directory not found at the expected path.")
+        print(f"   Checked for: {args.cache_dir}")
+    else:
+        cache = CrimeDataCache(args.cache_dir)
+        if args.command == 'invalidate':
+            removed = cache.invalidate(args.year)
+            print(f"Removed {removed} cache files{f' for {args.year}' if args.year else ''}.")
+        elif args.command == 'evict':
+            removed = cache.evict(args.max_size_mb, args.max_age_days)
+            print(f"Evicted {removed} cache entries.")
+        else:
+            cache.print_info()
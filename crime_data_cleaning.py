@@ -0,0 +1,117 @@
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# A leading number, optional space-separated thousands groups, then any footnote or text
+NUMERIC_TEXT_PATTERN = r'^\s*(-?\d+(?:\.\d+)?)((?:\s\d{3}(?!\d))*)\s*(.*?)\s*$'
+
+# Footnote markers after a state ("ALABAMA3", "MAINE*") and after a city ("Albany2")
+STATE_SUFFIX_PATTERN = r'[^A-Za-z\s]+$'
+CITY_SUFFIX_PATTERN = r'\d+$'
+
+def clean_names(names, suffix_pattern, categorical=False, upper=False):
+    """
+    Strips a trailing footnote pattern and surrounding whitespace from names.
+
+    Only the distinct values are cleaned: a year has tens of thousands of rows
+    but about 50 states, so the regex runs once per state instead of once per
+    row, and the cleaned values are mapped back through integer codes.
+
+    Args:
+        names (pd.Series): State or city names. Non-string values are cleaned as strings.
+        suffix_pattern (str): Regex removed from the end of every name.
+        categorical (bool): Return a categorical Series instead of an object one.
+        upper (bool): Upper-case the names and collapse inner whitespace. Table 8 spells
+                      states in upper case except in 2020 ("Alabama"), so states are
+                      upper-cased to keep one spelling per state across years.
+
+    Returns:
+        pd.Series: The cleaned names, aligned with the input. NaN stays NaN and
+                   names that clean to an empty string become NaN.
+    """
+    codes, uniques = pd.factorize(names)
+    cleaned = pd.Series(uniques, dtype=object).astype(str).str.replace(suffix_pattern, '', regex=True).str.strip()
+    if upper:
+        cleaned = cleaned.str.replace(r'\s+', ' ', regex=True).str.upper()
+    # A name that is only whitespace or a footnote is missing, so it is forward-filled like a blank cell
+    cleaned = cleaned.mask(cleaned == '')
+    # Names that only differed by their footnote (or case) share a category
+    cleaned_codes, categories = pd.factorize(cleaned)
+    codes = np.where(codes >= 0, cleaned_codes[codes.clip(0)], -1)
+    cleaned_names = pd.Series(pd.Categorical.from_codes(codes, categories), index=names.index, name=names.name)
+    return cleaned_names if categorical else cleaned_names.astype(object)
+
+def share_categories(frames, columns):
+    """
+    Gives categorical columns the same categories in every frame, so concatenating
+    the frames keeps them categorical instead of falling back to object.
+
+    Args:
+        frames (list): DataFrames to align; the columns are replaced in place.
+        columns (iterable): Columns to make categorical. Columns missing from a frame are skipped.
+    """
+    for column in columns:
+        values = [frame[column] for frame in frames if column in frame.columns]
+        if not values:
+            continue
+        categories = set()
+        for series in values:
+            present = series.cat.categories if isinstance(series.dtype, pd.CategoricalDtype) else series.dropna().unique()
+            categories.update(present)
+        dtype = pd.CategoricalDtype(sorted(categories))
+        for frame in frames:
+            if column in frame.columns:
+                frame[column] = frame[column].astype(dtype)
+
+def clean_numeric_columns(df, columns):
+    """
+    Converts all the given columns to floats in one batched pass.
+
+    Cells that are already numeric (or parse cleanly as numbers) take a fast path
+    and are never converted to strings. The remaining text cells from every column
+    are stacked into a single Series and parsed together: commas are removed, the
+    leading number is kept (including decimals and a sign), space-separated
+    thousands groups such as "12 345" are joined, and any trailing footnote marker
+    or text is stripped. Text with no leading number becomes NaN.
+
+    Args:
+        df (pd.DataFrame): The data; the columns are replaced in place.
+        columns (list): Columns to convert.
+
+    Returns:
+        pd.DataFrame: One row per text cell that needed stripping or could not be
+                      parsed, indexed by the row's index, with 'Column',
+                      'Original_Value' and 'Cleaned_Value' columns.
+    """
+    audit_columns = ['Column', 'Original_Value', 'Cleaned_Value']
+    columns = [col for col in dict.fromkeys(columns) if col in df.columns]
+    if not columns:
+        return pd.DataFrame(columns=audit_columns)
+
+    block = df[columns]
+    numeric = block.apply(pd.to_numeric, errors='coerce').astype(float)
+
+    # Slow path only for cells that hold something but did not parse as a number
+    needs_text = numeric.isna() & block.notna()
+    if not needs_text.to_numpy().any():
+        df[columns] = numeric
+        return pd.DataFrame(columns=audit_columns)
+
+    text = block.where(needs_text).stack()
+    text = text[text.notna()]
+    raw = text.astype(str)
+    parts = raw.str.replace(',', '', regex=False).str.extract(NUMERIC_TEXT_PATTERN)
+
+    parsed = pd.to_numeric(parts[0].str.cat(parts[1].str.replace(' ', '', regex=False)), errors='coerce')
+    numeric.update(parsed.unstack())
+    df[columns] = numeric
+
+    # Audit every text cell that was not a plain formatted number
+    stripped = parts[2].fillna('').ne('') | parsed.isna()
+    audit = pd.DataFrame({
+        'Column': text.index.get_level_values(1),
+        'Original_Value': raw.to_numpy(),
+        'Cleaned_Value': parsed.to_numpy(dtype=float),
+    }, index=text.index.get_level_values(0))
+    return audit[np.asarray(stripped)]
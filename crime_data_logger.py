@@ -1,6 +1,41 @@
-import pandas as pd
 import os
+import sys
+import csv
+import json
+import time
+import shutil
+import argparse
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime
+from lazy_imports import lazy_import
+
+# pandas and numpy are only loaded once drop records are batched or read back
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# Peak RSS comes from getrusage, which is not available on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Column order of the detailed drop log
+LOG_COLUMNS = ['Year', 'State', 'City', 'Reason', 'Original_Value', 'Processing_Step', 'Timestamp']
+
+# Columns with one value per batch, kept as categoricals while buffered
+CATEGORY_COLUMNS = ['Reason', 'Processing_Step', 'Timestamp']
+
+# Columns the summary statistics are counted over
+COUNTED_COLUMNS = ['Year', 'Reason', 'Processing_Step', 'State']
+
+def _is_present(value):
+    """pd.notna for a single value, without importing pandas: False for None, NaN and pd.NA."""
+    try:
+        return value is not None and bool(value == value)
+    except TypeError:
+        # pd.NA == pd.NA is NA, which has no truth value
+        return False
 
 class CrimeDataLogger:
     """
@@ -8,21 +43,41 @@ class CrimeDataLogger:
     Provides detailed logs and summary statistics for data quality assessment.
     """
     
-    def __init__(self, log_filename=None):
+    def __init__(self, log_filename=None, spill_directory=None, max_buffer_rows=100_000):
         """
         Initialize the logger.
         
         Args:
             log_filename (str, optional): Custom filename for the log file.
                                         If None, auto-generates with timestamp.
+            spill_directory (str, optional): Directory for the on-disk drop log. When set,
+                                             buffered records are appended to
+                                             "<log name>.partial.csv" there whenever
+                                             max_buffer_rows are held in memory, so memory
+                                             stays bounded and a crashed run keeps its log.
+            max_buffer_rows (int): Drop records held in memory before they are spilled.
         """
         if log_filename is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             log_filename = f"crime_data_processing_log_{timestamp}.csv"
         
         self.log_filename = log_filename
-        self.dropped_cities = []
+        # Drop records are kept as columnar batches and only concatenated on demand
+        self._drop_batches = []
+        self._pending_records = []
+        self._buffered_rows = 0
+        self.max_buffer_rows = max_buffer_rows
+        self._spill_path = None
+        self._spilled_rows = 0
+        if spill_directory is not None:
+            os.makedirs(spill_directory, exist_ok=True)
+            self._spill_path = os.path.join(spill_directory, os.path.splitext(log_filename)[0] + ".partial.csv")
+        # Summary counters, kept up to date as records are logged
+        self.total_dropped = 0
+        self._counters = {column: Counter() for column in COUNTED_COLUMNS}
         self.processing_stats = {}
+        self.stage_timings = {}
+        self.started = datetime.now()
         
     def log_dropped_city(self, year, state, city, reason, original_value=None, step=None):
         """
@@ -36,37 +91,147 @@ class CrimeDataLogger:
             original_value (str, optional): The problematic original value
             step (str, optional): Which processing step caused the drop
         """
-        self.dropped_cities.append({
+        record = {
             'Year': year,
-            'State': state if pd.notna(state) else 'UNKNOWN',
-            'City': city if pd.notna(city) else 'UNKNOWN',
+            'State': state if _is_present(state) else 'UNKNOWN',
+            'City': city if _is_present(city) else 'UNKNOWN',
             'Reason': reason,
             'Original_Value': str(original_value) if original_value is not None else '',
             'Processing_Step': step if step else 'Unknown',
             'Timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
+        }
+        self._pending_records.append(record)
+        self.total_dropped += 1
+        for column in COUNTED_COLUMNS:
+            self._counters[column][record[column]] += 1
+        if len(self._pending_records) >= self.max_buffer_rows:
+            self._flush_pending()
     
-    def log_batch_dropped(self, year, dropped_df, reason, step=None):
+    def log_batch_dropped(self, year, dropped_df, reason, step=None, value_column=None):
         """
-        Log multiple dropped cities from a DataFrame.
+        Log multiple dropped cities from a DataFrame as a single columnar batch.
         
         Args:
             year (int): Year of the data
             dropped_df (pd.DataFrame): DataFrame containing dropped cities
             reason (str): Reason for dropping
             step (str, optional): Which processing step caused the drop
+            value_column (str, optional): Column holding the problematic value. Defaults to
+                                          'Violent Crime', else the first column after State/City.
         """
-        for _, row in dropped_df.iterrows():
-            state = row.get('State', 'UNKNOWN')
-            city = row.get('City', 'UNKNOWN')
-            # Try to get the problematic value from the row
-            original_value = None
-            if 'Violent Crime' in row:
-                original_value = row['Violent Crime']
-            elif len(row) > 2:
-                original_value = row.iloc[2]  # First data column after State/City
-                
-            self.log_dropped_city(year, state, city, reason, original_value, step)
+        if dropped_df.empty:
+            return
+        
+        def column_or_unknown(name):
+            if name not in dropped_df.columns:
+                return 'UNKNOWN'
+            values = dropped_df[name].astype(object)
+            return values.where(values.notna(), 'UNKNOWN').to_numpy()
+        
+        # Try to get the problematic value from the rows
+        if value_column is not None:
+            values = dropped_df[value_column]
+        elif 'Violent Crime' in dropped_df.columns:
+            values = dropped_df['Violent Crime']
+        elif dropped_df.shape[1] > 2:
+            values = dropped_df.iloc[:, 2]  # First data column after State/City
+        else:
+            values = None
+        original_values = np.asarray(values.to_numpy(dtype=object), dtype=str) if values is not None else ''
+        
+        def constant(value):
+            return pd.Categorical.from_codes(np.zeros(len(dropped_df), dtype='int8'), [value])
+        
+        batch = pd.DataFrame({
+            'Year': year,
+            'State': column_or_unknown('State'),
+            'City': column_or_unknown('City'),
+            'Reason': constant(reason),
+            'Original_Value': original_values,
+            'Processing_Step': constant(step if step else 'Unknown'),
+            'Timestamp': constant(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        }, columns=LOG_COLUMNS)
+        
+        self._add_batch(batch)
+    
+    def _add_batch(self, batch):
+        """Buffer a batch of drop records, count it and spill the buffer once it is full."""
+        self._flush_pending()
+        self.total_dropped += len(batch)
+        for column in COUNTED_COLUMNS:
+            counter = self._counters[column]
+            for value, count in batch[column].value_counts(sort=False).items():
+                if count:
+                    counter[value] += int(count)
+        to_category = {column: 'category' for column in CATEGORY_COLUMNS
+                       if not isinstance(batch[column].dtype, pd.CategoricalDtype)}
+        self._append_buffer(batch.astype(to_category) if to_category else batch)
+    
+    def _append_buffer(self, batch):
+        self._drop_batches.append(batch)
+        self._buffered_rows += len(batch)
+        if self._spill_path is not None and self._buffered_rows >= self.max_buffer_rows:
+            self._spill()
+    
+    def _flush_pending(self):
+        """Move individually logged records into a batch, preserving log order."""
+        if self._pending_records:
+            batch = pd.DataFrame(self._pending_records, columns=LOG_COLUMNS)
+            self._pending_records = []
+            self._append_buffer(batch)
+    
+    def _spill(self):
+        """Append the buffered records to the on-disk log and clear the buffer."""
+        if self._pending_records:
+            self._drop_batches.append(pd.DataFrame(self._pending_records, columns=LOG_COLUMNS))
+            self._pending_records = []
+        if not self._drop_batches and self._spilled_rows:
+            return
+        
+        first_write = self._spilled_rows == 0
+        for batch in self._drop_batches or [pd.DataFrame(columns=LOG_COLUMNS)]:
+            batch.to_csv(self._spill_path, mode='w' if first_write else 'a', header=first_write, index=False)
+            first_write = False
+            self._spilled_rows += len(batch)
+        self._drop_batches = []
+        self._buffered_rows = 0
+    
+    def _iter_log_chunks(self, chunk_size=500_000):
+        """Yield the drop log in order: spilled records read back in chunks, then the buffer."""
+        self._flush_pending()
+        if self._spilled_rows:
+            for chunk in pd.read_csv(self._spill_path, dtype=str, keep_default_na=False, chunksize=chunk_size):
+                chunk['Year'] = chunk['Year'].astype(int)
+                yield chunk
+        yield from self._drop_batches
+    
+    def get_dropped_log(self):
+        """
+        Return every drop record as a single DataFrame. With a spill directory this
+        reads the spilled records back, so summaries should use get_summary_statistics.
+        
+        Returns:
+            pd.DataFrame: The detailed log, with LOG_COLUMNS as columns
+        """
+        # Batches have their own categories, so they are returned as plain strings
+        chunks = [chunk.astype({column: object for column in CATEGORY_COLUMNS})
+                  for chunk in self._iter_log_chunks() if len(chunk)]
+        if not chunks:
+            return pd.DataFrame(columns=LOG_COLUMNS)
+        return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    
+    def dropped_count(self, year):
+        """Return the number of drop records logged for a year."""
+        return self._counters['Year'][year]
+    
+    def has_dropped_cities(self):
+        """Return True if any drop records have been logged."""
+        return self.total_dropped > 0
+    
+    @property
+    def dropped_cities(self):
+        """The drop records as a list of dicts."""
+        return self.get_dropped_log().to_dict('records')
     
     def update_processing_stats(self, year, step, total_before, total_after):
         """
@@ -88,6 +253,92 @@ class CrimeDataLogger:
             'retention_rate': (total_after / total_before * 100) if total_before > 0 else 0
         }
     
+    @staticmethod
+    def _peak_rss_mb():
+        """Peak resident set size of this process so far in MB, or None if unavailable."""
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    
+    @contextmanager
+    def time_stage(self, year, stage, rows=None):
+        """
+        Time a processing stage and record its wall time, CPU time, throughput and the
+        process's peak RSS when the stage ends. The peak RSS is the high-water mark since
+        the process started, so it never falls from one stage to the next: it shows how
+        large the process has grown, not what the stage allocated (--profile measures
+        that with tracemalloc).
+        
+        Usage:
+            with logger.time_stage(year, "Excel Parsing") as timing:
+                df = reader.read()
+                timing['rows'] = len(df)
+        
+        Args:
+            year (int): Year of the data
+            stage (str): Stage name
+            rows (int, optional): Rows handled by the stage; can also be set on the yielded dict
+        """
+        timing = {'rows': rows}
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield timing
+        finally:
+            wall = time.perf_counter() - wall_start
+            rows = timing['rows']
+            self.stage_timings.setdefault(year, {})[stage] = {
+                'wall_s': round(wall, 4),
+                'cpu_s': round(time.process_time() - cpu_start, 4),
+                # Process high-water mark, not the stage's own peak
+                'peak_rss_mb': round(self._peak_rss_mb(), 1) if resource is not None else None,
+                'rows': rows,
+                'rows_per_s': round(rows / wall, 1) if rows is not None and wall > 0 else None
+            }
+    
+    def export_year_timings(self, year):
+        """Return the stage timings recorded for a single year."""
+        return self.stage_timings.get(year, {})
+    
+    def export_year_results(self, year):
+        """
+        Export the stats and dropped city records for a single year.
+        
+        Args:
+            year (int): Year of the data
+        
+        Returns:
+            tuple: (processing stats for the year, DataFrame of dropped city records)
+        """
+        year_stats = self.processing_stats.get(year, {})
+        year_chunks = [chunk[chunk['Year'] == year] for chunk in self._iter_log_chunks()]
+        year_chunks = [chunk.astype({column: object for column in CATEGORY_COLUMNS}) for chunk in year_chunks if len(chunk)]
+        if not year_chunks:
+            return year_stats, pd.DataFrame(columns=LOG_COLUMNS)
+        dropped_cities = pd.concat(year_chunks, ignore_index=True)
+        return year_stats, dropped_cities
+    
+    def merge_worker_results(self, year, year_stats, dropped_cities, year_timings=None):
+        """
+        Merge the stats and dropped city records produced by a worker process.
+        
+        Args:
+            year (int): Year the worker processed
+            year_stats (dict): The worker's processing stats for the year
+            dropped_cities (pd.DataFrame or list): The worker's dropped city records
+            year_timings (dict, optional): The worker's stage timings for the year
+        """
+        if year_stats:
+            self.processing_stats[year] = year_stats
+        if year_timings:
+            self.stage_timings[year] = year_timings
+        if not isinstance(dropped_cities, pd.DataFrame):
+            dropped_cities = pd.DataFrame(list(dropped_cities), columns=LOG_COLUMNS)
+        if not dropped_cities.empty:
+            self._add_batch(dropped_cities[LOG_COLUMNS])
+    
     def print_processing_summary(self, year):
         """Print a summary of processing statistics for a given year."""
         if year not in self.processing_stats:
@@ -110,21 +361,38 @@ class CrimeDataLogger:
             overall_retention = (total_final / total_original * 100)
             print(f"    Overall: {total_original} → {total_final} "
                  f"({overall_retention:.1f}% overall retention)")
+        
+        if year in self.stage_timings:
+            print(f"    Stage timings for {year}:")
+            for stage, timing in self.stage_timings[year].items():
+                print(f"      {self._format_timing(stage, timing)}")
+    
+    @staticmethod
+    def _format_timing(stage, timing):
+        """One-line description of a stage timing."""
+        line = f"{stage}: {timing['wall_s']:.3f}s wall, {timing['cpu_s']:.3f}s CPU"
+        if timing.get('rows_per_s') is not None:
+            line += f", {timing['rows']:,} rows ({timing['rows_per_s']:,.0f} rows/s)"
+        if timing.get('peak_rss_mb') is not None:
+            line += f", process peak RSS {timing['peak_rss_mb']:.1f} MB"
+        return line
     
     def get_summary_statistics(self):
-        """Generate summary statistics about dropped cities."""
-        if not self.dropped_cities:
+        """
+        Generate summary statistics about dropped cities from the running counters,
+        without reading the log back.
+        """
+        if not self.has_dropped_cities():
             return "No cities were dropped during processing."
         
-        df = pd.DataFrame(self.dropped_cities)
-        
+        counters = self._counters
         summary = {
-            'total_dropped': len(df),
-            'by_year': df['Year'].value_counts().to_dict(),
-            'by_reason': df['Reason'].value_counts().to_dict(),
-            'by_step': df['Processing_Step'].value_counts().to_dict(),
-            'by_state': df['State'].value_counts().head(10).to_dict(),
-            'most_common_reasons': df['Reason'].value_counts().head(5).to_dict()
+            'total_dropped': self.total_dropped,
+            'by_year': dict(counters['Year'].most_common()),
+            'by_reason': dict(counters['Reason'].most_common()),
+            'by_step': dict(counters['Processing_Step'].most_common()),
+            'by_state': dict(counters['State'].most_common(10)),
+            'most_common_reasons': dict(counters['Reason'].most_common(5))
         }
         
         return summary
@@ -135,7 +403,7 @@ class CrimeDataLogger:
         print("FINAL PROCESSING SUMMARY")
         print("="*60)
         
-        if not self.dropped_cities:
+        if not self.has_dropped_cities():
             print("✅ No cities were dropped during processing!")
             return
         
@@ -164,15 +432,122 @@ class CrimeDataLogger:
         Args:
             output_directory (str): Directory to save the log file
         """
-        if not self.dropped_cities:
+        if not self.has_dropped_cities():
             print("No dropped cities to log.")
             return
         
         log_path = os.path.join(output_directory, self.log_filename)
-        df = pd.DataFrame(self.dropped_cities)
-        df.to_csv(log_path, index=False)
+        if self._spill_path is None:
+            df = self.get_dropped_log()
+            df.to_csv(log_path, index=False)
+            print(f"Detailed log saved to: {log_path}")
+            return
+        
+        # The on-disk log already holds the spilled records; append the rest and move it into place
+        self._spill()
+        if os.path.abspath(self._spill_path) != os.path.abspath(log_path):
+            if self._spill_path.endswith(".partial.csv"):
+                shutil.move(self._spill_path, log_path)
+                # Records logged after this point are appended to the saved log
+                self._spill_path = log_path
+            else:
+                shutil.copyfile(self._spill_path, log_path)
         print(f"Detailed log saved to: {log_path}")
     
+    def save_timings(self, output_directory="."):
+        """
+        Save the per-year stage timings to a JSON sidecar next to the log file.
+        
+        Args:
+            output_directory (str): Directory to save the sidecar
+        
+        Returns:
+            str or None: The sidecar path, or None if nothing was timed
+        """
+        if not self.stage_timings:
+            return None
+        
+        timings_path = os.path.join(output_directory, os.path.splitext(self.log_filename)[0] + "_timings.json")
+        with open(timings_path, 'w') as f:
+            json.dump({
+                'generated': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'years': {str(year): self.stage_timings[year] for year in sorted(self.stage_timings)}
+            }, f, indent=2)
+        print(f"Stage timings saved to: {timings_path}")
+        return timings_path
+    
+    @classmethod
+    def from_saved_log(cls, log_path):
+        """
+        Open a drop log written by save_log, e.g. to print its summary.
+        
+        The records are counted with the csv module, so summaries don't load
+        pandas; get_dropped_log reads the file back on demand. Stage timings are
+        loaded from the JSON sidecar if it exists.
+        
+        Args:
+            log_path (str): Path of the saved log CSV
+        
+        Returns:
+            CrimeDataLogger: A logger holding the saved records
+        """
+        logger = cls(os.path.basename(log_path))
+        logger._spill_path = log_path
+        with open(log_path, newline='') as f:
+            for record in csv.DictReader(f):
+                record['Year'] = int(record['Year'])
+                for column in COUNTED_COLUMNS:
+                    logger._counters[column][record[column]] += 1
+                logger.total_dropped += 1
+        logger._spilled_rows = logger.total_dropped
+        
+        timings_path = os.path.splitext(log_path)[0] + "_timings.json"
+        if os.path.exists(timings_path):
+            with open(timings_path) as f:
+                logger.stage_timings = {int(year): stages for year, stages in json.load(f)['years'].items()}
+        return logger
+    
+    def save_run(self, database_path, table=None, output_file=None, options=None):
+        """
+        Store this run's stats, stage timings and drop records in the run database
+        (crime_data_runs.RunDatabase), so runs can be compared with SQL queries.
+        
+        Args:
+            database_path (str): Path of the SQLite run database
+            table (str, optional): Table the run processed
+            output_file (str, optional): The run's consolidated output
+            options (dict, optional): Run settings to keep with the run
+        
+        Returns:
+            int: The run id
+        """
+        from crime_data_runs import RunDatabase
+        
+        run_id = RunDatabase(database_path).record_run(
+            self.log_filename, self.started, self.processing_stats, self.stage_timings,
+            self._iter_log_chunks(), table, output_file, options)
+        print(f"Run {run_id} recorded in: {database_path}")
+        return run_id
+    
+    def read_saved_log(self, output_directory=".", log_filename=None):
+        """
+        Read back the detailed log written by a previous save_log call.
+        
+        Args:
+            output_directory (str): Directory the log file was saved to
+            log_filename (str, optional): Name of the saved log. Defaults to this logger's
+        
+        Returns:
+            pd.DataFrame: Dropped city records, empty if no log exists
+        """
+        log_path = os.path.join(output_directory, log_filename or self.log_filename)
+        if not os.path.exists(log_path):
+            return pd.DataFrame(columns=LOG_COLUMNS)
+        
+        df = pd.read_csv(log_path, dtype=str, keep_default_na=False)
+        df['Year'] = df['Year'].astype(int)
+        return df
+    
     def create_summary_report(self, output_directory="."):
         """
         Create a summary report of processing statistics.
@@ -198,7 +573,15 @@ class CrimeDataLogger:
                         f.write(f"  {step}: {stats['before']} → {stats['after']} "
                                f"({stats['retention_rate']:.1f}% retained)\n")
             
-            if self.dropped_cities:
+            if self.stage_timings:
+                f.write("\nSTAGE TIMINGS BY YEAR:\n")
+                f.write("-" * 30 + "\n")
+                for year in sorted(self.stage_timings.keys()):
+                    f.write(f"\nYear {year}:\n")
+                    for stage, timing in self.stage_timings[year].items():
+                        f.write(f"  {self._format_timing(stage, timing)}\n")
+            
+            if self.has_dropped_cities():
                 summary = self.get_summary_statistics()
                 f.write(f"\nDROPPED CITIES SUMMARY:\n")
                 f.write("-" * 30 + "\n")
@@ -215,14 +598,42 @@ class CrimeDataLogger:
         print(f"Summary report saved to: {report_path}")
 
 # Helper function for easy integration
-def create_logger(log_filename=None):
+def create_logger(log_filename=None, spill_directory=None, max_buffer_rows=100_000):
     """
     Factory function to create a CrimeDataLogger instance.
     
     Args:
         log_filename (str, optional): Custom filename for the log
+        spill_directory (str, optional): Directory the drop log is spilled to
+        max_buffer_rows (int): Drop records held in memory before spilling
     
     Returns:
         CrimeDataLogger: Configured logger instance
     """
-    return CrimeDataLogger(log_filename)
\ No newline at end of file
+    return CrimeDataLogger(log_filename, spill_directory, max_buffer_rows)
+# --- Main execution ---
+if __name__ == "__main__":
+    try:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        script_dir = os.path.abspath('.')
+    
+    default_log = os.path.join(script_dir, "Data",
+                               "consolidated_violent_crime_data_2012-2023_reconstructed_processing_log.csv")
+    parser = argparse.ArgumentParser(description="Summarize a saved crime data processing log.")
+    parser.add_argument("log", nargs="?", default=default_log, help="Drop log written by a processing run.")
+    args = parser.parse_args()
+    
+    if not os.path.exists(args.log):
+        print(f"❌ Error: Processing log not found at the expected path.")
+        print(f"   Checked for: {args.log}")
+    else:
+        saved = CrimeDataLogger.from_saved_log(args.log)
+        saved.log_filename = args.log
+        saved.print_final_summary()
+        if saved.stage_timings:
+            print(f"\n⏱️ Stage timings:")
+            for year in sorted(saved.stage_timings):
+                total = saved.stage_timings[year].get("Year Total")
+                if total:
+                    print(f"    {year}: {CrimeDataLogger._format_timing('Year Total', total)}")
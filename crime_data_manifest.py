@@ -0,0 +1,113 @@
+import os
+import json
+from datetime import datetime
+from crime_data_cache import CrimeDataCache, CACHE_VERSION
+
+def get_manifest_path(output_filename):
+    """Return the manifest path that sits next to a consolidated output file."""
+    return os.path.splitext(output_filename)[0] + "_manifest.json"
+
+def load_manifest(output_filename, verbose=True):
+    """
+    Load the manifest describing the years in an existing consolidated output.
+
+    Args:
+        output_filename (str): The full path of the consolidated CSV.
+        verbose (bool): Explain why an existing manifest is not usable.
+
+    Returns:
+        dict or None: The manifest, or None if there is no usable manifest.
+    """
+    manifest_path = get_manifest_path(output_filename)
+    if not os.path.exists(manifest_path):
+        return None
+
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        if verbose:
+            print(f"Warning: Could not read manifest '{manifest_path}' ({e}). Running a full rebuild.")
+        return None
+
+    if manifest.get('processing_version') != CACHE_VERSION:
+        if verbose:
+            print("Info: Manifest was written by a different processing version. Running a full rebuild.")
+        return None
+
+    return manifest
+
+def save_manifest(output_filename, year_entries):
+    """
+    Write the manifest for a consolidated output.
+
+    Args:
+        output_filename (str): The full path of the consolidated CSV.
+        year_entries (dict): Manifest entry per year, as built by build_year_entry.
+    """
+    manifest = {
+        'processing_version': CACHE_VERSION,
+        'output_file': os.path.basename(output_filename),
+        'updated': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'years': {str(year): year_entries[year] for year in sorted(year_entries)}
+    }
+    with open(get_manifest_path(output_filename), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+def build_year_entry(full_file_path, year_schema, row_count, year_stats, probe=None, dropped=0):
+    """
+    Build the manifest entry recording which source file and schema produced a year.
+
+    Args:
+        full_file_path (str): The path to the year's Excel file.
+        year_schema (YearSchema): The compiled schema entry for the year.
+        row_count (int): Number of rows the year contributed to the output.
+        year_stats (dict): The logger's processing stats for the year.
+        probe (dict, optional): The year's header probe (probe_year_header). Its header
+                                row and column mapping are recorded so --plan can show
+                                unchanged years without opening their workbook.
+        dropped (int): Drop records the year wrote to the output's log, so an incremental
+                       run can tell whether the saved log still holds them.
+
+    Returns:
+        dict: The manifest entry.
+    """
+    file_stat = os.stat(full_file_path)
+    entry = {
+        'source_file': os.path.basename(full_file_path),
+        'size': file_stat.st_size,
+        'mtime': file_stat.st_mtime,
+        'content_hash': CrimeDataCache.hash_file(full_file_path),
+        'schema_hash': year_schema.fingerprint(),
+        'rows': row_count,
+        'dropped': dropped,
+        'stats': year_stats
+    }
+    if probe and not probe['error']:
+        entry['header'] = {key: probe[key] for key in ('header_row', 'mapping', 'missing')}
+    return entry
+
+def is_year_unchanged(entry, full_file_path, year_schema):
+    """
+    Check whether a year's source file and schema match its manifest entry.
+    The file is only hashed when its size or modification time has changed.
+
+    Args:
+        entry (dict or None): The year's manifest entry.
+        full_file_path (str): The path to the year's Excel file.
+        year_schema (YearSchema): The compiled schema entry for the year.
+
+    Returns:
+        bool: True if the year can be reused from the existing output.
+    """
+    if not entry:
+        return False
+    if entry['source_file'] != os.path.basename(full_file_path):
+        return False
+    if entry['schema_hash'] != year_schema.fingerprint():
+        return False
+
+    file_stat = os.stat(full_file_path)
+    if file_stat.st_size == entry['size'] and file_stat.st_mtime == entry['mtime']:
+        return True
+    return CrimeDataCache.hash_file(full_file_path) == entry['content_hash']
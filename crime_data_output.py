@@ -0,0 +1,149 @@
+import os
+import shutil
+from crime_panel_store import build_panel_store, get_store_path
+from lazy_imports import lazy_import, is_available
+
+pd = lazy_import('pandas')
+
+# Parquet output needs pyarrow; CSV output works without it. pyarrow is only
+# imported by the first Parquet read or write.
+PYARROW_AVAILABLE = is_available('pyarrow')
+
+def _pyarrow():
+    """Import pyarrow and pyarrow.dataset on first use."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    return pa, ds
+
+OUTPUT_FORMATS = ('csv', 'parquet', 'store')
+
+def get_dataset_path(output_filename):
+    """Return the partitioned Parquet dataset directory that sits next to the CSV output."""
+    return os.path.splitext(output_filename)[0] + "_parquet"
+
+def to_typed_panel(final_df):
+    """
+    Convert the consolidated panel to compact, typed columns.
+
+    Args:
+        final_df (pd.DataFrame): Key columns, measure columns and Year, e.g.
+                                 State/City/Violent Crime/Year rows.
+
+    Returns:
+        pd.DataFrame: Categorical State, string for the other key columns, a
+                      nullable integer per measure (nullable float if any value
+                      is fractional) and int32 Year.
+    """
+    typed = pd.DataFrame(index=final_df.index)
+    for column in final_df.columns:
+        values = final_df[column]
+        if column == 'Year':
+            typed[column] = values.astype('int32')
+        elif column == 'State':
+            typed[column] = values.astype('category')
+        elif pd.api.types.is_numeric_dtype(values):
+            typed[column] = values.astype('Float64')
+            present = typed[column].dropna()
+            if (present % 1 == 0).all():
+                typed[column] = typed[column].astype('Int64')
+            else:
+                print(f"Warning: Non-integer {column.lower()} values found; keeping them as floats in the Parquet output.")
+        else:
+            typed[column] = values.astype('string')
+    return typed.reset_index(drop=True)
+
+def write_crime_panel(final_df, output_filename, output_formats=('csv',), key_columns=('State', 'City')):
+    """
+    Write the consolidated panel in the requested formats.
+
+    Args:
+        final_df (pd.DataFrame): Key, measure and Year columns, e.g. State/City/Violent Crime/Year rows.
+        output_filename (str): The full path for the CSV output. The Parquet
+                               dataset and the panel store are written next to it
+                               (see get_dataset_path and get_store_path).
+        output_formats (iterable): Any of 'csv', 'parquet' and 'store'.
+        key_columns (tuple): The table's key columns, which the store is sorted and indexed by.
+
+    Returns:
+        list: Paths that were written.
+    """
+    written = []
+    if 'csv' in output_formats:
+        final_df.to_csv(output_filename, index=False)
+        written.append(output_filename)
+
+    if 'store' in output_formats:
+        written.append(build_panel_store(final_df, get_store_path(output_filename), key_columns))
+
+    if 'parquet' in output_formats:
+        if not PYARROW_AVAILABLE:
+            print("Warning: pyarrow not installed. Install with: pip install pyarrow")
+            print("Skipping the Parquet dataset output.")
+            return written
+
+        dataset_path = get_dataset_path(output_filename)
+        if os.path.isdir(dataset_path):
+            shutil.rmtree(dataset_path)
+        pa, ds = _pyarrow()
+        table = pa.Table.from_pandas(to_typed_panel(final_df), preserve_index=False)
+        partitioning = ds.partitioning(pa.schema([('Year', pa.int32())]), flavor='hive')
+        ds.write_dataset(table, dataset_path, format='parquet', partitioning=partitioning,
+                         basename_template='part-{i}.parquet')
+        written.append(dataset_path)
+
+    return written
+
+def read_crime_panel(dataset_path, years=None, columns=None):
+    """
+    Read the partitioned Parquet dataset, touching only the requested years.
+
+    Args:
+        dataset_path (str): Directory written by write_crime_panel.
+        years (iterable, optional): Years to load. Loads every year if None.
+        columns (list, optional): Columns to load. Loads every column if None.
+
+    Returns:
+        pd.DataFrame: The typed panel rows.
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is needed to read the Parquet dataset. Install with: pip install pyarrow")
+    pa, ds = _pyarrow()
+
+    partitioning = ds.partitioning(pa.schema([('Year', pa.int32())]), flavor='hive')
+    dataset = ds.dataset(dataset_path, format='parquet', partitioning=partitioning)
+    year_filter = ds.field('Year').isin([int(y) for y in years]) if years is not None else None
+    return dataset.to_table(columns=columns, filter=year_filter).to_pandas()
+
+def read_existing_panel(output_filename, output_formats=('csv',), key_columns=('State', 'City')):
+    """
+    Read a previously written panel back, from the CSV if it is one of the
+    output formats and exists, otherwise from the Parquet dataset.
+
+    Args:
+        output_filename (str): The full path of the CSV output.
+        output_formats (iterable): The formats the current run writes.
+        key_columns (tuple): The table's key columns, read back as strings.
+
+    Returns:
+        pd.DataFrame or None: The panel with the same column types as a fresh
+                              run, or None if neither output exists.
+    """
+    if 'csv' in output_formats and os.path.exists(output_filename):
+        df = pd.read_csv(output_filename, keep_default_na=False, dtype={key: str for key in key_columns})
+        # Without the default NA values a blank measure is read as '' rather than NaN
+        for column in df.columns:
+            if column not in key_columns and not pd.api.types.is_numeric_dtype(df[column]):
+                df[column] = pd.to_numeric(df[column], errors='coerce')
+        return df
+
+    dataset_path = get_dataset_path(output_filename)
+    if 'parquet' in output_formats and os.path.isdir(dataset_path) and PYARROW_AVAILABLE:
+        df = read_crime_panel(dataset_path)
+        panel = pd.DataFrame({key: df[key].astype(object) for key in key_columns})
+        for column in df.columns:
+            if column not in key_columns and column != 'Year':
+                panel[column] = df[column].astype(float)
+        panel['Year'] = df['Year'].astype(int)
+        return panel
+
+    return None
@@ -0,0 +1,59 @@
+import os
+import pstats
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+
+@contextmanager
+def profile_year(year, profile_directory=None, top=25):
+    """
+    Opt-in cProfile and tracemalloc hook around the processing of one year.
+
+    Writes crime_<year>.prof (load it with pstats or snakeviz) and
+    crime_<year>_profile.txt with the top functions by cumulative time and the
+    top allocation sites still held at the end of the year. Does nothing when
+    profile_directory is None.
+
+    Args:
+        year (int): The year being processed.
+        profile_directory (str, optional): Directory for the profile files.
+        top (int): Number of functions and allocation sites in the text report.
+    """
+    if profile_directory is None:
+        yield
+        return
+
+    os.makedirs(profile_directory, exist_ok=True)
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+
+        profile_path = os.path.join(profile_directory, f"crime_{year}.prof")
+        profiler.dump_stats(profile_path)
+
+        report_path = os.path.join(profile_directory, f"crime_{year}_profile.txt")
+        with open(report_path, 'w') as f:
+            f.write(f"PROFILE FOR {year}\n")
+            f.write("=" * 50 + "\n")
+            f.write(f"Peak traced Python memory: {peak / (1024 * 1024):.1f} MB\n\n")
+
+            f.write(f"TOP {top} FUNCTIONS BY CUMULATIVE TIME:\n")
+            stats = pstats.Stats(profiler, stream=f)
+            stats.sort_stats('cumulative').print_stats(top)
+
+            f.write(f"\nTOP {top} ALLOCATION SITES:\n")
+            for stat in snapshot.statistics('lineno')[:top]:
+                f.write(f"  {stat}\n")
+
+        print(f"    Profile for {year} saved to: {profile_path}")
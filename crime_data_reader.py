@@ -0,0 +1,226 @@
+import re
+from itertools import chain
+from lazy_imports import lazy_import, import_optional
+
+pd = lazy_import('pandas')
+
+# The Excel engines are imported by the first workbook of their format:
+# openpyxl for .xlsx, xlrd for .xls
+def _open_xlsx(file_path):
+    openpyxl = import_optional('openpyxl', "to read .xlsx files")
+    return openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+
+def _open_xls(file_path):
+    xlrd = import_optional('xlrd', "to read .xls files")
+    return xlrd.open_workbook(file_path, on_demand=True)
+
+# FBI notes at the bottom of the sheet start with a footnote number, often run into the text ("1Limited data"), or "NOTE"
+FOOTNOTE_PATTERN = re.compile(r'^\s*(\d+\s*[a-z]|note\b)', re.IGNORECASE)
+
+# The header is the first of these rows that starts with the table's key columns
+HEADER_SEARCH_ROWS = 12
+# Rows above the header in most Table 8 workbooks, used when no header row is found
+DEFAULT_SKIPROWS = 3
+
+def _convert_xls_row(values):
+    """Match pandas' handling of xlrd cells: blanks become None, integral floats ints."""
+    converted = []
+    for value in values:
+        if value == '':
+            value = None
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        converted.append(value)
+    return converted
+
+def format_header(header_row):
+    """Header cells as column names: newlines become spaces and blank cells "Unnamed: i"."""
+    return [
+        str(value).replace('\n', ' ').strip() if value is not None else f"Unnamed: {i}"
+        for i, value in enumerate(header_row)
+    ]
+
+def _key_name(value):
+    return re.sub(r'[^a-z]+', '', str(value).lower()) if value is not None else ''
+
+def find_header_row(rows, key_columns=('State', 'City')):
+    """
+    Find the header among the first rows of a sheet.
+
+    Args:
+        rows (list): Leading rows of cell values.
+        key_columns (tuple): The table's leading key columns.
+
+    Returns:
+        int or None: Index of the first row whose first cells are the key columns
+                     (ignoring case, spacing, punctuation and footnote digits), or None.
+    """
+    keys = [_key_name(key) for key in key_columns]
+    for i, row in enumerate(rows):
+        cells = [_key_name(value) for value in tuple(row)[:len(keys)]]
+        if cells == keys:
+            return i
+    return None
+
+def read_head_rows(file_path, n_rows=HEADER_SEARCH_ROWS):
+    """
+    Read only the first rows of a workbook's first sheet.
+
+    Args:
+        file_path (str): Path to the .xls or .xlsx file.
+        n_rows (int): Number of rows to read.
+
+    Returns:
+        list: The rows as lists of cell values (None for blank cells).
+    """
+    if file_path.endswith('.xlsx'):
+        book = _open_xlsx(file_path)
+        try:
+            return [list(row) for row in book.worksheets[0].iter_rows(max_row=n_rows, values_only=True)]
+        finally:
+            book.close()
+
+    book = _open_xls(file_path)
+    try:
+        sheet = book.sheet_by_index(0)
+        return [_convert_xls_row(sheet.row_values(i)) for i in range(min(n_rows, sheet.nrows))]
+    finally:
+        book.release_resources()
+
+def probe_header(file_path, key_columns=('State', 'City'), header_offset=None, n_rows=HEADER_SEARCH_ROWS):
+    """
+    Locate and read a workbook's header row without reading any data rows.
+
+    Args:
+        file_path (str): Path to the .xls or .xlsx file.
+        key_columns (tuple): The table's leading key columns.
+        header_offset (int, optional): Rows above the header, if the table fixes it.
+        n_rows (int): Number of leading rows searched for the header.
+
+    Returns:
+        tuple: (header row index, formatted header). The index is None, and the
+               header is the row after the default title rows, if no row starts
+               with the key columns.
+    """
+    if header_offset is not None:
+        rows = read_head_rows(file_path, header_offset + 1)
+        return header_offset, format_header(rows[header_offset]) if len(rows) > header_offset else []
+
+    rows = read_head_rows(file_path, n_rows)
+    header_row = find_header_row(rows, key_columns)
+    if header_row is not None:
+        return header_row, format_header(rows[header_row])
+    return None, format_header(rows[DEFAULT_SKIPROWS]) if len(rows) > DEFAULT_SKIPROWS else []
+
+class TableStreamReader:
+    """
+    Streams an FBI table workbook row by row, keeping only the key columns
+    (State and City for Table 8) and the schema-resolved columns and stopping
+    at the footnote block at the bottom of the sheet. Uses openpyxl read-only mode for .xlsx and xlrd on-demand
+    sheets for .xls, so memory does not grow with the width of the workbook.
+    """
+
+    def __init__(self, file_path, year_schema, skiprows=None, chunk_size=10000):
+        """
+        Open the workbook and resolve its header row.
+
+        Args:
+            file_path (str): Path to the .xls or .xlsx file.
+            year_schema (YearSchema): The compiled schema entry for the year.
+            skiprows (int, optional): Rows above the header row. Defaults to the table's
+                                      header offset, else the first row starting with
+                                      the key columns, else the row after the title rows.
+            chunk_size (int): Rows per yielded chunk.
+        """
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.rows_read = 0
+        self.stopped_at_footnotes = False
+        self._book = None
+
+        if file_path.endswith('.xlsx'):
+            self._book = _open_xlsx(file_path)
+            sheet = self._book.worksheets[0]
+            self._rows = sheet.iter_rows(values_only=True)
+        else:
+            self._book = _open_xls(file_path)
+            sheet = self._book.sheet_by_index(0)
+            self._rows = (_convert_xls_row(sheet.row_values(i)) for i in range(sheet.nrows))
+
+        if skiprows is None:
+            skiprows = year_schema.header_offset
+        if skiprows is None:
+            head = [row for _, row in zip(range(HEADER_SEARCH_ROWS), self._rows)]
+            skiprows = find_header_row(head, year_schema.key_columns)
+            if skiprows is None:
+                skiprows = DEFAULT_SKIPROWS
+            self._rows = chain(head[skiprows:], self._rows)
+        else:
+            for _ in zip(range(skiprows), self._rows):
+                pass
+        self.header_row = skiprows
+
+        self.header = format_header(next(self._rows, ()))
+
+        # The key columns (State and City for Table 8) are always the leading columns
+        n_keys = len(year_schema.key_columns)
+        self.resolved = year_schema.resolve_columns(self.header[n_keys:]) if len(self.header) >= n_keys else {}
+        measure_cols = list(dict.fromkeys(self.resolved.values()))
+        self.columns = list(year_schema.key_columns) + measure_cols
+        self._positions = list(range(n_keys)) + [self.header.index(col, n_keys) for col in measure_cols]
+
+    def _is_footnote(self, row):
+        first = row[0]
+        return (isinstance(first, str) and FOOTNOTE_PATTERN.match(first) is not None
+                and all(value is None for value in row[1:]))
+
+    def iter_chunks(self):
+        """
+        Yield the kept columns as DataFrames of at most chunk_size rows.
+        Fully blank rows are skipped and reading stops at the footnote block.
+        """
+        positions = self._positions
+        width = max(positions) + 1
+        chunk = []
+        for raw_row in self._rows:
+            if len(raw_row) < width:
+                raw_row = tuple(raw_row) + (None,) * (width - len(raw_row))
+            row = [raw_row[i] for i in positions]
+
+            if self._is_footnote(row):
+                self.stopped_at_footnotes = True
+                break
+            if all(value is None for value in row):
+                continue
+
+            chunk.append(row)
+            self.rows_read += 1
+            if len(chunk) >= self.chunk_size:
+                yield pd.DataFrame(chunk, columns=self.columns)
+                chunk = []
+
+        if chunk:
+            yield pd.DataFrame(chunk, columns=self.columns)
+
+    def read(self):
+        """Read every data row into a single DataFrame."""
+        chunks = list(self.iter_chunks())
+        if not chunks:
+            return pd.DataFrame(columns=self.columns)
+        return pd.concat(chunks, ignore_index=True)
+
+    def close(self):
+        """Release the workbook."""
+        if self._book is None:
+            return
+        if hasattr(self._book, 'release_resources'):
+            self._book.release_resources()
+        else:
+            self._book.close()
+        self._book = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
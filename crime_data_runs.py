@@ -0,0 +1,290 @@
+import os
+import json
+import sqlite3
+import argparse
+from contextlib import closing
+from datetime import datetime
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+# Default database file, kept in the output directory next to the drop log
+RUNS_DATABASE_NAME = "crime_data_runs.sqlite"
+
+# Drop records are inserted in batches of this many rows
+INSERT_BATCH_ROWS = 50_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started TEXT NOT NULL,
+    finished TEXT NOT NULL,
+    log_name TEXT NOT NULL,
+    table_name TEXT,
+    output_file TEXT,
+    total_dropped INTEGER NOT NULL,
+    options TEXT
+);
+CREATE TABLE IF NOT EXISTS year_stats (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    year INTEGER NOT NULL,
+    step TEXT NOT NULL,
+    step_order INTEGER NOT NULL,
+    rows_before INTEGER,
+    rows_after INTEGER,
+    dropped INTEGER,
+    retention_rate REAL,
+    PRIMARY KEY (run_id, year, step)
+);
+CREATE TABLE IF NOT EXISTS stage_timings (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    year INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    wall_s REAL,
+    cpu_s REAL,
+    peak_rss_mb REAL,  -- peak RSS of the process so far when the stage ended
+    rows INTEGER,
+    rows_per_s REAL,
+    PRIMARY KEY (run_id, year, stage)
+);
+CREATE TABLE IF NOT EXISTS drops (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    year INTEGER NOT NULL,
+    state TEXT,
+    city TEXT,
+    reason TEXT,
+    original_value TEXT,
+    step TEXT,
+    logged TEXT
+);
+CREATE INDEX IF NOT EXISTS drops_by_year ON drops (run_id, year);
+CREATE INDEX IF NOT EXISTS drops_by_step ON drops (run_id, step);
+CREATE INDEX IF NOT EXISTS drops_by_state ON drops (run_id, state);
+CREATE INDEX IF NOT EXISTS drops_by_reason ON drops (run_id, reason);
+CREATE INDEX IF NOT EXISTS drops_by_city ON drops (run_id, state, city, year);
+CREATE INDEX IF NOT EXISTS runs_by_output ON runs (output_file, table_name, run_id);
+DROP INDEX IF EXISTS runs_by_log;
+"""
+
+class RunDatabase:
+    """
+    SQLite store of processing runs. Each run gets an id; its per-year/per-step
+    stats, stage timings and drop records are stored under that id, so runs can
+    be compared with indexed queries instead of by parsing text reports.
+    """
+
+    def __init__(self, database_path):
+        """
+        Open the database, creating it and its tables if needed.
+
+        Args:
+            database_path (str): Path of the SQLite file.
+        """
+        self.database_path = database_path
+        directory = os.path.dirname(os.path.abspath(database_path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.database_path)
+        connection.execute("PRAGMA foreign_keys = ON")
+        return connection
+
+    def record_run(self, log_name, started, processing_stats, stage_timings, drop_chunks, table=None,
+                   output_file=None, options=None):
+        """
+        Store one run in a single transaction.
+
+        Args:
+            log_name (str): Drop log file name.
+            started (datetime): When the run started.
+            processing_stats (dict): Year -> step -> {'before', 'after', 'dropped', 'retention_rate'}.
+            stage_timings (dict): Year -> stage -> timing, as recorded by CrimeDataLogger.time_stage.
+            drop_chunks (iterable): DataFrames with the drop log columns (LOG_COLUMNS).
+            table (str, optional): Table the run processed, e.g. 'table8'.
+            output_file (str, optional): The run's consolidated output; runs of the same output
+                                         and table are compared with each other.
+            options (dict, optional): Run settings worth keeping, stored as JSON.
+
+        Returns:
+            int: The new run id.
+        """
+        with closing(self._connect()) as connection, connection:
+            cursor = connection.execute(
+                "INSERT INTO runs (started, finished, log_name, table_name, output_file, total_dropped, options) "
+                "VALUES (?, ?, ?, ?, ?, 0, ?)",
+                (started.strftime("%Y-%m-%d %H:%M:%S"), datetime.now().strftime("%Y-%m-%d %H:%M:%S"), log_name,
+                 table, output_file, json.dumps(options, default=str) if options else None))
+            run_id = cursor.lastrowid
+
+            connection.executemany(
+                "INSERT INTO year_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, int(year), step, order, stats['before'], stats['after'], stats['dropped'],
+                  stats['retention_rate'])
+                 for year, steps in processing_stats.items() for order, (step, stats) in enumerate(steps.items())])
+            connection.executemany(
+                "INSERT INTO stage_timings VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, int(year), stage, timing['wall_s'], timing['cpu_s'], timing['peak_rss_mb'], timing['rows'],
+                  timing['rows_per_s'])
+                 for year, stages in stage_timings.items() for stage, timing in stages.items()])
+
+            total_dropped = 0
+            for chunk in drop_chunks:
+                for start in range(0, len(chunk), INSERT_BATCH_ROWS):
+                    batch = chunk.iloc[start:start + INSERT_BATCH_ROWS]
+                    columns = [batch['Year'].astype(int).tolist()] + [
+                        batch[column].astype(object).astype(str).tolist()
+                        for column in ('State', 'City', 'Reason', 'Original_Value', 'Processing_Step', 'Timestamp')]
+                    connection.executemany("INSERT INTO drops VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                           ((run_id,) + row for row in zip(*columns)))
+                    total_dropped += len(batch)
+            connection.execute("UPDATE runs SET total_dropped = ? WHERE run_id = ?", (total_dropped, run_id))
+        return run_id
+
+    def _query(self, sql, parameters=()):
+        with closing(self._connect()) as connection:
+            return pd.read_sql_query(sql, connection, params=parameters)
+
+    def list_runs(self, output_file=None):
+        """
+        Every stored run, newest first.
+
+        Args:
+            output_file (str, optional): Only runs writing this consolidated output.
+
+        Returns:
+            pd.DataFrame: One row per run.
+        """
+        if output_file is None:
+            return self._query("SELECT * FROM runs ORDER BY run_id DESC")
+        return self._query("SELECT * FROM runs WHERE output_file = ? ORDER BY run_id DESC", (output_file,))
+
+    def resolve_runs(self, run_id=None, previous_run_id=None):
+        """
+        Fill in the runs to compare: by default the latest run and the run before
+        it that wrote the same output from the same table. Runs over other years or
+        measures write other outputs, so they are never paired by default.
+
+        Returns:
+            tuple: (run id, previous run id or None).
+
+        Raises:
+            ValueError: If the database has no such run.
+        """
+        with closing(self._connect()) as connection:
+            if run_id is None:
+                row = connection.execute("SELECT MAX(run_id) FROM runs").fetchone()
+                run_id = row[0]
+            run_row = connection.execute("SELECT output_file, table_name FROM runs WHERE run_id = ?",
+                                         (run_id,)).fetchone()
+            if run_id is None or run_row is None:
+                raise ValueError(f"No run {run_id if run_id is not None else ''} in {self.database_path}".strip())
+            if previous_run_id is None:
+                row = connection.execute("SELECT MAX(run_id) FROM runs WHERE output_file IS ? AND table_name IS ? "
+                                         "AND run_id < ?", (*run_row, run_id)).fetchone()
+                previous_run_id = row[0]
+        return run_id, previous_run_id
+
+    def new_drops(self, run_id=None, previous_run_id=None):
+        """
+        Cities dropped (or flagged) in a run but not for the same year in the previous run.
+
+        Args:
+            run_id (int, optional): Defaults to the latest run.
+            previous_run_id (int, optional): Defaults to the run before it with the same drop log.
+
+        Returns:
+            pd.DataFrame: Year, State, City, Reason and Step of the new drop records.
+        """
+        run_id, previous_run_id = self.resolve_runs(run_id, previous_run_id)
+        return self._query(
+            "SELECT d.year AS Year, d.state AS State, d.city AS City, d.reason AS Reason, d.step AS Step "
+            "FROM drops d WHERE d.run_id = ? AND NOT EXISTS ("
+            "  SELECT 1 FROM drops p WHERE p.run_id = ? AND p.state = d.state AND p.city = d.city AND p.year = d.year)"
+            " ORDER BY d.year, d.state, d.city", (run_id, previous_run_id if previous_run_id is not None else -1))
+
+    def retention_changes(self, run_id=None, previous_run_id=None):
+        """
+        Per-year/per-step row counts of two runs where they differ.
+
+        Returns:
+            pd.DataFrame: Year, Step and the before/after counts and retention of both runs.
+        """
+        run_id, previous_run_id = self.resolve_runs(run_id, previous_run_id)
+        return self._query(
+            "SELECT c.year AS Year, c.step AS Step, p.rows_after AS previous_after, c.rows_after AS current_after, "
+            "p.retention_rate AS previous_retention, c.retention_rate AS current_retention "
+            "FROM year_stats c LEFT JOIN year_stats p ON p.run_id = ? AND p.year = c.year AND p.step = c.step "
+            "WHERE c.run_id = ? AND (p.rows_after IS NULL OR p.rows_after != c.rows_after "
+            "OR p.rows_before != c.rows_before) ORDER BY c.year, c.step_order",
+            (previous_run_id if previous_run_id is not None else -1, run_id))
+
+    def run_summary(self, run_id=None):
+        """
+        Drop counts of a run by reason, step and year, as the text report listed them.
+
+        Returns:
+            dict: 'run' (the runs row), 'by_reason', 'by_step' and 'by_year' DataFrames.
+        """
+        run_id, _ = self.resolve_runs(run_id, -1)
+        return {
+            'run': self._query("SELECT * FROM runs WHERE run_id = ?", (run_id,)),
+            'by_reason': self._query("SELECT reason AS Reason, COUNT(*) AS Dropped FROM drops WHERE run_id = ? "
+                                     "GROUP BY reason ORDER BY Dropped DESC", (run_id,)),
+            'by_step': self._query("SELECT step AS Step, COUNT(*) AS Dropped FROM drops WHERE run_id = ? "
+                                   "GROUP BY step ORDER BY Dropped DESC", (run_id,)),
+            'by_year': self._query("SELECT year AS Year, COUNT(*) AS Dropped FROM drops WHERE run_id = ? "
+                                   "GROUP BY year ORDER BY year", (run_id,)),
+        }
+
+# --- Main execution ---
+if __name__ == "__main__":
+    try:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        script_dir = os.path.abspath('.')
+
+    parser = argparse.ArgumentParser(description="Query the processing-run database.")
+    parser.add_argument("--database", default=os.path.join(script_dir, "Data", RUNS_DATABASE_NAME),
+                        help="SQLite file written by the processing runs.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("list", help="List the stored runs.")
+    for name, description in (("summary", "Drop counts of a run."),
+                              ("diff", "Cities dropped in a run but not in the previous one."),
+                              ("retention", "Year/step row counts that changed between two runs.")):
+        subparser = subcommands.add_parser(name, help=description)
+        subparser.add_argument("--run", type=int, help="Run id. Defaults to the latest run.")
+        if name != "summary":
+            subparser.add_argument("--against", type=int,
+                                   help="Run to compare with. Defaults to the previous run of the same output.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        print(f"❌ Error: Run database not found at the expected path.")
+        print(f"   Checked for: {args.database}")
+    else:
+        database = RunDatabase(args.database)
+        try:
+            if args.command == "list":
+                print(database.list_runs().to_string(index=False))
+            elif args.command == "summary":
+                summary = database.run_summary(args.run)
+                run = summary['run'].iloc[0]
+                print(f"📊 Run {run['run_id']} ({run['log_name']}, {run['started']} - {run['finished']}): "
+                      f"{run['total_dropped']} records")
+                for key in ('by_reason', 'by_step', 'by_year'):
+                    print()
+                    print(summary[key].to_string(index=False))
+            elif args.command == "diff":
+                run_id, previous_run_id = database.resolve_runs(args.run, args.against)
+                new_drops = database.new_drops(run_id, previous_run_id)
+                print(f"{len(new_drops)} records in run {run_id} with no drop of the same city-year in run {previous_run_id}:")
+                print(new_drops.to_string(index=False))
+            else:
+                run_id, previous_run_id = database.resolve_runs(args.run, args.against)
+                changes = database.retention_changes(run_id, previous_run_id)
+                print(f"{len(changes)} year/step counts changed between run {previous_run_id} and run {run_id}:")
+                print(changes.to_string(index=False))
+        except ValueError as e:
+            print(f"❌ Error: {e}")
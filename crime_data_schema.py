@@ -1,3 +1,28 @@
+import re
+import json
+import hashlib
+
+# Canonical offense fields and the header aliases accepted for each of them.
+# Aliases are normalized with normalize_header, so case, whitespace and trailing
+# footnote digits ("Rape1", "Arson3") do not matter.
+FIELD_ALIASES = {
+    'violent_total': ["Violent crime", "Violent Crime Total"],
+    'murder': ["Murder and nonnegligent manslaughter", "Murder"],
+    'rape_revised': ["Rape (revised definition)", "Rape"],
+    'rape_legacy': ["Rape (legacy definition)", "Forcible rape"],
+    'robbery': ["Robbery"],
+    'aggravated_assault': ["Aggravated assault"],
+    'property_total': ["Property crime", "Property Crime Total"],
+    'burglary': ["Burglary"],
+    'larceny_theft': ["Larceny-theft", "Larceny- theft"],
+    'motor_vehicle_theft': ["Motor vehicle theft"],
+    'arson': ["Arson"],
+    'population': ["Population"],
+    'student_enrollment': ["Student enrollment"],
+}
+
+COMPONENT_FIELDS = ['murder', 'rape_revised', 'rape_legacy', 'robbery', 'aggravated_assault']
+
 def get_crime_schema():
     """
     Defines the expected column names for violent crime and its components for each year.
@@ -21,7 +46,7 @@ def get_crime_schema():
             "Violent Crime": "Violent crime",
             "Components": [
                 "Murder and nonnegligent manslaughter",
-                "Rape (revised definition) 1"
+                "Rape (revised definition) 1",
                 "Rape (legacy definition) 2",
                 "Robbery",
                 "Aggravated assault"
@@ -123,3 +148,174 @@ def get_crime_schema():
         # Add schemas for other years as needed
     }
     return schema
+
+def normalize_header(name):
+    """Converts to lowercase, collapses all whitespace and strips trailing footnote digits."""
+    name = ' '.join(str(name).lower().split())
+    return re.sub(r'\s*\d+$', '', name)
+
+def violent_crime_measures(entry):
+    """Express a get_crime_schema() entry as the measures of a year: only 'Violent Crime'."""
+    return {"Violent Crime": {"Total": entry["Violent Crime"], "Components": list(entry["Components"])}}
+
+class YearSchema:
+    """
+    A single year's schema entry, compiled into a lookup from normalized header
+    aliases to canonical fields.
+    
+    The entry lists the measures read from the year's workbook. Each measure has a
+    total column and, optionally, component columns the total is rebuilt from. The
+    first measure is the primary one: rows without it are dropped.
+    """
+    
+    def __init__(self, year, measures, field_index, key_columns=('State', 'City'), fill_down_columns=('State',),
+                 table='table8', header_offset=None):
+        """
+        Compile and validate a year's schema entry.
+        
+        Args:
+            year (int): The year the entry describes.
+            measures (dict): Output measure -> {"Total": column name, "Components": [column names]}.
+            field_index (dict): Normalized alias -> canonical field, built from FIELD_ALIASES.
+            key_columns (tuple): Names of the leading key columns of the table, e.g. State and City.
+                                 The last one identifies the row.
+            fill_down_columns (tuple): Key columns only filled on the first row of a block.
+            table (str): Name of the table definition the entry belongs to.
+            header_offset (int, optional): Rows above the header. Found from the key columns if None.
+        
+        Raises:
+            ValueError: If an entry name does not match any known alias, or a field
+                        is listed more than once within a measure.
+        """
+        self.year = year
+        self.entry = measures
+        self.table = table
+        self.key_columns = list(key_columns)
+        self.fill_down_columns = list(fill_down_columns)
+        self.entity_column = self.key_columns[-1]
+        self.header_offset = header_offset
+        
+        def classify(name):
+            field = field_index.get(normalize_header(name))
+            if field is None:
+                raise ValueError(f"Schema for {year}: '{name}' does not match any known column alias. "
+                                 f"Check for a missing comma or add it to FIELD_ALIASES.")
+            return field
+        
+        if not measures:
+            raise ValueError(f"Schema for {year}: no measures are defined.")
+        
+        # (measure, total field, component fields) in entry order
+        self.measures = []
+        self.field_names = {}
+        for measure, spec in measures.items():
+            total_field = classify(spec["Total"])
+            component_fields = [classify(name) for name in spec.get("Components", [])]
+            if len(set(component_fields)) != len(component_fields):
+                raise ValueError(f"Schema for {year}: components of '{measure}' map to duplicate fields {component_fields}.")
+            if total_field in component_fields:
+                raise ValueError(f"Schema for {year}: the '{measure}' total is listed as one of its components.")
+            self.measures.append((measure, total_field, component_fields))
+            for field, name in zip([total_field] + component_fields, [spec["Total"]] + list(spec.get("Components", []))):
+                self.field_names.setdefault(field, name)
+        
+        _, self.total_field, self.component_fields = self.measures[0]
+        
+        # Every alias of the fields this year declares is accepted
+        self.alias_to_field = {
+            alias: field for alias, field in field_index.items() if field in self.field_names
+        }
+    
+    @property
+    def primary_measure(self):
+        """Output name of the measure rows are kept for."""
+        return self.measures[0][0]
+    
+    @property
+    def fields(self):
+        """Every canonical field the entry declares, in entry order."""
+        return list(self.field_names)
+    
+    def resolve_columns(self, columns):
+        """
+        Resolve a workbook's header row in a single pass.
+        
+        Args:
+            columns (iterable): The header row.
+        
+        Returns:
+            dict: Canonical field -> original column name, for every field found.
+                  The first matching column wins.
+        """
+        resolved = {}
+        for col in columns:
+            field = self.alias_to_field.get(normalize_header(col))
+            if field is not None and field not in resolved:
+                resolved[field] = col
+        return resolved
+    
+    def fingerprint(self):
+        """Return a stable hash of the entry, its table layout and the aliases it accepts."""
+        definition = {'table': self.table, 'keys': self.key_columns, 'fill_down': self.fill_down_columns,
+                      'header_offset': self.header_offset, 'entry': self.entry,
+                      'aliases': sorted(self.alias_to_field.items())}
+        return hashlib.sha256(json.dumps(definition, sort_keys=True).encode()).hexdigest()
+
+class CompiledCrimeSchema:
+    """
+    The crime schema with every alias normalized once, validated when it is built.
+    The same instance can resolve the header of any number of workbooks.
+    """
+    
+    def __init__(self, schema=None, field_aliases=None, key_columns=('State', 'City'), fill_down_columns=('State',),
+                 table='table8', header_offset=None, measure_order=None):
+        """
+        Args:
+            schema (dict, optional): Year -> measures mapping (see YearSchema). Defaults to the
+                                     'Violent Crime' measure of every get_crime_schema() year.
+            field_aliases (dict, optional): Canonical field -> aliases. Defaults to FIELD_ALIASES.
+            key_columns (tuple): Leading key columns of the table.
+            fill_down_columns (tuple): Key columns only filled on the first row of a block.
+            table (str): Name of the table definition.
+            header_offset (int, optional): Rows above the header. Found from the key columns if None.
+            measure_order (list, optional): Output order of the measures. Defaults to the order
+                                            they first appear in the schema years.
+        
+        Raises:
+            ValueError: If an alias is claimed by two fields or a year entry is invalid.
+        """
+        if schema is None:
+            schema = {year: violent_crime_measures(entry) for year, entry in get_crime_schema().items()}
+        field_aliases = FIELD_ALIASES if field_aliases is None else field_aliases
+        
+        field_index = {}
+        for field, aliases in field_aliases.items():
+            for alias in aliases:
+                normalized = normalize_header(alias)
+                if field_index.get(normalized, field) != field:
+                    raise ValueError(f"Alias '{alias}' is claimed by both '{field_index[normalized]}' and '{field}'.")
+                field_index[normalized] = field
+        
+        self.field_index = field_index
+        self.table = table
+        self.key_columns = list(key_columns)
+        if measure_order is None:
+            measure_order = dict.fromkeys(measure for measures in schema.values() for measure in measures)
+        self.measure_order = list(measure_order)
+        self.years = {
+            year: YearSchema(year, measures, field_index, key_columns, fill_down_columns, table, header_offset)
+            for year, measures in schema.items()
+        }
+    
+    def get(self, year):
+        """Return the YearSchema for a year, or None if the year is not defined."""
+        return self.years.get(year)
+
+def compile_crime_schema():
+    """
+    Builds the validated, compiled form of get_crime_schema().
+    
+    Returns:
+        CompiledCrimeSchema: The compiled schema for every defined year.
+    """
+    return CompiledCrimeSchema()
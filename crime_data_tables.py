@@ -0,0 +1,173 @@
+import re
+from crime_data_schema import CompiledCrimeSchema, FIELD_ALIASES, get_crime_schema, normalize_header
+
+# Offense measures shared by the "Offenses Known to Law Enforcement" tables. Each
+# measure is a total column and the component columns it is reconstructed from
+# (total = sum(components) where the total is blank, or zero while a component is not).
+PROPERTY_CRIME = {"Total": "Property crime", "Components": ["Burglary", "Larceny-theft", "Motor vehicle theft"]}
+
+# Output names of the single-offense measures, by canonical field
+OFFENSE_MEASURES = {
+    'murder': "Murder",
+    'rape_revised': "Rape",
+    'rape_legacy': "Rape (legacy definition)",
+    'robbery': "Robbery",
+    'aggravated_assault': "Aggravated Assault",
+    'burglary': "Burglary",
+    'larceny_theft': "Larceny-theft",
+    'motor_vehicle_theft': "Motor Vehicle Theft",
+    'arson': "Arson",
+}
+
+def _offense_field(column_name):
+    """Canonical field of a schema column name ("Rape (revised definition) 1" -> 'rape_revised')."""
+    normalized = normalize_header(column_name)
+    for field, aliases in FIELD_ALIASES.items():
+        if normalized in (normalize_header(alias) for alias in aliases):
+            return field
+    raise ValueError(f"'{column_name}' does not match any known column alias. Add it to FIELD_ALIASES.")
+
+class TableDefinition:
+    """
+    Describes one FBI table: how its workbooks are named, where the header is,
+    which key columns identify a row and which measures can be read from it.
+    The per-year measure names come from get_crime_schema(), so every table
+    follows the same offense columns as Table 8 in a given year.
+    """
+
+    def __init__(self, name, title, file_pattern, fallback_keywords, key_columns, fill_down_columns,
+                 extra_measures=(), header_offset=None, default_measures=("Violent Crime",)):
+        """
+        Args:
+            name (str): Registry key, e.g. 'table8'.
+            title (str): Table title as published.
+            file_pattern (str): Regex matched against the lower-cased file name with
+                                everything but letters and digits removed. Group 1 is the year.
+            fallback_keywords (tuple): Words a file name must contain (with "table" and the
+                                       year) when no name matches file_pattern.
+            key_columns (tuple): Names of the leading key columns; the last one identifies the row.
+            fill_down_columns (tuple): Key columns only filled on the first row of a block.
+            extra_measures (tuple): (measure, column name) pairs for columns without components
+                                    that only this table has, e.g. Population.
+            header_offset (int, optional): Rows above the header. Found from the key columns if None.
+            default_measures (tuple): Measures read when none are requested.
+        """
+        self.name = name
+        self.title = title
+        self.file_pattern = re.compile(file_pattern)
+        self.fallback_keywords = fallback_keywords
+        self.key_columns = key_columns
+        self.fill_down_columns = fill_down_columns
+        self.extra_measures = extra_measures
+        self.header_offset = header_offset
+        self.default_measures = default_measures
+
+    def year_measures(self, year):
+        """
+        Every measure the table has in a year, in output order.
+
+        Args:
+            year (int): A year of get_crime_schema().
+
+        Returns:
+            dict: Measure -> {"Total": column name, "Components": [column names]}.
+        """
+        entry = get_crime_schema()[year]
+        measures = {
+            "Violent Crime": {"Total": entry["Violent Crime"], "Components": list(entry["Components"])},
+            "Property Crime": PROPERTY_CRIME,
+        }
+        for column in list(entry["Components"]) + PROPERTY_CRIME["Components"] + ["Arson"]:
+            measures[OFFENSE_MEASURES[_offense_field(column)]] = {"Total": column, "Components": []}
+        for measure, column in self.extra_measures:
+            measures[measure] = {"Total": column, "Components": []}
+        return measures
+
+    def measure_names(self):
+        """Every measure the table defines in any year, in output order."""
+        names = set()
+        for year in get_crime_schema():
+            names.update(self.year_measures(year))
+        order = ["Violent Crime", "Property Crime"] + list(OFFENSE_MEASURES.values()) + [m for m, _ in self.extra_measures]
+        return [name for name in order if name in names]
+
+    def compile(self, measures=None):
+        """
+        Compile the table's schema for the requested measures.
+
+        Args:
+            measures (iterable, optional): Measures to read, the first being the primary one
+                                           that rows are kept for. Defaults to default_measures;
+                                           'all' reads every measure.
+
+        Returns:
+            CompiledCrimeSchema: One YearSchema per year, listing the requested measures
+                                 the year has.
+
+        Raises:
+            ValueError: If a requested measure is not defined for this table.
+        """
+        if measures is None:
+            measures = self.default_measures
+        elif measures == 'all' or list(measures) == ['all']:
+            measures = self.measure_names()
+        unknown = [measure for measure in measures if measure not in self.measure_names()]
+        if unknown:
+            raise ValueError(f"{self.name} has no measure(s) {unknown}. Available: {self.measure_names()}")
+
+        schema = {}
+        for year in get_crime_schema():
+            year_measures = self.year_measures(year)
+            schema[year] = {measure: year_measures[measure] for measure in measures if measure in year_measures}
+        return CompiledCrimeSchema(schema, key_columns=self.key_columns, fill_down_columns=self.fill_down_columns,
+                                   table=self.name, header_offset=self.header_offset, measure_order=measures)
+
+TABLE_REGISTRY = {}
+
+def register_table(definition):
+    """Add a table definition to the registry, replacing any with the same name."""
+    TABLE_REGISTRY[definition.name] = definition
+    return definition
+
+def get_table(name):
+    """
+    Look up a registered table definition.
+
+    Raises:
+        ValueError: If no table with that name is registered.
+    """
+    if name not in TABLE_REGISTRY:
+        raise ValueError(f"Unknown table '{name}'. Registered tables: {sorted(TABLE_REGISTRY)}")
+    return TABLE_REGISTRY[name]
+
+register_table(TableDefinition(
+    'table8', "Offenses Known to Law Enforcement by State by City",
+    r'table0?8offensesknowntolawenforcementbystate(?:by|and)city(\d{4})', ('city',),
+    key_columns=('State', 'City'), fill_down_columns=('State',),
+    extra_measures=(("Population", "Population"),),
+))
+register_table(TableDefinition(
+    'table9', "Offenses Known to Law Enforcement by State by University and College",
+    r'table0?9offensesknowntolawenforcementbystate(?:by|and)universit(?:y|ies)andcolleges?(\d{4})', ('universit',),
+    key_columns=('State', 'University/College'), fill_down_columns=('State',),
+    extra_measures=(("Student Enrollment", "Student enrollment"),),
+))
+register_table(TableDefinition(
+    'table10', "Offenses Known to Law Enforcement by State by Metropolitan and Nonmetropolitan Counties",
+    r'table10offensesknowntolawenforcementbystate(?:by|and)metropolitanandnonmetropolitancount(?:y|ies)(\d{4})',
+    ('count',),
+    key_columns=('State', 'Metropolitan/Nonmetropolitan', 'County'),
+    fill_down_columns=('State', 'Metropolitan/Nonmetropolitan'),
+))
+register_table(TableDefinition(
+    'table11', "Offenses Known to Law Enforcement by State by State Tribal and Other Agencies",
+    r'table11offensesknowntolawenforcementbystate(?:by|and)statetribalandotheragencies(\d{4})', ('agenc',),
+    key_columns=('State', 'Agency type', 'Agency name'), fill_down_columns=('State', 'Agency type'),
+))
+register_table(TableDefinition(
+    'table6', "Crime in the United States by Metropolitan Statistical Area",
+    r'table0?6crimeintheunitedstatesbymetropolitanstatisticalarea(\d{4})', ('statistical',),
+    key_columns=('Metropolitan Statistical Area', 'Counties/principal cities'),
+    fill_down_columns=('Metropolitan Statistical Area',),
+    extra_measures=(("Population", "Population"),),
+))
@@ -0,0 +1,262 @@
+from crime_data_tables import OFFENSE_MEASURES, _offense_field, get_table
+from crime_panel_store import canonical_name
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# Every validation step starts with this, so a rerun can drop the previous run's flags from the log
+VALIDATION_STEP_PREFIX = "Validation"
+
+# Default thresholds of the rules
+VALIDATION_DEFAULTS = {
+    'tolerance': 0.5,        # a total may fall short of its components by this much (rounding)
+    'fold_change': 10.0,     # year-over-year ratio flagged regardless of the city's history
+    'min_count': 25,         # changes are only judged when either year has at least this many offenses
+    'window': 5,             # previous years in the rolling mean/std of a city
+    'min_periods': 3,        # previous years needed before a z-score is computed
+    'z_threshold': 4.0,      # |z| of log(1 + count) against the city's rolling stats
+    'std_floor': 0.25,       # lower bound of the rolling std (log units) for steady cities
+    'rate_threshold': 3.0,   # robust z of log(1 + rate per 100,000) within the year
+    'min_population': 1000,  # smaller places are not judged on their rate
+}
+
+def _component_measures(table, measure, year):
+    """
+    Output names of the components a measure's total is the sum of in a year. The
+    legacy rape definition is dropped when the revised one is also published
+    (2013-2016), because the total only counts the revised definition.
+    """
+    definition = get_table(table).year_measures(year).get(measure)
+    if definition is None:
+        return []
+    names = [OFFENSE_MEASURES[_offense_field(column)] for column in definition["Components"]]
+    if "Rape" in names and "Rape (legacy definition)" in names:
+        names.remove("Rape (legacy definition)")
+    return names
+
+def _entity_codes(panel_df, key_columns):
+    """
+    One integer per entity (State/City for Table 8), -1 where a key is missing.
+    Keys are compared by their canonical names, so spellings that only differ in
+    case or spacing across years ("ALABAMA", "Alabama") are the same entity.
+    """
+    key_codes = {}
+    for column in key_columns:
+        codes, uniques = pd.factorize(panel_df[column].astype(object))
+        canonical_codes, _ = pd.factorize(np.array([canonical_name(value) for value in uniques], dtype=object))
+        key_codes[column] = np.where(codes >= 0, canonical_codes[codes.clip(0)], -1)
+    keys = pd.DataFrame(key_codes)
+    entity_codes = keys.groupby(list(key_columns), sort=False).ngroup().to_numpy()
+    return np.where((keys < 0).any(axis=1).to_numpy(), -1, entity_codes)
+
+def check_component_consistency(panel_df, table='table8', measures=None, tolerance=0.5):
+    """
+    Flag totals smaller than the sum of their components.
+
+    Reconstruction only rebuilds blank or zero totals, so a published total that
+    undercounts its own components passes through. Components are summed over
+    the ones the panel has, which still bounds the total from below.
+
+    Args:
+        panel_df (pd.DataFrame): Consolidated panel with a Year column.
+        table (str): Registered table the panel was read from.
+        measures (iterable, optional): Measures with components to check. Defaults to every
+                                       panel column that has components.
+        tolerance (float): Allowed shortfall.
+
+    Returns:
+        dict: Checked measure -> (boolean mask of flagged rows, detail strings of the flagged
+              rows). Measures without any component column in the panel are left out.
+    """
+    years = panel_df['Year'].to_numpy()
+    results = {}
+    for measure in measures or [column for column in panel_df.columns if column in ("Violent Crime", "Property Crime")]:
+        if measure not in panel_df.columns:
+            continue
+        component_sum = np.full(len(panel_df), np.nan)
+        checked = False
+        for year in np.unique(years):
+            components = [name for name in _component_measures(table, measure, year) if name in panel_df.columns]
+            if not components:
+                continue
+            in_year = years == year
+            component_sum[in_year] = panel_df.loc[in_year, components].sum(axis=1, min_count=1).to_numpy()
+            checked = True
+        if not checked:
+            continue
+        total = panel_df[measure].to_numpy(dtype=float)
+        flagged = total + tolerance < component_sum
+        details = [f"total={t:g} components={c:g}" for t, c in zip(total[flagged], component_sum[flagged])]
+        results[measure] = (flagged, details)
+    return results
+
+def check_year_over_year(panel_df, measure, key_columns=('State', 'City'), fold_change=10.0, min_count=25,
+                         window=5, min_periods=3, z_threshold=4.0, std_floor=0.25):
+    """
+    Flag year-over-year jumps of a measure within each entity in one grouped sweep.
+
+    A row is flagged when its value differs from the entity's previous reported
+    year (which the detail names, as a city may skip years) by a factor of
+    fold_change or more, or when log(1 + value) is more than
+    z_threshold rolling standard deviations from the mean of the entity's
+    previous `window` years. Only changes where either year reaches min_count
+    are judged, so small places moving between a handful of offenses are not
+    flagged. The rolling stats come from a single grouped rolling pass over the
+    panel sorted by entity and year.
+
+    Args:
+        panel_df (pd.DataFrame): Consolidated panel with a Year column.
+        measure (str): Measure column to check.
+        key_columns (iterable): Columns identifying an entity.
+        fold_change (float): Ratio to the previous year that is always flagged.
+        min_count (int): Changes are only judged when either year reaches this value.
+        window (int): Previous years in the rolling stats.
+        min_periods (int): Previous years needed for a z-score.
+        z_threshold (float): |z| that is flagged.
+        std_floor (float): Lower bound of the rolling std.
+
+    Returns:
+        tuple: (boolean mask of flagged rows, detail strings of the flagged rows).
+    """
+    codes = _entity_codes(panel_df, key_columns)
+    order = np.lexsort((panel_df['Year'].to_numpy(), codes))
+    sorted_codes = pd.Series(codes[order])
+    value = pd.Series(panel_df[measure].to_numpy(dtype=float)[order])
+    log_value = np.log1p(value.clip(lower=0))
+
+    by_entity = log_value.groupby(sorted_codes, sort=False)
+    previous = value.groupby(sorted_codes, sort=False).shift()
+    previous_year = pd.Series(panel_df['Year'].to_numpy()[order]).groupby(sorted_codes, sort=False).shift()
+    # Rolling stats up to and including a year, shifted so each year sees only its predecessors
+    rolling = by_entity.rolling(window, min_periods=min_periods)
+    rolling_mean = rolling.mean().reset_index(level=0, drop=True).sort_index().groupby(sorted_codes, sort=False).shift()
+    rolling_std = rolling.std().reset_index(level=0, drop=True).sort_index().groupby(sorted_codes, sort=False).shift()
+    z = (log_value - rolling_mean) / rolling_std.clip(lower=std_floor)
+
+    larger = np.fmax(value, previous)
+    ratio = larger / np.fmax(np.fmin(value, previous), 1.0)
+    judged = (larger >= min_count) & (sorted_codes >= 0)
+    flagged_sorted = (judged & ((ratio >= fold_change) | (z.abs() > z_threshold))).to_numpy()
+
+    flagged = np.zeros(len(panel_df), dtype=bool)
+    flagged[order] = flagged_sorted
+    # Details in panel row order
+    position = np.empty(len(order), dtype=np.intp)
+    position[order] = np.arange(len(order))
+    rows = position[flagged]
+    details = [f"{v:g} vs {p:g} in {y:.0f} (x{r:.1f}, z={zs:.1f})"
+               for v, p, y, r, zs in zip(value.to_numpy()[rows], previous.to_numpy()[rows],
+                                         previous_year.to_numpy()[rows], ratio.to_numpy()[rows],
+                                         z.to_numpy()[rows])]
+    return flagged, details
+
+def check_rate_outliers(panel_df, measure, population_column='Population', rate_threshold=3.0, min_population=1000):
+    """
+    Flag population-normalized rates far above the rest of their year.
+
+    The rate is per 100,000 residents. Outliers are judged on log(1 + rate) with
+    a robust z-score (median and MAD of the year), computed for every year in
+    one grouped transform. Only high rates are flagged, as a misread population
+    or count shows up as one; places without offenses are common. Rates above
+    100,000 (more offenses than residents) are always flagged.
+
+    Args:
+        panel_df (pd.DataFrame): Consolidated panel with Year and population columns.
+        measure (str): Measure column to check.
+        population_column (str): Population column.
+        rate_threshold (float): Robust z above which a rate is flagged.
+        min_population (int): Places below this population are not judged.
+
+    Returns:
+        tuple: (boolean mask of flagged rows, detail strings of the flagged rows).
+    """
+    population = panel_df[population_column].to_numpy(dtype=float)
+    rate = pd.Series(panel_df[measure].to_numpy(dtype=float) / np.where(population > 0, population, np.nan) * 100_000)
+    rate[population < min_population] = np.nan
+    log_rate = np.log1p(rate.clip(lower=0))
+
+    by_year = log_rate.groupby(panel_df['Year'].to_numpy(), sort=False)
+    median = by_year.transform('median')
+    mad = (log_rate - median).abs().groupby(panel_df['Year'].to_numpy(), sort=False).transform('median')
+    robust_z = (log_rate - median) / (1.4826 * mad.where(mad > 0))
+    flagged = ((robust_z > rate_threshold) | (rate > 100_000)).to_numpy()
+
+    details = [f"{r:,.1f} per 100,000 (robust z={z:.1f}, population {p:,.0f})"
+               for r, z, p in zip(rate.to_numpy()[flagged], robust_z.to_numpy()[flagged], population[flagged])]
+    return flagged, details
+
+def _log_flags(logger, panel_df, flagged, details, key_columns, reason, step):
+    """Report flagged rows to the logger, one batch per year, with the details as the value."""
+    first_key, entity = key_columns[0], key_columns[-1]
+    rows = panel_df.loc[flagged, [first_key, entity, 'Year']].rename(columns={first_key: 'State', entity: 'City'})
+    rows['Detail'] = details
+    for year, year_rows in rows.groupby('Year', sort=True):
+        logger.log_batch_dropped(int(year), year_rows, reason, step, value_column='Detail')
+
+def validate_crime_panel(panel_df, logger=None, table='table8', key_columns=None, measure=None, **thresholds):
+    """
+    Run every validation rule over the consolidated multi-year panel.
+
+    Flagged rows are kept in the panel and reported to the logger with the
+    rule's own reason and processing step. Rules whose columns are not in the
+    panel are skipped: component consistency needs the component measures
+    (e.g. --measures "Violent Crime" Murder Rape Robbery "Aggravated Assault"),
+    rate outliers need Population.
+
+    Args:
+        panel_df (pd.DataFrame): Consolidated panel with a Year column.
+        logger (CrimeDataLogger, optional): Receives the flagged rows.
+        table (str): Registered table the panel was read from.
+        key_columns (iterable, optional): Columns identifying an entity. Defaults to the table's.
+        measure (str, optional): Measure judged by the year-over-year and rate rules.
+                                 Defaults to the first measure column of the panel.
+        **thresholds: Overrides of VALIDATION_DEFAULTS.
+
+    Returns:
+        pd.DataFrame: One boolean column per rule ('components', 'year_over_year',
+                      'rate'), aligned with the panel.
+    """
+    unknown = set(thresholds) - set(VALIDATION_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown validation thresholds: {sorted(unknown)}")
+    settings = {**VALIDATION_DEFAULTS, **thresholds}
+    key_columns = list(key_columns or get_table(table).key_columns)
+    if measure is None:
+        measure = next(column for column in panel_df.columns if column not in key_columns + ['Year'])
+
+    flags = pd.DataFrame(index=panel_df.index)
+    print(f"\n🔎 Validating {len(panel_df):,} rows ({panel_df['Year'].nunique()} years)...")
+
+    consistency = check_component_consistency(panel_df, table, tolerance=settings['tolerance'])
+    flags['components'] = False
+    for total_measure, (flagged, details) in consistency.items():
+        flags['components'] |= flagged
+        if logger is not None:
+            _log_flags(logger, panel_df, flagged, details, key_columns,
+                       f"{total_measure} total below the sum of its components",
+                       f"{VALIDATION_STEP_PREFIX}: Component Consistency")
+        print(f"    {total_measure}: {flagged.sum()} totals below the sum of their components")
+
+    flagged, details = check_year_over_year(
+        panel_df, measure, key_columns, settings['fold_change'], settings['min_count'], settings['window'],
+        settings['min_periods'], settings['z_threshold'], settings['std_floor'])
+    flags['year_over_year'] = flagged
+    if logger is not None:
+        _log_flags(logger, panel_df, flagged, details, key_columns, f"{measure} year-over-year jump",
+                   f"{VALIDATION_STEP_PREFIX}: Year-over-Year")
+    print(f"    {measure}: {flagged.sum()} year-over-year jumps")
+
+    if 'Population' in panel_df.columns and measure != 'Population':
+        flagged, details = check_rate_outliers(panel_df, measure, 'Population', settings['rate_threshold'],
+                                               settings['min_population'])
+        flags['rate'] = flagged
+        if logger is not None:
+            _log_flags(logger, panel_df, flagged, details, key_columns, f"{measure} rate outlier",
+                       f"{VALIDATION_STEP_PREFIX}: Rate Outlier")
+        print(f"    {measure}: {flagged.sum()} rate outliers")
+    else:
+        flags['rate'] = False
+
+    print(f"    Flagged {flags.any(axis=1).sum()} rows; they are kept and listed in the processing log.")
+    return flags
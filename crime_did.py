@@ -0,0 +1,490 @@
+import pandas as pd
+import numpy as np
+import os
+import math
+import time
+import hashlib
+import argparse
+
+# ACS-derived controls of DiD.R / DiD_30.R: name -> (numerator, denominator)
+CONTROL_DEFINITIONS = {
+    'pct_white': ('white_alone', 'total_population'),
+    'pct_bach_degree': ('bachelor_degree', 'education_universe_25plus'),
+    'pct_associate': ('associate_degree', 'education_universe_25plus'),
+    'pct_no_schooling': ('no_schooling_completed', 'education_universe_25plus'),
+    'unemployment_rate': ('civilian_unemployed', 'civilian_labor_force_16plus'),
+    'labor_force_part': ('civilian_labor_force_16plus', 'total_population'),
+    'poverty_rate': ('income_below_poverty_level', 'total_population'),
+}
+
+# Controls of the "Controlled Model" in the R scripts
+DEFAULT_CONTROLS = ['pct_white', 'pct_bach_degree', 'unemployment_rate', 'poverty_rate']
+
+def add_control_variables(df):
+    """
+    Add the ACS share and rate controls of CONTROL_DEFINITIONS whose inputs are present.
+
+    Args:
+        df (pd.DataFrame): Merged crime/ACS rows.
+
+    Returns:
+        pd.DataFrame: A copy with one float column per computable control.
+    """
+    df = df.copy()
+    for name, (numerator, denominator) in CONTROL_DEFINITIONS.items():
+        if numerator in df.columns and denominator in df.columns:
+            df[name] = df[numerator].astype(float) / df[denominator].astype(float).replace(0, np.nan)
+    return df
+
+def add_treatment_columns(df, funding_column='funding2022', unit_column='place_id', time_column='year',
+                          treatment_year=2022):
+    """
+    Add the DiD treatment columns used by the R scripts.
+
+    Args:
+        df (pd.DataFrame): Panel rows with a funding amount per row.
+        funding_column (str): Funding amount; a unit is treated if it is positive in any year.
+        unit_column (str): Column identifying the city.
+        time_column (str): Year column.
+        treatment_year (int): First post-treatment year.
+
+    Returns:
+        pd.DataFrame: A copy with 0/1 float columns treated, post and D (= treated * post).
+    """
+    df = df.copy()
+    funded = df[funding_column].fillna(0) > 0
+    df['treated'] = funded.groupby(df[unit_column]).transform('any').astype(float)
+    df['post'] = (df[time_column] >= treatment_year).astype(float)
+    df['D'] = df['treated'] * df['post']
+    return df
+
+def group_sums(X, order, starts):
+    """
+    Column sums of X within groups, in group order.
+
+    Args:
+        X (np.ndarray): n x k array.
+        order (np.ndarray): Row order that sorts the group codes (see group_index).
+        starts (np.ndarray): Position in that order where each group starts.
+
+    Returns:
+        np.ndarray: levels x k array of sums.
+    """
+    return np.add.reduceat(X[order], starts, axis=0)
+
+def group_index(codes):
+    """Sort order, group start positions and sizes for integer group codes (0 .. levels-1)."""
+    order = np.argsort(codes, kind='stable')
+    starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+    counts = np.diff(np.r_[starts, len(codes)]).astype(float)
+    return order, starts, counts
+
+def demean(X, fe_codes, tol=1e-8, max_iter=10_000):
+    """
+    Sweep fixed effects out of the columns of X by alternating projections.
+
+    Each pass subtracts the group means of every fixed effect in turn. The means
+    of all columns come from one np.add.reduceat over the rows sorted by group,
+    so no dummy matrix is ever built, memory stays linear in the number of rows
+    and a batch of columns (bootstrap or placebo replicates) costs one call.
+    A balanced two-way panel converges after one pass; unbalanced panels take a
+    few more.
+
+    Args:
+        X (np.ndarray): n x k array of columns to demean.
+        fe_codes (list): One integer code array (0 .. levels-1) per fixed effect.
+        tol (float): Stop once no group mean exceeds tol times the largest absolute value of X.
+        max_iter (int): Maximum number of passes.
+
+    Returns:
+        tuple: (demeaned n x k array, number of passes).
+    """
+    X = np.array(X, dtype=float, copy=True)
+    if X.ndim == 1:
+        X = X[:, None]
+    if X.shape[1] == 0 or not fe_codes:
+        return X, 0
+
+    indexes = [group_index(codes) for codes in fe_codes]
+    threshold = tol * max(np.abs(X).max(), 1.0)
+    for iteration in range(1, max_iter + 1):
+        largest_shift = 0.0
+        for codes, (order, starts, counts) in zip(fe_codes, indexes):
+            means = group_sums(X, order, starts) / counts[:, None]
+            X -= means[codes]
+            largest_shift = max(largest_shift, np.abs(means).max())
+        if largest_shift < threshold or len(fe_codes) == 1:
+            return X, iteration
+    print(f"Warning: Fixed effects did not converge after {max_iter} passes.")
+    return X, max_iter
+
+def cluster_adjustment(n, n_clusters, dof_k):
+    """fixest small-sample factor G / (G - 1) * (n - 1) / (n - K) of the clustered covariance."""
+    return (n_clusters / max(n_clusters - 1, 1)) * ((n - 1) / max(n - dof_k, 1))
+
+def _betacf(a, b, x):
+    """Continued fraction of the regularized incomplete beta function."""
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c, d = 1.0, 1.0 - qab * x / qap
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        for aa in (m * (b - m) * x / ((qam + m2) * (a + m2)),
+                   -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))):
+            d = 1.0 + aa * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + aa / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1.0) < 3e-14:
+            break
+    return h
+
+def _betainc(a, b, x):
+    """Regularized incomplete beta function I_x(a, b)."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1.0 - x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+def t_pvalue(t_stat, df):
+    """Two-sided p-value of a t statistic with df degrees of freedom."""
+    if not np.isfinite(t_stat):
+        return float('nan')
+    return _betainc(df / 2.0, 0.5, df / (df + t_stat * t_stat))
+
+def t_critical(alpha, df):
+    """Two-sided critical value of the t distribution, by bisection on t_pvalue."""
+    low, high = 0.0, 1e4
+    for _ in range(200):
+        mid = (low + high) / 2.0
+        if t_pvalue(mid, df) > alpha:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2.0
+
+def f_pvalue(f_stat, df1, df2):
+    """Upper-tail p-value of an F statistic."""
+    if not np.isfinite(f_stat):
+        return float('nan')
+    return _betainc(df2 / 2.0, df1 / 2.0, df2 / (df2 + df1 * f_stat))
+
+class FixedEffectsResult:
+    """Coefficients and cluster-robust inference of one FixedEffectsPanel.fit."""
+
+    def __init__(self, outcome, names, coef, vcov, residuals, nobs, n_clusters, dof_k, r2_within,
+                 dropped, fit_seconds):
+        self.outcome = outcome
+        self.names = names
+        self.coef = coef
+        self.vcov = vcov
+        self.residuals = residuals
+        self.nobs = nobs
+        self.n_clusters = n_clusters
+        self.dof_k = dof_k
+        self.r2_within = r2_within
+        self.dropped = dropped
+        self.fit_seconds = fit_seconds
+
+    @property
+    def se(self):
+        return np.sqrt(np.diag(self.vcov))
+
+    def summary(self, alpha=0.05):
+        """
+        Coefficient table with t tests on n_clusters - 1 degrees of freedom, as fixest reports.
+
+        Returns:
+            pd.DataFrame: Estimate, Std. Error, t value, Pr(>|t|) and the confidence interval, by regressor.
+        """
+        se = self.se
+        t_stats = self.coef / se
+        df = max(self.n_clusters - 1, 1)
+        critical = t_critical(alpha, df)
+        return pd.DataFrame({
+            'Estimate': self.coef,
+            'Std. Error': se,
+            't value': t_stats,
+            'Pr(>|t|)': [t_pvalue(t, df) for t in t_stats],
+            f'CI {alpha / 2:.1%}': self.coef - critical * se,
+            f'CI {1 - alpha / 2:.1%}': self.coef + critical * se,
+        }, index=self.names)
+
+    def wald_test(self, names):
+        """
+        Joint test that the named coefficients are all zero, using the clustered covariance.
+
+        Args:
+            names (list): Regressors to test, e.g. the leads of an event study.
+
+        Returns:
+            dict: 'F' statistic, numerator 'df1', denominator 'df2' and 'p_value'.
+        """
+        positions = [self.names.index(name) for name in names if name in self.names]
+        if not positions:
+            return {'F': float('nan'), 'df1': 0, 'df2': self.n_clusters - 1, 'p_value': float('nan')}
+        b = self.coef[positions]
+        V = self.vcov[np.ix_(positions, positions)]
+        f_stat = float(b @ np.linalg.pinv(V) @ b) / len(positions)
+        df2 = max(self.n_clusters - 1, 1)
+        return {'F': f_stat, 'df1': len(positions), 'df2': df2, 'p_value': f_pvalue(f_stat, len(positions), df2)}
+
+    def print_summary(self, title=None):
+        """Print the coefficient table and fit statistics."""
+        print(f"\n📈 {title or 'FIXED EFFECTS ESTIMATES'}: {self.outcome}")
+        print(f"   Observations: {self.nobs:,}, clusters: {self.n_clusters:,}, within R²: {self.r2_within:.4f}, "
+              f"fit in {self.fit_seconds * 1000:.1f} ms")
+        if self.dropped:
+            print(f"   Removed (collinear with the fixed effects): {', '.join(self.dropped)}")
+        print(self.summary().to_string(float_format=lambda v: f"{v:.4f}"))
+
+class FixedEffectsPanel:
+    """
+    Two-way fixed-effects regressions over one panel, e.g. the merged crime/ACS
+    panel with city and year effects.
+
+    The fixed effects are absorbed by demean() instead of dummy columns.
+    Demeaned columns are cached per estimation sample, so the DiD fit, the
+    controlled fit and the event study demean the outcome and controls once.
+    """
+
+    def __init__(self, df, unit_column='place_id', time_column='year', cluster_column=None, tol=1e-8):
+        """
+        Args:
+            df (pd.DataFrame): Panel rows.
+            unit_column (str): Unit fixed effect (the city, 'name' in the R scripts).
+            time_column (str): Time fixed effect.
+            cluster_column (str, optional): Cluster for the standard errors. Defaults to unit_column.
+            tol (float): Convergence tolerance of the alternating projections.
+        """
+        self.df = df.reset_index(drop=True)
+        self.unit_column = unit_column
+        self.time_column = time_column
+        self.cluster_column = cluster_column or unit_column
+        self.tol = tol
+        self._fe_columns = [unit_column, time_column]
+        self._demeaned = {}
+
+    def _sample(self, columns):
+        """Rows with every column and fixed effect present, and a key identifying that sample."""
+        mask = self.df[list(dict.fromkeys(columns + self._fe_columns + [self.cluster_column]))].notna().all(axis=1)
+        mask = mask.to_numpy()
+        key = hashlib.sha1(np.packbits(mask).tobytes()).hexdigest()
+        return mask, key
+
+    def _fe_codes(self, mask):
+        return [pd.factorize(self.df.loc[mask, column])[0] for column in self._fe_columns]
+
+    def demeaned(self, columns, mask, key):
+        """
+        Demeaned panel columns on a sample, computing only the ones not cached yet.
+
+        Returns:
+            np.ndarray: n_sample x len(columns) array.
+        """
+        missing = [column for column in columns if (key, column) not in self._demeaned]
+        if missing:
+            values = self.df.loc[mask, missing].to_numpy(dtype=float)
+            swept, _ = demean(values, self._fe_codes(mask), self.tol)
+            for j, column in enumerate(missing):
+                self._demeaned[(key, column)] = swept[:, j]
+        return np.column_stack([self._demeaned[(key, column)] for column in columns]) if columns else \
+            np.empty((int(mask.sum()), 0))
+
+    def design(self, outcome, regressors, extra_regressors=None):
+        """
+        The demeaned outcome and regressors of a fit, with what inference needs.
+
+        Regressors the fixed effects absorb (treated, post) demean to zero and are dropped.
+
+        Args:
+            outcome (str): Outcome column.
+            regressors (list): Regressor columns of the panel.
+            extra_regressors (dict, optional): Name -> array of additional regressors over
+                                               every panel row. Demeaned on each call, not cached.
+
+        Returns:
+            dict: 'y' and 'X' (demeaned), 'names', 'dropped', 'mask' (rows in the sample),
+                  'fe_codes', integer 'clusters', 'n_clusters' and 'fe_dof', the fixed-effect
+                  parameters counted in K.
+        """
+        extra_regressors = extra_regressors or {}
+        mask, key = self._sample([outcome] + list(regressors))
+        n = int(mask.sum())
+        fe_codes = self._fe_codes(mask)
+
+        y = self.demeaned([outcome], mask, key)[:, 0]
+        X = self.demeaned(list(regressors), mask, key)
+        names = list(regressors)
+        if extra_regressors:
+            extra = np.column_stack([np.asarray(values, dtype=float)[mask] for values in extra_regressors.values()])
+            X = np.column_stack([X, demean(extra, fe_codes, self.tol)[0]])
+            names += list(extra_regressors)
+
+        scale = np.abs(X).max(axis=0) if X.shape[1] else np.array([])
+        keep = scale > 1e-9
+        dropped = [name for name, kept in zip(names, keep) if not kept]
+
+        clusters, _ = pd.factorize(self.df.loc[mask, self.cluster_column])
+        n_clusters = int(clusters.max()) + 1 if n else 0
+        levels = [int(codes.max()) + 1 for codes in fe_codes]
+        counted = [n_levels for codes, n_levels in zip(fe_codes, levels) if not self._is_nested(codes, clusters)]
+        # Every fixed effect after the first repeats the intercept
+        fe_dof = sum(counted) - max(len(counted) - 1, 0)
+        return {
+            'y': y, 'X': X[:, keep], 'names': [name for name, kept in zip(names, keep) if kept],
+            'dropped': dropped, 'mask': mask, 'fe_codes': fe_codes,
+            'clusters': clusters, 'n_clusters': n_clusters, 'fe_dof': fe_dof,
+        }
+
+    def fit(self, outcome, regressors, extra_regressors=None):
+        """
+        Estimate outcome ~ regressors | unit + time with standard errors clustered by cluster_column.
+
+        The covariance uses the fixest defaults: a G / (G - 1) cluster adjustment
+        and (n - 1) / (n - K), where K leaves out fixed effects nested in the
+        clusters (the city effects when clustering by city or state). Singletons
+        are kept, as with fixest's feols.
+
+        Args:
+            outcome (str): Outcome column, e.g. 'violent_crime'.
+            regressors (list): Regressor columns of the panel, e.g. ['D'] plus controls.
+            extra_regressors (dict, optional): Name -> array of additional regressors over
+                                               every panel row (event-time dummies). They
+                                               are demeaned on each call, not cached.
+
+        Returns:
+            FixedEffectsResult: The estimates.
+        """
+        started = time.perf_counter()
+        design = self.design(outcome, regressors, extra_regressors)
+        y, X, clusters, n_clusters = design['y'], design['X'], design['clusters'], design['n_clusters']
+        n = len(y)
+
+        XtX_inv = np.linalg.pinv(X.T @ X)
+        coef = XtX_inv @ (X.T @ y)
+        residuals = y - X @ coef
+
+        scores = np.column_stack([np.bincount(clusters, weights=X[:, j] * residuals, minlength=n_clusters)
+                                  for j in range(X.shape[1])]) if X.shape[1] else np.empty((n_clusters, 0))
+        meat = scores.T @ scores
+
+        dof_k = X.shape[1] + design['fe_dof']
+        vcov = cluster_adjustment(n, n_clusters, dof_k) * XtX_inv @ meat @ XtX_inv
+
+        r2_within = 1.0 - (residuals @ residuals) / (y @ y) if y @ y > 0 else float('nan')
+        return FixedEffectsResult(outcome, design['names'], coef, vcov, residuals, n, n_clusters, dof_k, r2_within,
+                                  design['dropped'], time.perf_counter() - started)
+
+    @staticmethod
+    def _is_nested(codes, clusters):
+        """Whether every level of a fixed effect falls in a single cluster."""
+        pairs = pd.DataFrame({'fe': codes, 'cluster': clusters}).drop_duplicates()
+        return len(pairs) == pairs['fe'].nunique()
+
+    def event_study(self, outcome, treated_column='treated', treatment_year=2022, reference_offset=-1,
+                    controls=()):
+        """
+        Event-study regression of the outcome on treated x year dummies, omitting the
+        reference year, with the same fixed effects and clustering as fit().
+
+        The outcome and controls come from the demeaned cache, so after a DiD fit
+        on the same sample only the event dummies are demeaned. The leads (years
+        before treatment_year) give the pre-trend test.
+
+        Args:
+            outcome (str): Outcome column.
+            treated_column (str): 0/1 ever-treated indicator.
+            treatment_year (int): First post-treatment year.
+            reference_offset (int): Event time left out, -1 being the year before treatment.
+            controls (iterable): Control columns.
+
+        Returns:
+            tuple: (FixedEffectsResult, dict with the Wald test that every lead is zero).
+        """
+        years = self.df[self.time_column]
+        treated = self.df[treated_column].to_numpy(dtype=float)
+        dummies = {}
+        for year in sorted(years.dropna().unique()):
+            offset = int(year) - treatment_year
+            if offset == reference_offset:
+                continue
+            dummies[f"treated x {int(year)} (t{offset:+d})"] = treated * (years.to_numpy() == year)
+
+        result = self.fit(outcome, list(controls), extra_regressors=dummies)
+        leads = [name for name in dummies if int(name.split('(t')[1].rstrip(')')) < 0]
+        return result, result.wald_test(leads)
+
+def run_did(panel, outcome='violent_crime', controls=DEFAULT_CONTROLS, unit_column='place_id', time_column='year',
+            treatment_year=2022, event_study=True):
+    """
+    Fit the DiD models of DiD.R / DiD_30.R on a panel that has the treatment columns.
+
+    Args:
+        panel (pd.DataFrame): Rows with outcome, treated, D and the controls.
+        outcome (str): Outcome column.
+        controls (iterable): Controls of the controlled model; missing ones are skipped.
+        unit_column (str): City identifier, used for the unit effects and clustering.
+        time_column (str): Year column.
+        treatment_year (int): First post-treatment year.
+        event_study (bool): Also fit the event study and its pre-trend test.
+
+    Returns:
+        dict: 'did', 'did_controls' and, with event_study, 'event_study' and 'pretrend' results.
+    """
+    controls = [control for control in controls if control in panel.columns]
+    model = FixedEffectsPanel(panel, unit_column, time_column)
+
+    results = {'did': model.fit(outcome, ['D'])}
+    results['did'].print_summary("DiD (treated x post | city + year)")
+    results['did_controls'] = model.fit(outcome, ['D'] + controls)
+    results['did_controls'].print_summary("DiD with controls")
+
+    if event_study:
+        results['event_study'], results['pretrend'] = model.event_study(
+            outcome, 'treated', treatment_year, controls=controls)
+        results['event_study'].print_summary("Event study")
+        pretrend = results['pretrend']
+        print(f"   Pre-trend test (all leads = 0): F({pretrend['df1']}, {pretrend['df2']}) = "
+              f"{pretrend['F']:.3f}, p = {pretrend['p_value']:.4f}")
+    return results
+
+# --- Main execution ---
+if __name__ == "__main__":
+    try:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        script_dir = os.path.abspath('.')
+
+    parser = argparse.ArgumentParser(description="Two-way fixed-effects DiD on the merged crime/ACS/grant panel.")
+    parser.add_argument("--panel", default=os.path.join(script_dir, "Data", "ACS", "merged_crime_acs.csv"),
+                        help="Merged panel CSV with the outcome and a funding column.")
+    parser.add_argument("--outcome", default="violent_crime", help="Outcome column.")
+    parser.add_argument("--funding-column", default="funding2022",
+                        help="Funding amount; cities with a positive amount in any year are treated.")
+    parser.add_argument("--treatment-year", type=int, default=2022, help="First post-treatment year.")
+    parser.add_argument("--unit-column", default="place_id", help="City identifier for fixed effects and clusters.")
+    parser.add_argument("--drop-years", type=int, nargs="*", default=[], help="Years left out, e.g. 2021.")
+    parser.add_argument("--no-event-study", action="store_true", help="Skip the event study and pre-trend test.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.panel):
+        print(f"❌ Error: Merged panel not found at the expected path.")
+        print(f"   Checked for: {args.panel}")
+    else:
+        panel = pd.read_csv(args.panel, dtype={'geo_id': str, 'state_code': str, 'place_code': str, 'place_id': str})
+        if args.funding_column not in panel.columns:
+            print(f"❌ Error: The panel has no '{args.funding_column}' column. Add it with process_grant_data.py --panel first.")
+        else:
+            panel = panel[~panel['year'].isin(args.drop_years)]
+            panel = add_treatment_columns(add_control_variables(panel), args.funding_column, args.unit_column,
+                                          'year', args.treatment_year)
+            run_did(panel, args.outcome, unit_column=args.unit_column, treatment_year=args.treatment_year,
+                    event_study=not args.no_event_study)
@@ -0,0 +1,301 @@
+import pandas as pd
+import numpy as np
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from crime_did import (FixedEffectsPanel, DEFAULT_CONTROLS, add_control_variables, add_treatment_columns,
+                       cluster_adjustment, demean, group_index, group_sums)
+
+# Cluster weight distributions of the wild bootstrap. Webb's six-point weights
+# give more distinct draws than Rademacher signs when there are few clusters.
+WILD_WEIGHTS = {
+    'rademacher': np.array([-1.0, 1.0]),
+    'webb': np.array([-np.sqrt(1.5), -1.0, -np.sqrt(0.5), np.sqrt(0.5), 1.0, np.sqrt(1.5)]),
+}
+
+# Set in every worker process by _init_worker, so the arrays are sent once per worker
+_WORKER_STATE = None
+
+def _init_worker(state):
+    global _WORKER_STATE
+    _WORKER_STATE = state
+
+def _batch_seeds(seed, replicates, batch_size):
+    """
+    One independent random stream per batch, spawned from the seed.
+
+    The batches and their streams depend only on seed, replicates and batch_size,
+    so results are the same for any number of workers.
+    """
+    sizes = [batch_size] * (replicates // batch_size)
+    if replicates % batch_size:
+        sizes.append(replicates % batch_size)
+    children = np.random.SeedSequence(seed).spawn(len(sizes))
+    return list(zip(range(len(sizes)), sizes, children))
+
+def _run_batches(batch_function, state, seed, replicates, batch_size, workers, label):
+    """
+    Run the replicate batches serially or in a process pool, printing progress.
+
+    Returns:
+        np.ndarray: The replicate statistics, in batch order.
+    """
+    batches = _batch_seeds(seed, replicates, batch_size)
+    results = {}
+    done = 0
+    started = time.perf_counter()
+    report_every = max(1, len(batches) // 10)
+
+    def report(batch_index, values):
+        nonlocal done
+        results[batch_index] = values
+        done += len(values) if values.ndim == 1 else values.shape[-1]
+        if len(results) % report_every == 0 or len(results) == len(batches):
+            print(f"   {label}: {done:,}/{replicates:,} replicates ({time.perf_counter() - started:.1f}s)")
+
+    if workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(state,)) as executor:
+            futures = {executor.submit(batch_function, None, size, stream): index for index, size, stream in batches}
+            for future in as_completed(futures):
+                report(futures[future], future.result())
+    else:
+        for index, size, stream in batches:
+            report(index, batch_function(state, size, stream))
+
+    return np.concatenate([results[index] for index in range(len(batches))], axis=-1)
+
+def _wild_bootstrap_batch(state, size, stream):
+    """Bootstrap t statistics of one batch, from the cluster-level arrays only."""
+    state = state if state is not None else _WORKER_STATE
+    rng = np.random.default_rng(stream)
+    weights = WILD_WEIGHTS[state['weights']]
+    V = weights[rng.integers(0, len(weights), size=(state['n_clusters'], size))]
+
+    # beta* = A y_r + C V, and each cluster's score of the tested coefficient is a + c v - M beta*
+    beta = state['beta_restricted'][:, None] + state['C'] @ V
+    q = state['a'][:, None] + state['c'][:, None] * V - state['M'] @ beta
+    se = np.sqrt(state['adjustment'] * (q * q).sum(axis=0))
+    return beta[state['position']] / se
+
+def wild_cluster_bootstrap(panel, outcome, regressors, test='D', replicates=9999, weights='rademacher',
+                           seed=12345, workers=1, batch_size=1000):
+    """
+    Wild-cluster restricted (WCR) bootstrap p-value for one coefficient being zero.
+
+    The null is imposed by refitting without the tested regressor. Each replicate
+    flips the restricted residuals by one weight per cluster, refits on the
+    already-demeaned design and computes the clustered t statistic. Everything a
+    replicate needs reduces to cluster-level arrays, so a batch of replicates is
+    a few (clusters x batch) matrix products. No per-replicate regression or
+    demeaning is run.
+
+    Args:
+        panel (FixedEffectsPanel): The panel to fit on.
+        outcome (str): Outcome column.
+        regressors (list): Regressors of the model, including the tested one.
+        test (str): Regressor whose coefficient is tested.
+        replicates (int): Number of bootstrap replicates.
+        weights (str): 'rademacher' or 'webb' (better with fewer than about 12 clusters).
+        seed (int): Seed of the replicate streams.
+        workers (int): Worker processes for the batches.
+        batch_size (int): Replicates per batch and per random stream.
+
+    Returns:
+        dict: Observed 't', bootstrap 'p_value', the replicate 't_stats' and 'replicates'.
+    """
+    design = panel.design(outcome, regressors)
+    y, X, names = design['y'], design['X'], design['names']
+    if test not in names:
+        raise ValueError(f"'{test}' is not an identified regressor of the model: {names}")
+    position = names.index(test)
+    clusters, n_clusters = design['clusters'], design['n_clusters']
+    order, starts, _ = group_index(clusters)
+
+    XtX_inv = np.linalg.pinv(X.T @ X)
+    A = XtX_inv @ X.T
+    observed = panel.fit(outcome, regressors)
+    t_observed = observed.coef[position] / observed.se[position]
+
+    # Restricted fit without the tested regressor
+    X_restricted = np.delete(X, position, axis=1)
+    if X_restricted.shape[1]:
+        beta_r = np.linalg.lstsq(X_restricted, y, rcond=None)[0]
+        y_restricted = X_restricted @ beta_r
+    else:
+        y_restricted = np.zeros_like(y)
+    u_restricted = y - y_restricted
+
+    z = X @ XtX_inv[position]
+    state = {
+        'weights': weights,
+        'n_clusters': n_clusters,
+        'position': position,
+        'beta_restricted': A @ y_restricted,
+        'C': group_sums((A * u_restricted).T, order, starts).T,
+        'a': group_sums(z * y_restricted, order, starts),
+        'c': group_sums(z * u_restricted, order, starts),
+        'M': group_sums(z[:, None] * X, order, starts),
+        'adjustment': cluster_adjustment(len(y), n_clusters, X.shape[1] + design['fe_dof']),
+    }
+
+    print(f"\n🔁 Wild-cluster bootstrap ({weights}, {replicates:,} replicates, {n_clusters} clusters) for '{test}':")
+    t_stats = _run_batches(_wild_bootstrap_batch, state, seed, replicates, batch_size, workers, "Bootstrap")
+    p_value = float(np.mean(np.abs(t_stats) >= abs(t_observed)))
+    print(f"   Observed t = {t_observed:.3f}, bootstrap p = {p_value:.4f}")
+    return {'t': float(t_observed), 'p_value': p_value, 't_stats': t_stats, 'replicates': replicates}
+
+def _placebo_batch(state, size, stream):
+    """Placebo DiD coefficients and clustered t statistics of one batch."""
+    state = state if state is not None else _WORKER_STATE
+    rng = np.random.default_rng(stream)
+    n_units = state['n_units']
+
+    # Each replicate treats a random set of as many units as are really treated
+    draws = np.argsort(rng.random((size, n_units)), axis=1)[:, :state['n_treated']]
+    placebo_units = np.zeros((size, n_units), dtype=bool)
+    np.put_along_axis(placebo_units, draws, True, axis=1)
+    D = placebo_units[:, state['unit_codes']].T * state['post'][:, None]
+
+    D = demean(D, state['fe_codes'], state['tol'])[0]
+    if state['P'] is not None:
+        D -= state['X_controls'] @ (state['P'] @ D)
+
+    y = state['y']
+    DtD = (D * D).sum(axis=0)
+    beta = (D * y[:, None]).sum(axis=0) / DtD
+    residuals = y[:, None] - D * beta
+    scores = group_sums(D * residuals, state['order'], state['starts'])
+    se = np.sqrt(state['adjustment'] * (scores * scores).sum(axis=0)) / DtD
+    return np.vstack([beta, beta / se])
+
+def placebo_inference(panel, outcome, controls=(), treated_column='treated', post_column='post', replicates=9999,
+                      seed=12345, workers=1, batch_size=500):
+    """
+    Randomization inference for the DiD coefficient by reassigning treatment.
+
+    Every replicate draws as many placebo-treated units as there are treated
+    units, builds treated x post and re-estimates the DiD coefficient. The
+    outcome and controls are demeaned once. Controls are partialled out with
+    one projection matrix, and each batch demeans all its placebo
+    treatment columns in a single demean() call.
+
+    Args:
+        panel (FixedEffectsPanel): The panel to fit on.
+        outcome (str): Outcome column.
+        controls (iterable): Control columns.
+        treated_column (str): 0/1 ever-treated indicator per row.
+        post_column (str): 0/1 post-period indicator per row.
+        replicates (int): Number of placebo assignments.
+        seed (int): Seed of the replicate streams.
+        workers (int): Worker processes for the batches.
+        batch_size (int): Replicates per batch and per random stream.
+
+    Returns:
+        dict: Observed 'coef' and 't', 'p_value' (share of placebo |coef| at least as large),
+              'p_value_t' (same for |t|) and the placebo 'coefs' and 't_stats'.
+    """
+    controls = list(controls)
+    design = panel.design(outcome, controls + [treated_column, post_column])
+    mask = design['mask']
+    rows = panel.df.loc[mask]
+    unit_codes, units = pd.factorize(rows[panel.unit_column])
+    treated_units = rows.groupby(unit_codes)[treated_column].max().to_numpy() > 0
+    n_treated = int(treated_units.sum())
+    if n_treated == 0 or n_treated == len(units):
+        raise ValueError("Placebo inference needs both treated and untreated units.")
+
+    names = design['names']
+    X_controls = design['X'][:, [names.index(control) for control in controls if control in names]]
+    y = design['y']
+    P = None
+    if X_controls.shape[1]:
+        P = np.linalg.pinv(X_controls.T @ X_controls) @ X_controls.T
+        y = y - X_controls @ (P @ y)
+
+    order, starts, _ = group_index(design['clusters'])
+    state = {
+        'n_units': len(units),
+        'n_treated': n_treated,
+        'unit_codes': unit_codes,
+        'post': rows[post_column].to_numpy(dtype=float),
+        'fe_codes': design['fe_codes'],
+        'tol': panel.tol,
+        'X_controls': X_controls,
+        'P': P,
+        'y': y,
+        'order': order,
+        'starts': starts,
+        'adjustment': cluster_adjustment(len(y), design['n_clusters'], X_controls.shape[1] + 1 + design['fe_dof']),
+    }
+
+    observed = panel.fit(outcome, ['D'] + controls) if 'D' in panel.df.columns else None
+    actual = _placebo_statistics(state, treated_units)
+    coef_observed, t_observed = actual
+
+    print(f"\n🎲 Placebo inference ({replicates:,} assignments of {n_treated} treated among {len(units)} units):")
+    draws = _run_batches(_placebo_batch, state, seed, replicates, batch_size, workers, "Placebo")
+    coefs, t_stats = draws[0], draws[1]
+    p_value = float(np.mean(np.abs(coefs) >= abs(coef_observed)))
+    p_value_t = float(np.mean(np.abs(t_stats) >= abs(t_observed)))
+    print(f"   Observed coefficient = {coef_observed:.4f} (t = {t_observed:.3f}), "
+          f"randomization p = {p_value:.4f} (p from |t| = {p_value_t:.4f})")
+    if observed is not None and 'D' in observed.names:
+        print(f"   Analytic clustered p = {observed.summary().loc['D', 'Pr(>|t|)']:.4f}")
+    return {'coef': coef_observed, 't': t_observed, 'p_value': p_value, 'p_value_t': p_value_t,
+            'coefs': coefs, 't_stats': t_stats}
+
+def _placebo_statistics(state, treated_units):
+    """Coefficient and t statistic of one treatment assignment, computed like a placebo replicate."""
+    D = (treated_units[state['unit_codes']] * state['post'])[:, None]
+    D = demean(D, state['fe_codes'], state['tol'])[0]
+    if state['P'] is not None:
+        D -= state['X_controls'] @ (state['P'] @ D)
+    D = D[:, 0]
+    DtD = D @ D
+    beta = (D @ state['y']) / DtD
+    scores = group_sums((D * (state['y'] - D * beta))[:, None], state['order'], state['starts'])[:, 0]
+    return float(beta), float(beta / (np.sqrt(state['adjustment'] * scores @ scores) / DtD))
+
+# --- Main execution ---
+if __name__ == "__main__":
+    try:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        script_dir = os.path.abspath('.')
+
+    parser = argparse.ArgumentParser(description="Wild-cluster bootstrap and placebo inference for the DiD estimate.")
+    parser.add_argument("--panel", default=os.path.join(script_dir, "Data", "ACS", "merged_crime_acs.csv"),
+                        help="Merged panel CSV with the outcome and a funding column.")
+    parser.add_argument("--outcome", default="violent_crime", help="Outcome column.")
+    parser.add_argument("--funding-column", default="funding2022",
+                        help="Funding amount; cities with a positive amount in any year are treated.")
+    parser.add_argument("--treatment-year", type=int, default=2022, help="First post-treatment year.")
+    parser.add_argument("--unit-column", default="place_id", help="City identifier for fixed effects and clusters.")
+    parser.add_argument("--drop-years", type=int, nargs="*", default=[], help="Years left out, e.g. 2021.")
+    parser.add_argument("--no-controls", action="store_true", help="Leave out the ACS controls.")
+    parser.add_argument("--replicates", type=int, default=9999, help="Bootstrap and placebo replicates.")
+    parser.add_argument("--weights", choices=sorted(WILD_WEIGHTS), default="rademacher",
+                        help="Wild bootstrap weights; webb for very few clusters.")
+    parser.add_argument("--seed", type=int, default=12345, help="Seed of the replicate streams.")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Worker processes.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.panel):
+        print(f"❌ Error: Merged panel not found at the expected path.")
+        print(f"   Checked for: {args.panel}")
+    else:
+        panel_df = pd.read_csv(args.panel, dtype={'geo_id': str, 'state_code': str, 'place_code': str, 'place_id': str})
+        if args.funding_column not in panel_df.columns:
+            print(f"❌ Error: The panel has no '{args.funding_column}' column. Add it with process_grant_data.py --panel first.")
+        else:
+            panel_df = panel_df[~panel_df['year'].isin(args.drop_years)]
+            panel_df = add_treatment_columns(add_control_variables(panel_df), args.funding_column, args.unit_column,
+                                             'year', args.treatment_year)
+            controls = [] if args.no_controls else [c for c in DEFAULT_CONTROLS if c in panel_df.columns]
+            model = FixedEffectsPanel(panel_df, args.unit_column, 'year')
+            model.fit(args.outcome, ['D'] + controls).print_summary("DiD")
+            wild_cluster_bootstrap(model, args.outcome, ['D'] + controls, 'D', args.replicates, args.weights,
+                                   args.seed, args.workers)
+            placebo_inference(model, args.outcome, controls, replicates=args.replicates, seed=args.seed,
+                              workers=args.workers)
@@ -0,0 +1,312 @@
+import os
+import json
+import shutil
+import argparse
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+# Bump when the on-disk layout changes so old stores are rebuilt rather than misread
+STORE_VERSION = 1
+
+STORE_FILES = ('meta.json', 'keys.json', 'offsets.npy', 'years.npy', 'values.npy')
+
+def get_store_path(output_filename):
+    """Return the panel store directory that sits next to the CSV output."""
+    return os.path.splitext(output_filename)[0] + "_store"
+
+def canonical_name(name):
+    """Lookup form of a key: trimmed, inner whitespace collapsed and case-folded."""
+    return ' '.join(str(name).split()).casefold()
+
+def build_panel_store(panel_df, store_directory, key_columns=('State', 'City')):
+    """
+    Write the consolidated panel as a memory-mappable store.
+
+    Rows are sorted by (first key, remaining keys, Year) on their canonical names,
+    so every entity's series and every state's entities are contiguous. The store
+    holds:
+        values.npy   float64 (rows x measures), NaN where a measure is missing
+        years.npy    int16 Year of every row
+        offsets.npy  int64 first row of every entity, plus the row count
+        keys.json    canonical and display names of the states and entities, and
+                     the first entity of every state
+        meta.json    layout version, key columns, measures, row and year counts
+    The files are written to a temporary directory that replaces the store at the end.
+
+    Args:
+        panel_df (pd.DataFrame): Key columns, measure columns and Year, as returned by
+                                 consolidate_crime_data_efficiently.
+        store_directory (str): Directory of the store.
+        key_columns (iterable): The table's key columns; the first groups the entities
+                                (State), the rest identify an entity (City).
+
+    Returns:
+        str: The store directory.
+    """
+    import pandas as pd
+
+    key_columns = list(key_columns)
+    measures = [column for column in panel_df.columns if column not in key_columns + ['Year']]
+    panel_df = panel_df.dropna(subset=key_columns + ['Year'])
+
+    # Rank every row's keys by canonical name, converting only the distinct values
+    ranks, canonical, display, raw_codes = [], [], [], []
+    for column in key_columns:
+        codes, uniques = pd.factorize(panel_df[column].astype(object))
+        names, inverse = np.unique([canonical_name(value) for value in uniques], return_inverse=True)
+        raw_codes.append(codes)
+        ranks.append(inverse[codes])
+        canonical.append(names)
+        display.append(np.asarray(uniques, dtype=object))
+    years = panel_df['Year'].to_numpy(dtype=np.int16)
+    order = np.lexsort([years] + ranks[::-1])
+    ranks = [rank[order] for rank in ranks]
+    raw_codes = [codes[order] for codes in raw_codes]
+
+    # Entities start where any key changes; states where the first key changes
+    changed = np.zeros(len(order), dtype=bool)
+    changed[:1] = True
+    for rank in ranks:
+        changed[1:] |= rank[1:] != rank[:-1]
+    entity_starts = np.flatnonzero(changed)
+    group_changed = np.r_[True, ranks[0][1:] != ranks[0][:-1]] if len(order) else changed
+    group_starts = np.flatnonzero(group_changed)
+
+    # Display names come from the first row of each entity
+    keys = {
+        'groups': [canonical[0][ranks[0][start]] for start in group_starts],
+        'group_names': [str(display[0][raw_codes[0][start]]) for start in group_starts],
+        'group_offsets': np.searchsorted(entity_starts, np.r_[group_starts, len(order)]).tolist(),
+        'entities': [[canonical[level][ranks[level][start]] for level in range(1, len(key_columns))]
+                     for start in entity_starts],
+        'entity_names': [[str(display[level][raw_codes[level][start]]) for level in range(1, len(key_columns))]
+                         for start in entity_starts],
+    }
+    meta = {
+        'version': STORE_VERSION,
+        'key_columns': key_columns,
+        'measures': measures,
+        'rows': int(len(order)),
+        'entities': int(len(entity_starts)),
+        'years': sorted(int(year) for year in np.unique(years)),
+    }
+
+    temporary_directory = store_directory.rstrip(os.sep) + ".tmp"
+    if os.path.isdir(temporary_directory):
+        shutil.rmtree(temporary_directory)
+    os.makedirs(temporary_directory)
+    values = panel_df[measures].to_numpy(dtype=np.float64, na_value=np.nan)[order] if measures else \
+        np.empty((len(order), 0))
+    np.save(os.path.join(temporary_directory, 'values.npy'), np.ascontiguousarray(values))
+    np.save(os.path.join(temporary_directory, 'years.npy'), years[order])
+    np.save(os.path.join(temporary_directory, 'offsets.npy'), np.r_[entity_starts, len(order)].astype(np.int64))
+    with open(os.path.join(temporary_directory, 'keys.json'), 'w') as f:
+        json.dump(keys, f)
+    with open(os.path.join(temporary_directory, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    if os.path.isdir(store_directory):
+        shutil.rmtree(store_directory)
+    os.replace(temporary_directory, store_directory)
+    return store_directory
+
+class PanelStore:
+    """
+    Read-only view of a store written by build_panel_store.
+
+    Opening a store reads the small key files and memory-maps the arrays, so it
+    costs the same for any panel size. A lookup slices the rows of one entity or
+    one state out of the maps and only those pages are read from disk; processes
+    opening the same store share the pages through the OS cache.
+
+    Usage:
+        store = PanelStore("Data/consolidated_violent_crime_data_2012-2023_reconstructed_store")
+        store.series("Maryland", "Baltimore")
+        store.state("Ohio", years=range(2019, 2023))
+    """
+
+    def __init__(self, store_directory):
+        """
+        Args:
+            store_directory (str): Directory written by build_panel_store.
+
+        Raises:
+            FileNotFoundError: If the directory is not a complete store.
+            ValueError: If the store was written with another layout version.
+        """
+        missing = [name for name in STORE_FILES if not os.path.exists(os.path.join(store_directory, name))]
+        if missing:
+            raise FileNotFoundError(f"{store_directory} is not a panel store (missing {', '.join(missing)}).")
+        with open(os.path.join(store_directory, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != STORE_VERSION:
+            raise ValueError(f"{store_directory} has layout version {self.meta.get('version')}, expected "
+                             f"{STORE_VERSION}. Rebuild it with: python crime_panel_store.py build")
+        with open(os.path.join(store_directory, 'keys.json')) as f:
+            self.keys = json.load(f)
+        self.store_directory = store_directory
+        self.key_columns = self.meta['key_columns']
+        self.measures = self.meta['measures']
+        self.values = np.load(os.path.join(store_directory, 'values.npy'), mmap_mode='r')
+        self.years = np.load(os.path.join(store_directory, 'years.npy'), mmap_mode='r')
+        self.offsets = np.load(os.path.join(store_directory, 'offsets.npy'), mmap_mode='r')
+        self._group_index = {name: position for position, name in enumerate(self.keys['groups'])}
+        self._entity_index = None
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def _find_group(self, group):
+        position = self._group_index.get(canonical_name(group))
+        if position is None:
+            raise KeyError(f"No {self.key_columns[0]} '{group}' in the store.")
+        return position
+
+    def _find_entity(self, group, entity):
+        """Entity position of a (state, city) key; entity is a tuple for tables with more keys."""
+        if self._entity_index is None:
+            # Built on the first entity lookup only
+            self._entity_index = {}
+            offsets = self.keys['group_offsets']
+            for group_position, group_name in enumerate(self.keys['groups']):
+                for position in range(offsets[group_position], offsets[group_position + 1]):
+                    self._entity_index[(group_name,) + tuple(self.keys['entities'][position])] = position
+        entity = entity if isinstance(entity, tuple) else (entity,)
+        key = (canonical_name(group),) + tuple(canonical_name(part) for part in entity)
+        position = self._entity_index.get(key)
+        if position is None:
+            raise KeyError(f"No {'/'.join(self.key_columns)} {key} in the store.")
+        return position
+
+    def _column_positions(self, measures):
+        if measures is None:
+            return list(range(len(self.measures)))
+        unknown = [measure for measure in measures if measure not in self.measures]
+        if unknown:
+            raise KeyError(f"No measure(s) {unknown} in the store. Available: {self.measures}")
+        return [self.measures.index(measure) for measure in measures]
+
+    def _rows(self, start, end, years, measures, entity_positions, as_frame):
+        """Slice rows [start, end), keep the requested years and measures and attach the keys."""
+        row_years = np.asarray(self.years[start:end])
+        keep = np.isin(row_years, list(years)) if years is not None else slice(None)
+        columns = self._column_positions(measures)
+        values = np.asarray(self.values[start:end])[keep][:, columns]
+        row_entities = np.repeat(entity_positions, np.diff(self.offsets[entity_positions[0]:entity_positions[-1] + 2]))[keep]
+
+        data = {}
+        group_names = np.asarray(self.keys['group_names'], dtype=object)
+        group_of_entity = np.searchsorted(self.keys['group_offsets'], row_entities, side='right') - 1
+        data[self.key_columns[0]] = group_names[group_of_entity]
+        for level, column in enumerate(self.key_columns[1:]):
+            names = np.asarray([self.keys['entity_names'][position][level] for position in entity_positions], dtype=object)
+            data[column] = names[row_entities - entity_positions[0]]
+        for position, column in enumerate(columns):
+            data[self.measures[column]] = values[:, position]
+        data['Year'] = row_years[keep]
+        if not as_frame:
+            return data
+        import pandas as pd
+        return pd.DataFrame(data)
+
+    def series(self, state, city, measures=None, years=None, as_frame=True):
+        """
+        One entity's rows, e.g. a city's Violent Crime by year.
+
+        Args:
+            state (str): First key (State), matched case- and whitespace-insensitively.
+            city (str or tuple): Remaining key(s) (City; a tuple for tables with more keys).
+            measures (list, optional): Measures to return. Defaults to all.
+            years (iterable, optional): Years to return. Defaults to all.
+            as_frame (bool): Return a DataFrame; otherwise a dict of numpy arrays.
+
+        Returns:
+            pd.DataFrame or dict: The rows in year order.
+
+        Raises:
+            KeyError: If the entity or a measure is not in the store.
+        """
+        position = self._find_entity(state, city)
+        return self._rows(int(self.offsets[position]), int(self.offsets[position + 1]), years, measures,
+                          np.array([position]), as_frame)
+
+    def state(self, state, years=None, measures=None, as_frame=True):
+        """
+        Every entity of a state, e.g. all cities in Ohio for 2019-2022.
+
+        Args:
+            state (str): First key (State), matched case- and whitespace-insensitively.
+            years (iterable, optional): Years to return. Defaults to all.
+            measures (list, optional): Measures to return. Defaults to all.
+            as_frame (bool): Return a DataFrame; otherwise a dict of numpy arrays.
+
+        Returns:
+            pd.DataFrame or dict: The rows sorted by entity and year.
+
+        Raises:
+            KeyError: If the state or a measure is not in the store.
+        """
+        group = self._find_group(state)
+        first, last = self.keys['group_offsets'][group], self.keys['group_offsets'][group + 1]
+        return self._rows(int(self.offsets[first]), int(self.offsets[last]), years, measures,
+                          np.arange(first, last), as_frame)
+
+    def entities(self, state=None):
+        """Display names of the entities, of one state or of all of them."""
+        if state is None:
+            return [tuple(names) for names in self.keys['entity_names']]
+        group = self._find_group(state)
+        first, last = self.keys['group_offsets'][group], self.keys['group_offsets'][group + 1]
+        return [tuple(names) for names in self.keys['entity_names'][first:last]]
+
+def _parse_years(selection):
+    """"2019-2022" or "2019,2021" -> list of years."""
+    years = []
+    for part in selection.split(','):
+        start, _, end = part.partition('-')
+        years.extend(range(int(start), int(end or start) + 1))
+    return years
+
+# --- Main execution ---
+if __name__ == "__main__":
+    try:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        script_dir = os.path.abspath('.')
+    default_panel = os.path.join(script_dir, "Data", "consolidated_violent_crime_data_2012-2023_reconstructed.csv")
+
+    parser = argparse.ArgumentParser(description="Build or query the memory-mapped crime panel store.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    build = subcommands.add_parser("build", help="Build the store from a consolidated panel CSV.")
+    build.add_argument("--panel", default=default_panel, help="Consolidated panel CSV.")
+    build.add_argument("--store", help="Store directory. Defaults to <panel>_store.")
+    build.add_argument("--key-columns", nargs="+", default=["State", "City"], help="Key columns of the table.")
+    query = subcommands.add_parser("query", help="Print one city's series or a state's rows.")
+    query.add_argument("--store", default=get_store_path(default_panel), help="Store directory.")
+    query.add_argument("--state", required=True, help="State to look up.")
+    query.add_argument("--city", help="City to look up; all cities of the state if omitted.")
+    query.add_argument("--years", type=_parse_years, help='Years, e.g. "2019-2022".')
+    query.add_argument("--measures", nargs="+", help="Measures to show. Defaults to all.")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if not os.path.exists(args.panel):
+            print(f"❌ Error: Panel not found at the expected path.")
+            print(f"   Checked for: {args.panel}")
+        else:
+            import pandas as pd
+            panel = pd.read_csv(args.panel, dtype={column: str for column in args.key_columns})
+            store_directory = build_panel_store(panel, args.store or get_store_path(args.panel), args.key_columns)
+            print(f"✅ Panel store with {len(panel):,} rows saved to: {store_directory}")
+    else:
+        try:
+            store = PanelStore(args.store)
+            if args.city:
+                rows = store.series(args.state, args.city, args.measures, args.years)
+            else:
+                rows = store.state(args.state, args.years, args.measures)
+        except (FileNotFoundError, ValueError, KeyError) as e:
+            print(f"❌ Error: {e}")
+        else:
+            print(rows.to_string(index=False))
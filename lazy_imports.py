@@ -0,0 +1,58 @@
+import sys
+import importlib
+import importlib.util
+
+# pip package of an import name, for the install hint of a missing optional dependency
+PIP_NAMES = {'xlrd': 'xlrd', 'openpyxl': 'openpyxl', 'pyarrow': 'pyarrow'}
+
+def lazy_import(name):
+    """
+    Return a module that is only imported when one of its attributes is first used.
+
+    The processing modules bind pandas and numpy this way, so commands that never
+    touch a DataFrame (--plan, the log summary) start without loading them.
+    A module that is already imported is returned as is.
+
+    Args:
+        name (str): Module name, e.g. 'pandas'.
+
+    Returns:
+        module: The module, or a lazy stand-in that imports it on first attribute access.
+
+    Raises:
+        ImportError: If the module is not installed.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+def import_optional(name, purpose):
+    """
+    Import an optional dependency on the code path that needs it.
+
+    Args:
+        name (str): Module name, e.g. 'xlrd'.
+        purpose (str): What it is needed for, e.g. "to read .xls files".
+
+    Returns:
+        module: The imported module.
+
+    Raises:
+        ImportError: With an install hint if the module is not installed.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        raise ImportError(f"{name} is needed {purpose}. Install with: pip install {PIP_NAMES.get(name, name)}") from e
+
+def is_available(name):
+    """Return True if a module can be imported, without importing it."""
+    return name in sys.modules or importlib.util.find_spec(name) is not None
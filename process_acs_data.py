@@ -0,0 +1,233 @@
+import pandas as pd
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from acs_data_schema import ACS_TABLES, ACS_VARIABLES, get_table_paths, resolve_acs_columns
+
+# The pyarrow CSV engine and Parquet output are optional; the C engine and CSV output work without them
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+    ds = None
+
+# Census placeholders for suppressed or not applicable estimates
+ACS_NA_VALUES = ["-", "N", "(X)", "**", "***", "*****", "null"]
+
+def read_acs_table(year, table_key, data_directory):
+    """
+    Reads the resolved columns of one ACS table for one year.
+
+    Columns are found by label in the table's Column-Metadata file, only those
+    columns are read from the Data file, the "Geography" label row under the
+    header is dropped and the estimates are converted to floats. Capped values
+    such as "250,000+" or "2,500-" keep their number.
+
+    Args:
+        year (int): The ACS 5-year release year.
+        table_key (str): A key of ACS_TABLES.
+        data_directory (str): The Data folder holding the Poverty and Income folders.
+
+    Returns:
+        pd.DataFrame or None: GEO_ID, NAME and one float column per resolved
+                              variable, or None if the table can't be read.
+    """
+    metadata_path, data_path = get_table_paths(year, table_key, data_directory)
+    table_id = ACS_TABLES[table_key][1]
+
+    if not os.path.exists(metadata_path):
+        print(f"Skipping {table_id} {year}: Column metadata file not found")
+        return None
+    if not os.path.exists(data_path):
+        print(f"Skipping {table_id} {year}: Data file not found")
+        return None
+    if os.path.getsize(data_path) == 0:
+        print(f"Skipping {table_id} {year}: Data file '{os.path.basename(data_path)}' is empty (0 bytes)")
+        return None
+
+    resolved, missing = resolve_acs_columns(metadata_path, table_key)
+    for name in missing:
+        print(f"Warning: No column for '{name}' in {table_id} {year}. It will be empty.")
+
+    codes = list(resolved.values())
+    df = pd.read_csv(data_path, usecols=['GEO_ID', 'NAME'] + codes, dtype=str,
+                     na_values=ACS_NA_VALUES,
+                     engine='pyarrow' if pa is not None else 'c')
+    df = df[df['GEO_ID'] != 'Geography']
+
+    table = pd.DataFrame({'GEO_ID': df['GEO_ID'].to_numpy(), 'NAME': df['NAME'].to_numpy()})
+    for name, code in resolved.items():
+        values = df[code].str.replace(r'[,+]|-$', '', regex=True)
+        table[name] = pd.to_numeric(values, errors='coerce').astype(float).to_numpy()
+    for name in missing:
+        table[name] = float('nan')
+    return table
+
+def process_acs_year(year, data_directory):
+    """
+    Reads and merges the poverty, mean income and median income tables for a year.
+
+    Args:
+        year (int): The ACS 5-year release year.
+        data_directory (str): The Data folder holding the Poverty and Income folders.
+
+    Returns:
+        tuple: (year, DataFrame or None). The frame has one row per place in the
+               poverty table, with the income columns empty where a place or
+               table is missing. None if the poverty table can't be read.
+    """
+    poverty = read_acs_table(year, 'poverty', data_directory)
+    if poverty is None:
+        return year, None
+
+    yearly_data = poverty
+    for table_key in ('mean_income', 'median_income'):
+        income = read_acs_table(year, table_key, data_directory)
+        income_columns = [name for name, spec in ACS_VARIABLES.items() if spec[0] == table_key]
+        if income is None:
+            for name in income_columns:
+                yearly_data[name] = float('nan')
+            continue
+        yearly_data = yearly_data.merge(income[['GEO_ID'] + income_columns], on='GEO_ID', how='left')
+
+    yearly_data['Year'] = year
+    print(f"Successfully processed ACS {year}: {len(yearly_data)} places")
+    return year, yearly_data
+
+def to_typed_acs_panel(final_df):
+    """
+    Arrange the consolidated ACS rows as a typed panel.
+
+    Args:
+        final_df (pd.DataFrame): Concatenated rows from process_acs_year.
+
+    Returns:
+        pd.DataFrame: GEO_ID and Name as strings, State and UnitVariable (the
+                      state + place FIPS code from GEO_ID) as nullable integers,
+                      int32 Year and one float64 column per ACS variable.
+    """
+    # GEO_ID looks like "1600000US0644000": summary level, "US", then state and place FIPS
+    unit = final_df['GEO_ID'].str[9:16]
+    typed = pd.DataFrame({
+        'GEO_ID': final_df['GEO_ID'].astype('string'),
+        'Name': final_df['NAME'].astype('string'),
+        'Year': final_df['Year'].astype('int32'),
+        'UnitVariable': pd.to_numeric(unit, errors='coerce').astype('Int64'),
+        'State': pd.to_numeric(unit.str[:2], errors='coerce').astype('Int64'),
+    })
+    for name in ACS_VARIABLES:
+        typed[name] = final_df[name].astype('float64')
+    return typed
+
+def write_acs_panel(panel, output_filename, output_formats=('csv',)):
+    """
+    Write the typed ACS panel in the requested formats.
+
+    Args:
+        panel (pd.DataFrame): The typed panel from to_typed_acs_panel.
+        output_filename (str): The full path for the CSV output. The Parquet
+                               dataset is written next to it, partitioned by Year.
+        output_formats (iterable): Any of 'csv' and 'parquet'.
+
+    Returns:
+        list: Paths that were written.
+    """
+    written = []
+    if 'csv' in output_formats:
+        panel.to_csv(output_filename, index=False)
+        written.append(output_filename)
+
+    if 'parquet' in output_formats:
+        if pa is None:
+            print("Warning: pyarrow not installed. Install with: pip install pyarrow")
+            print("Skipping the Parquet dataset output.")
+            return written
+
+        dataset_path = os.path.splitext(output_filename)[0] + "_parquet"
+        if os.path.isdir(dataset_path):
+            shutil.rmtree(dataset_path)
+        table = pa.Table.from_pandas(panel, preserve_index=False)
+        partitioning = ds.partitioning(pa.schema([('Year', pa.int32())]), flavor='hive')
+        ds.write_dataset(table, dataset_path, format='parquet', partitioning=partitioning,
+                         basename_template='part-{i}.parquet')
+        written.append(dataset_path)
+
+    return written
+
+def consolidate_acs_data(start_year, end_year, data_directory, output_filename, workers=1,
+                         output_formats=('csv',)):
+    """
+    Reads the ACS poverty and income tables for every year and writes one typed panel.
+
+    Args:
+        start_year (int): The first ACS release year.
+        end_year (int): The last ACS release year.
+        data_directory (str): The Data folder holding the Poverty and Income folders.
+        output_filename (str): The full path for the output CSV file.
+        workers (int): Number of worker processes. Years are read in separate
+                       processes and concatenated in year order.
+        output_formats (iterable): Any of 'csv' and 'parquet'.
+
+    Returns:
+        pd.DataFrame or None: The typed panel, or None if no year could be read.
+    """
+    print(f"Starting ACS extraction from: {data_directory}")
+    years = list(range(start_year, end_year + 1))
+
+    if workers > 1 and len(years) > 1:
+        print(f"Processing {len(years)} years with {workers} worker processes...")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(process_acs_year, year, data_directory) for year in years]
+            results = dict(future.result() for future in futures)
+    else:
+        results = dict(process_acs_year(year, data_directory) for year in years)
+
+    year_frames = [results[year] for year in years if results[year] is not None]
+    if not year_frames:
+        print("\nNo ACS data was processed. Check the 'Skipping' or 'Warning' messages above.")
+        return None
+
+    panel = to_typed_acs_panel(pd.concat(year_frames, ignore_index=True))
+    written_paths = write_acs_panel(panel, output_filename, output_formats)
+    print(f"\nACS consolidation complete. All data has been saved to:")
+    for path in written_paths:
+        print(f"   {path}")
+
+    print(f"\n📊 FINAL ACS PANEL STATISTICS:")
+    print(f"   Total place-years: {len(panel):,}")
+    print(f"   Years covered: {sorted(panel['Year'].unique().tolist())}")
+    print(f"   Places: {panel['GEO_ID'].nunique():,}")
+    return panel
+
+# --- Main execution ---
+if __name__ == "__main__":
+    START_YEAR = 2012
+    END_YEAR = 2023
+    WORKERS = min(4, os.cpu_count() or 1)
+    OUTPUT_FORMATS = ('csv', 'parquet')
+
+    try:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        script_dir = os.path.abspath('.')
+
+    SOURCE_DATA_DIRECTORY = os.path.join(script_dir, "Data")
+    OUTPUT_DIRECTORY = os.path.join(script_dir, "Data", "ACS")
+
+    OUTPUT_FILENAME = "acs_poverty_income_panel_2012-2023.csv"
+    FULL_OUTPUT_PATH = os.path.join(OUTPUT_DIRECTORY, OUTPUT_FILENAME)
+
+    if not os.path.isdir(os.path.join(SOURCE_DATA_DIRECTORY, "Poverty")):
+        print(f"❌ Error: ACS poverty data directory not found at the expected path.")
+        print(f"   Checked for: {os.path.join(SOURCE_DATA_DIRECTORY, 'Poverty')}")
+    else:
+        try:
+            os.makedirs(OUTPUT_DIRECTORY, exist_ok=True)
+            print(f"✅ Input data found at: {SOURCE_DATA_DIRECTORY}")
+            print(f"✅ Output will be saved to: {FULL_OUTPUT_PATH}")
+            consolidate_acs_data(START_YEAR, END_YEAR, SOURCE_DATA_DIRECTORY, FULL_OUTPUT_PATH,
+                                 workers=WORKERS, output_formats=OUTPUT_FORMATS)
+        except OSError as e:
+            print(f"❌ Error creating output directory '{OUTPUT_DIRECTORY}'. Please check permissions.")
+            print(f"   System error: {e}")
@@ -1,276 +1,933 @@
-import pandas as pd
 import os
 import re
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from crime_data_logger import create_logger
-from crime_data_schema import get_crime_schema
+from crime_data_schema import compile_crime_schema
+from crime_data_reader import TableStreamReader, probe_header
+from crime_data_tables import TABLE_REGISTRY, get_table
+from crime_data_cleaning import (clean_numeric_columns, clean_names, share_categories,
+                                 STATE_SUFFIX_PATTERN, CITY_SUFFIX_PATTERN)
+from crime_data_cache import CrimeDataCache
+from crime_data_output import write_crime_panel, read_existing_panel, OUTPUT_FORMATS
+from crime_data_manifest import load_manifest, save_manifest, build_year_entry, is_year_unchanged
+from crime_data_profiling import profile_year
+from crime_data_validation import validate_crime_panel, VALIDATION_STEP_PREFIX
+from crime_data_runs import RUNS_DATABASE_NAME
+from lazy_imports import lazy_import
 
-# Try to import Excel reading dependencies with helpful error messages
-try:
-    import openpyxl  # For .xlsx files
-except ImportError:
-    print("Warning: openpyxl not installed. Install with: pip install openpyxl")
-    print("This is needed to read .xlsx files")
+# pandas is only loaded on the paths that read or write data, not by --plan
+pd = lazy_import('pandas')
 
-try:
-    import xlrd  # For .xls files
-except ImportError:
-    print("Warning: xlrd not installed. Install with: pip install xlrd")
-    print("This is needed to read .xls files")
+# The 50 states and the District of Columbia; more State values means a state is spelled two ways
+EXPECTED_STATE_COUNT = 51
 
-def consolidate_crime_data_efficiently(start_year, end_year, data_directory, output_filename, output_directory):
+def find_crime_data_file(year, data_directory, excel_files, table='table8'):
     """
-    Reads and combines crime data from a specific directory, using a schema to identify
-    columns and handling whitespace differences.
+    Locates a table's workbook for a given year.
+    
+    File names are matched against the table's pattern after lower-casing and
+    removing everything but letters and digits ("Table_08_..._by_State_by_City_2019"
+    and "table8...bystateandcity2019" both match Table 8), so no per-pattern
+    existence checks are needed.
     
     Args:
-        start_year (int): The starting year of the data files.
-        end_year (int): The ending year of the data files.
+        year (int): The year of the data file.
         data_directory (str): The path to the folder containing the source Excel files.
-        output_filename (str): The full path for the output CSV file.
-        output_directory (str): The directory for saving log files.
+        excel_files (list): Excel filenames found in data_directory.
+        table (str): Name of the registered table definition.
+    
+    Returns:
+        str or None: The full path to the workbook, or None if no file matches.
     """
-    print(f"Starting data extraction from: {data_directory}")
+    definition = get_table(table)
+    matches = []
+    for file in excel_files:
+        stem, ext = os.path.splitext(file)
+        match = definition.file_pattern.fullmatch(re.sub(r'[^a-z0-9]', '', stem.lower()))
+        if match and int(match.group(1)) == year:
+            matches.append((ext.lower() != '.xlsx', file))
+    if matches:
+        return os.path.join(data_directory, min(matches)[1])
     
-    # Initialize logger
-    logger = create_logger("crime_data_processing_log.csv")
+    for file in excel_files:
+        name = file.lower()
+        if str(year) in name and 'table' in name and all(word in name for word in definition.fallback_keywords):
+            return os.path.join(data_directory, file)
     
-    # Load the crime data schema
-    crime_schema = get_crime_schema()
+    return None
+
+def resolve_year_jobs(years, data_directory, crime_schema):
+    """
+    Pairs each requested year with its schema entry and workbook.
     
+    Args:
+        years (iterable): The years to process.
+        data_directory (str): The path to the folder containing the source Excel files.
+        crime_schema (CompiledCrimeSchema): The compiled crime data schema.
+    
+    Returns:
+        list or None: (year, full_file_path, year_schema) for every year with both a
+                      schema entry and a file, or None if the directory can't be read.
+    """
     try:
         files_in_dir = os.listdir(data_directory)
         excel_files = [f for f in files_in_dir if f.endswith(('.xlsx', '.xls'))]
         print(f"\nFound {len(excel_files)} Excel files in directory.")
     except Exception as e:
         print(f"Error reading directory: {e}")
-        return
+        return None
     
-    all_data_frames = [] 
-
-    for year in range(start_year, end_year + 1):
+    year_jobs = []
+    for year in years:
         year_schema = crime_schema.get(year)
         if not year_schema:
             print(f"Warning: No schema definition found for year {year}. Skipping.")
             continue
-            
-        possible_patterns = [
-            f"Table_8_Offenses_Known_to_Law_Enforcement_by_State_by_City_{year}",
-            f"table_8_offenses_known_to_law_enforcement_by_state_by_city_{year}",
-            f"Table8_Offenses_Known_to_Law_Enforcement_by_State_by_City_{year}",
-            f"Table_08_Offenses_Known_to_Law_Enforcement_by_State_by_City_{year}",
-            f"table08offensesknowntolawenforcementbystateandcity{year}",
-            f"table8offensesknowntolawenforcementbystateandcity{year}",
-        ]
-        
-        full_file_path = None
-        for pattern in possible_patterns:
-            for ext in ['.xlsx', '.xls']:
-                file_path = os.path.join(data_directory, f"{pattern}{ext}")
-                if os.path.exists(file_path):
-                    full_file_path = file_path
-                    break
-            if full_file_path:
-                break
-        
-        if full_file_path is None:
-            for file in excel_files:
-                if str(year) in file and 'table' in file.lower() and 'city' in file.lower():
-                    full_file_path = os.path.join(data_directory, file)
-                    break
         
+        full_file_path = find_crime_data_file(year, data_directory, excel_files, crime_schema.table)
         if full_file_path is None:
             print(f"Skipping: Cannot find file for year {year}")
             continue
         
-        try:
-            print(f"Processing: {os.path.basename(full_file_path)}")
-            
-            engine = 'openpyxl' if full_file_path.endswith('.xlsx') else 'xlrd'
-            df_original = pd.read_excel(full_file_path, skiprows=3, engine=engine)
-            df = df_original.copy()
-            
-            initial_row_count = len(df)
-            logger.update_processing_stats(year, "Initial Load", initial_row_count, initial_row_count)
-            
-            # 1. Clean Column Names and Create a Normalized Mapping
-            df.columns = [str(col).replace('\n', ' ').strip() for col in df.columns]
-            
-            def normalize_col_name(name):
-                """Converts to lowercase and collapses all whitespace to single spaces."""
-                return ' '.join(str(name).lower().split())
+        year_jobs.append((year, full_file_path, year_schema))
+    return year_jobs
 
-            normalized_to_original_cols = {normalize_col_name(col): col for col in df.columns}
+def probe_year_header(year, full_file_path, year_schema):
+    """
+    Reads only the header of a year's workbook and checks it against the schema.
+    
+    Returns:
+        dict: The header row index, the schema name -> column mapping, the schema
+              names with no matching column and any error opening the file.
+    """
+    key_columns = year_schema.key_columns
+    try:
+        header_row, header = probe_header(full_file_path, key_columns, year_schema.header_offset)
+    except Exception as e:
+        return {'year': year, 'file': full_file_path, 'key_columns': key_columns, 'header_row': None,
+                'mapping': {}, 'missing': [], 'error': str(e)}
+    
+    resolved = year_schema.resolve_columns(header[len(key_columns):])
+    fields = year_schema.fields
+    return {
+        'year': year,
+        'file': full_file_path,
+        'key_columns': key_columns,
+        'header_row': header_row,
+        'mapping': {year_schema.field_names[field]: resolved[field] for field in fields if field in resolved},
+        'missing': [year_schema.field_names[field] for field in fields if field not in resolved],
+        'error': None,
+    }
+
+def probe_year_headers(year_jobs, workers=8, unchanged=None):
+    """
+    Probes the header of every year's workbook concurrently.
+    
+    Args:
+        year_jobs (list): (year, full_file_path, year_schema) tuples from resolve_year_jobs.
+        workers (int): Threads used to open the workbooks.
+        unchanged (dict, optional): Year -> manifest entry of the unchanged years (see
+                                    find_unchanged_years). Their recorded header is used
+                                    instead of opening the workbook.
+    
+    Returns:
+        dict: Year -> result of probe_year_header.
+    """
+    unchanged = unchanged or {}
+    changed_jobs = [job for job in year_jobs if 'header' not in unchanged.get(job[0], {})]
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(changed_jobs)))) as executor:
+        probes = {probe['year']: probe for probe in executor.map(lambda job: probe_year_header(*job), changed_jobs)}
+    for year, full_file_path, year_schema in year_jobs:
+        if year not in probes:
+            probes[year] = dict(unchanged[year]['header'], year=year, file=full_file_path,
+                                key_columns=year_schema.key_columns, error=None)
+    return {year: probes[year] for year, _, _ in year_jobs}
 
-            if len(df.columns) > 1:
-                df.rename(columns={df.columns[0]: 'State', df.columns[1]: 'City'}, inplace=True)
-            else:
+def find_unchanged_years(year_jobs, manifest):
+    """
+    Returns the manifest entries of the years whose source file and schema entry
+    are unchanged (is_year_unchanged).
+    
+    Args:
+        year_jobs (list): (year, full_file_path, year_schema) tuples from resolve_year_jobs.
+        manifest (dict or None): Manifest of the existing output.
+    
+    Returns:
+        dict: Year -> manifest entry.
+    """
+    unchanged = {}
+    for year, full_file_path, year_schema in year_jobs:
+        entry = manifest['years'].get(str(year)) if manifest else None
+        if is_year_unchanged(entry, full_file_path, year_schema):
+            unchanged[year] = entry
+    return unchanged
+
+def check_year_headers(probes):
+    """
+    Prints every year whose workbook could not be opened, has no header row
+    starting with the key columns ("State", "City" for Table 8) or is missing a
+    schema column.
+    
+    Args:
+        probes (dict): Year -> result of probe_year_header.
+    
+    Returns:
+        bool: True if every year matches its schema entry.
+    """
+    failures = []
+    for year, probe in sorted(probes.items()):
+        name = os.path.basename(probe['file'])
+        if probe['error']:
+            failures.append(f"{year}: {name} could not be opened ({probe['error']})")
+            continue
+        if probe['header_row'] is None:
+            keys = ', '.join(f"'{key}'" for key in probe['key_columns'])
+            failures.append(f"{year}: {name} has no row starting with {keys}")
+        for column in probe['missing']:
+            failures.append(f"{year}: schema column '{column}' not found in {name}")
+    
+    if failures:
+        print(f"\n❌ Schema check failed for {len({f.split(':')[0] for f in failures})} year(s):")
+        for failure in failures:
+            print(f"   {failure}")
+        print("   Fix the schema in crime_data_schema.py or the workbooks before processing.")
+        return False
+    
+    print(f"✅ Headers of all {len(probes)} workbooks match the schema.")
+    return True
+
+def _log_view(df, year_schema):
+    """
+    The rows as the drop log expects them: the first key column as State and the
+    row's own key (City for Table 8) as City.
+    """
+    first_key, entity = year_schema.key_columns[0], year_schema.entity_column
+    renames = {column: name for column, name in ((first_key, 'State'), (entity, 'City')) if column != name}
+    return df.rename(columns=renames) if renames else df
+
+def process_crime_year(year, full_file_path, year_schema, logger):
+    """
+    Loads, cleans and reconstructs the requested measures of a table for a single year.
+    
+    Every measure declared by the year schema is read in the same pass over the
+    workbook. Measures with components (Violent Crime, Property Crime) have blank
+    or zero totals rebuilt from them. Rows are kept or dropped on the primary
+    (first) measure.
+    
+    Args:
+        year (int): The year being processed.
+        full_file_path (str): The path to the year's Excel file.
+        year_schema (YearSchema): The compiled schema entry for the year.
+        logger (CrimeDataLogger): Logger receiving processing stats and dropped cities.
+    
+    Returns:
+        pd.DataFrame or None: Key columns, one column per measure and Year for the year
+                              (State/City/Violent Crime/Year for Table 8), or None if
+                              the year could not be processed.
+    """
+    key_columns = year_schema.key_columns
+    entity = year_schema.entity_column
+    primary = year_schema.primary_measure
+    try:
+        print(f"Processing: {os.path.basename(full_file_path)}")
+        
+        # 1. Stream the sheet, keeping only the key columns and the schema-resolved columns
+        with logger.time_stage(year, "Excel Parsing") as timing, TableStreamReader(full_file_path, year_schema) as reader:
+            if len(reader.header) < len(key_columns):
                 print(f"Warning: Not enough columns to process for {year}. Skipping.")
-                continue
+                return None
+            df = reader.read()
+            timing['rows'] = len(df)
+            if reader.stopped_at_footnotes:
+                print("    Stopped reading at the footnote block.")
+        
+        initial_row_count = len(df)
+        logger.update_processing_stats(year, "Initial Load", initial_row_count, initial_row_count)
 
-            # 2. Find Columns Using the Schema
-            violent_crime_schema_name = normalize_col_name(year_schema["Violent Crime"])
-            violent_crime_col = normalized_to_original_cols.get(violent_crime_schema_name)
-            
-            component_cols = []
-            for component_name_from_schema in year_schema["Components"]:
-                normalized_component = normalize_col_name(component_name_from_schema)
-                actual_col = normalized_to_original_cols.get(normalized_component)
-                if actual_col:
-                    component_cols.append(actual_col)
+        # 2. Find Columns Using the Compiled Schema
+        resolved = reader.resolved
+        measure_columns = {}
+        component_columns = {}
+        for measure, total_field, component_fields in year_schema.measures:
+            measure_columns[measure] = resolved.get(total_field)
+            component_columns[measure] = []
+            for field in component_fields:
+                if field in resolved:
+                    component_columns[measure].append(resolved[field])
                 else:
-                    print(f"    Info: Schema component '{component_name_from_schema}' not found in file for year {year}.")
+                    print(f"    Info: Schema component '{year_schema.field_names[field]}' not found in file for year {year}.")
+
+        print(f"    Schema mapping for {year}:")
+        for measure, total_field, component_fields in year_schema.measures:
+            if measure_columns[measure]:
+                print(f"      - {measure}: '{year_schema.field_names[total_field]}' -> '{measure_columns[measure]}'")
+            if component_fields:
+                print(f"      - Components found: {len(component_columns[measure])}/{len(component_fields)}")
 
-            print(f"    Schema mapping for {year}:")
-            if violent_crime_col:
-                print(f"      - Violent Crime: '{year_schema['Violent Crime']}' -> '{violent_crime_col}'")
-            print(f"      - Components found: {len(component_cols)}/{len(year_schema['Components'])}")
+        primary_col = measure_columns[primary]
+        if primary_col is None:
+            print(f"Warning: Could not find schema-defined '{primary.capitalize()}' column in file for {year}. Skipping.")
+            return None
+        for measure, column in measure_columns.items():
+            if column is None:
+                print(f"    Info: No '{measure}' column in file for year {year}. It will be empty.")
 
-            # 3. Pre-clean all potential numeric columns
-            numeric_cols = [col for col in [violent_crime_col] + component_cols if col and col in df.columns]
+        # 3. Pre-clean all potential numeric columns
+        with logger.time_stage(year, "Numeric Cleaning", len(df)):
+            numeric_cols = list(dict.fromkeys(
+                col for measure in measure_columns for col in [measure_columns[measure]] + component_columns[measure]
+                if col and col in df.columns
+            ))
+            numeric_audit = clean_numeric_columns(df, numeric_cols)
             if numeric_cols:
-                for col in numeric_cols:
-                    df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', '', regex=False).str.extract(r'(\d+)', expand=False), errors='coerce')
                 print("    Cleaned numeric columns, removing potential footnotes or text artifacts.")
+                if not numeric_audit.empty:
+                    print(f"    Stripped footnotes or text from {len(numeric_audit)} numeric cells.")
+
+        # 4. Reconstruct Missing Totals from their Components (Robust Method)
+        with logger.time_stage(year, "Reconstruction", len(df)):
+            for measure, total_field, component_fields in year_schema.measures:
+                total_col, component_cols = measure_columns[measure], component_columns[measure]
+                if not component_fields or total_col is None:
+                    continue
+                label = measure.lower()
+                if not component_cols:
+                    print("    Warning: Not all component crime columns were found via schema. Skipping reconstruction.")
+                    continue
 
-            # 4. Reconstruct Missing Violent Crime Data (Robust Method)
-            if violent_crime_col and component_cols:
-                print("    Reconstructing violent crime totals using schema components...")
+                print(f"    Reconstructing {label} totals using schema components...")
                 component_sum = df[component_cols].fillna(0).sum(axis=1)
 
-                # Step 1: Fill any rows where 'Violent Crime' is NaN.
+                # Step 1: Fill any rows where the total is NaN.
                 # This is the primary fix for the Albany issue.
-                nan_mask = df[violent_crime_col].isna()
+                nan_mask = df[total_col].isna()
                 if nan_mask.any():
-                    df.loc[nan_mask, violent_crime_col] = component_sum[nan_mask]
-                    print(f"    Filled {nan_mask.sum()} missing violent crime totals (NaNs) with component sum.")
+                    df.loc[nan_mask, total_col] = component_sum[nan_mask]
+                    print(f"    Filled {nan_mask.sum()} missing {label} totals (NaNs) with component sum.")
 
-                # Step 2: Correct any rows where 'Violent Crime' is 0 but components sum > 0.
-                zero_mask = (df[violent_crime_col] == 0) & (component_sum > 0)
+                # Step 2: Correct any rows where the total is 0 but components sum > 0.
+                zero_mask = (df[total_col] == 0) & (component_sum > 0)
                 if zero_mask.any():
-                    df.loc[zero_mask, violent_crime_col] = component_sum[zero_mask]
-                    print(f"    Corrected {zero_mask.sum()} zero-value violent crime totals with component sum.")
-
-            elif violent_crime_col is None:
-                print(f"Warning: Could not find schema-defined 'Violent crime' column in file for {year}. Skipping.")
-                continue
-            else:
-                print("    Warning: Not all component crime columns were found via schema. Skipping reconstruction.")
-
-            # 5. Clean State Names and Forward-Fill
-            def clean_state_name(state):
-                if pd.isna(state): return state
-                return re.sub(r'[^A-Za-z\s]+$', '', str(state)).strip()
-            df['State'] = df['State'].apply(clean_state_name)
-            df['State'].ffill(inplace=True)
-
-            # 6. Clean and Prepare Data - WITH LOGGING
+                    df.loc[zero_mask, total_col] = component_sum[zero_mask]
+                    print(f"    Corrected {zero_mask.sum()} zero-value {label} totals with component sum.")
+
+        # 5. Clean State Names and Forward-Fill the block keys (categorical, one category per state)
+        with logger.time_stage(year, "State Cleaning", len(df)):
+            if 'State' in df.columns:
+                df['State'] = clean_names(df['State'], STATE_SUFFIX_PATTERN, categorical=True, upper=True)
+            for column in year_schema.fill_down_columns:
+                df[column] = df[column].ffill()
+
+        # Record the numeric cells that needed footnote or text stripping
+        if not numeric_audit.empty:
+            audit_rows = df.loc[numeric_audit.index, key_columns].assign(
+                Original_Value=numeric_audit['Column'] + ': ' + numeric_audit['Original_Value'])
+            logger.log_batch_dropped(year, _log_view(audit_rows, year_schema),
+                                     "Footnote or text stripped from numeric cell (kept in data)",
+                                     "Numeric Cleaning", value_column='Original_Value')
+
+        # 6. Clean and Prepare Data - WITH LOGGING
+        with logger.time_stage(year, "Filtering and Logging", len(df)):
             pre_missing_count = len(df)
-            missing_mask = df[['City', violent_crime_col]].isna().any(axis=1)
+            missing_mask = df[[entity, primary_col]].isna().any(axis=1)
             if missing_mask.any():
                 dropped_missing = df[missing_mask].copy()
-                logger.log_batch_dropped(year, dropped_missing, "Missing City or Violent Crime data", "Missing Data Filter")
-            
-            df.dropna(subset=['City', violent_crime_col], inplace=True)
+                logger.log_batch_dropped(year, _log_view(dropped_missing, year_schema),
+                                         f"Missing {entity} or {primary} data", "Missing Data Filter",
+                                         value_column=primary_col)
+        
+            df.dropna(subset=[entity, primary_col], inplace=True)
             post_missing_count = len(df)
             logger.update_processing_stats(year, "Missing Data Filter", pre_missing_count, post_missing_count)
-            
-            df['City'] = df['City'].astype(str).apply(lambda x: re.sub(r'\d+$', '', x).strip())
-            
+        
+            df[entity] = clean_names(df[entity], CITY_SUFFIX_PATTERN)
+        
             pre_numeric_count = len(df)
-            numeric_fail_mask = df[violent_crime_col].isna()
+            numeric_fail_mask = df[primary_col].isna()
             if numeric_fail_mask.any():
                 dropped_numeric = df[numeric_fail_mask].copy()
-                logger.log_batch_dropped(year, dropped_numeric, "Violent Crime value could not be converted to numeric", "Numeric Conversion")
-            
-            df.dropna(subset=[violent_crime_col], inplace=True)
+                logger.log_batch_dropped(year, _log_view(dropped_numeric, year_schema),
+                                         f"{primary} value could not be converted to numeric", "Numeric Conversion",
+                                         value_column=primary_col)
+        
+            df.dropna(subset=[primary_col], inplace=True)
             post_numeric_count = len(df)
             logger.update_processing_stats(year, "Numeric Conversion", pre_numeric_count, post_numeric_count)
-            
-            zero_crime_mask = df[violent_crime_col] == 0
+        
+            zero_crime_mask = df[primary_col] == 0
             if zero_crime_mask.any():
-                zero_crime_cities = df[zero_crime_mask].copy()
-                for _, row in zero_crime_cities.iterrows():
-                    logger.log_dropped_city(year, row['State'], row['City'], 
-                                          "Zero violent crime reported (kept in data)", 
-                                          row[violent_crime_col], "Zero Crime Check")
-            
+                logger.log_batch_dropped(year, _log_view(df[zero_crime_mask], year_schema),
+                                         f"Zero {primary.lower()} reported (kept in data)",
+                                         "Zero Crime Check", value_column=primary_col)
+        
             pre_negative_count = len(df)
-            negative_mask = df[violent_crime_col] < 0
+            negative_mask = df[primary_col] < 0
             if negative_mask.any():
                 dropped_negative = df[negative_mask].copy()
-                logger.log_batch_dropped(year, dropped_negative, "Negative violent crime value", "Negative Values Filter")
+                logger.log_batch_dropped(year, _log_view(dropped_negative, year_schema),
+                                         f"Negative {primary.lower()} value", "Negative Values Filter",
+                                         value_column=primary_col)
                 df = df[~negative_mask]
-            
+        
             post_negative_count = len(df)
             if pre_negative_count != post_negative_count:
                 logger.update_processing_stats(year, "Negative Values Filter", pre_negative_count, post_negative_count)
 
-            # 7. Extract the required data
-            if 'State' in df.columns and 'City' in df.columns and violent_crime_col in df.columns:
-                yearly_data = df[['State', 'City', violent_crime_col]].copy()
-                yearly_data.columns = ['State', 'City', 'Violent Crime']
-                yearly_data['Year'] = year
-                all_data_frames.append(yearly_data)
-                
-                final_count = len(yearly_data)
-                logger.update_processing_stats(year, "Final Output", final_count, final_count)
-                
+        # 7. Extract the required data
+        if all(column in df.columns for column in key_columns):
+            yearly_data = df[key_columns].copy()
+            for measure, column in measure_columns.items():
+                yearly_data[measure] = df[column] if column is not None else float('nan')
+            yearly_data['Year'] = year
+            
+            final_count = len(yearly_data)
+            logger.update_processing_stats(year, "Final Output", final_count, final_count)
+            
+            logger.print_processing_summary(year)
+            return yearly_data
+            
+        else:
+            print(f"Warning: Key columns {key_columns} not found after processing for {year}. Skipping.")
+            
+    except Exception as e:
+        print(f"An error occurred while processing {os.path.basename(full_file_path)}: {e}")
+        logger.log_dropped_city(year, "ERROR", f"File: {os.path.basename(full_file_path)}", 
+                              f"Processing error: {str(e)}", None, "File Processing Error")
+
+    return None
+
+def load_crime_year(year, full_file_path, year_schema, logger, cache=None, profile_directory=None):
+    """
+    Returns the cleaned data for a year, from the parse cache when the workbook
+    and schema entry are unchanged, otherwise by running process_crime_year.
+    
+    Args:
+        year (int): The year being processed.
+        full_file_path (str): The path to the year's Excel file.
+        year_schema (YearSchema): The compiled schema entry for the year.
+        logger (CrimeDataLogger): Logger receiving processing stats and dropped cities.
+        cache (CrimeDataCache, optional): Cache of cleaned per-year results.
+        profile_directory (str, optional): Profile process_crime_year with cProfile and
+                                           tracemalloc and write the results here.
+    
+    Returns:
+        pd.DataFrame or None: State/City/Violent Crime/Year rows for the year.
+    """
+    with logger.time_stage(year, "Year Total") as total_timing:
+        if cache is not None:
+            with logger.time_stage(year, "Cache Lookup"):
+                cached = cache.get(year, full_file_path, year_schema)
+            if cached is not None:
+                yearly_data, year_stats, dropped_cities = cached
+                print(f"Using cached result for {year}: {os.path.basename(full_file_path)}")
+                logger.merge_worker_results(year, year_stats, dropped_cities)
+                total_timing['rows'] = len(yearly_data)
                 logger.print_processing_summary(year)
-                
-            else:
-                print(f"Warning: 'State', 'City', or '{violent_crime_col}' column not found after processing for {year}. Skipping.")
-                
-        except Exception as e:
-            print(f"An error occurred while processing {os.path.basename(full_file_path)}: {e}")
-            logger.log_dropped_city(year, "ERROR", f"File: {os.path.basename(full_file_path)}", 
-                                  f"Processing error: {str(e)}", None, "File Processing Error")
+                return yearly_data
+        
+        with profile_year(year, profile_directory):
+            yearly_data = process_crime_year(year, full_file_path, year_schema, logger)
+        
+        if cache is not None and yearly_data is not None:
+            with logger.time_stage(year, "Cache Store", len(yearly_data)):
+                year_stats, dropped_cities = logger.export_year_results(year)
+                cache.put(year, full_file_path, year_schema, yearly_data, year_stats, dropped_cities)
+        
+        total_timing['rows'] = len(yearly_data) if yearly_data is not None else None
+        return yearly_data
+
+def _process_crime_year_worker(year, full_file_path, year_schema, cache_directory=None, profile_directory=None):
+    """
+    Runs load_crime_year in a worker process with its own logger.
+    
+    Returns:
+        tuple: (year, yearly DataFrame or None, processing stats for the year, dropped city records,
+                stage timings for the year)
+    """
+    logger = create_logger("crime_data_processing_log.csv")
+    cache = CrimeDataCache(cache_directory) if cache_directory else None
+    yearly_data = load_crime_year(year, full_file_path, year_schema, logger, cache, profile_directory)
+    year_stats, dropped_cities = logger.export_year_results(year)
+    return year, yearly_data, year_stats, dropped_cities, logger.export_year_timings(year)
+
+def consolidate_crime_data_efficiently(start_year, end_year, data_directory, output_filename, output_directory,
+                                       workers=1, cache_directory=None, incremental=False, output_formats=('csv',),
+                                       profile_directory=None, years=None, check_schema=True, table='table8',
+                                       measures=None, categorical_cities=False, validate=True, previous_output=None):
+    """
+    Reads and combines crime data from a specific directory, using a schema to identify
+    columns and handling whitespace differences.
+    
+    Args:
+        start_year (int): The starting year of the data files.
+        end_year (int): The ending year of the data files.
+        data_directory (str): The path to the folder containing the source Excel files.
+        output_filename (str): The full path for the output CSV file.
+        output_directory (str): The directory for saving log files and the run database
+                                (crime_data_runs.sqlite) that each run is recorded in.
+        workers (int): Number of worker processes. With more than one worker each year
+                       is loaded and cleaned in a separate process and the results are
+                       merged in year order, so the output matches a serial run.
+        cache_directory (str, optional): Directory for the parse cache. When set, years whose
+                                         workbook and schema entry are unchanged are loaded
+                                         from the cache instead of being re-read from Excel.
+        incremental (bool): Reuse years recorded in the output's manifest whose source file
+                            and schema entry are unchanged, and splice only new or changed
+                            years into the existing output and drop log.
+        output_formats (iterable): Any of 'csv', 'parquet' and 'store'. 'parquet' writes a dataset
+                                   partitioned by Year with typed columns next to the CSV path,
+                                   'store' the memory-mapped panel store (crime_panel_store).
+        profile_directory (str, optional): Opt-in cProfile/tracemalloc profiling of every
+                                           processed year, written to this directory.
+        years (iterable, optional): Explicit years to process instead of the
+                                    start_year-end_year range.
+        check_schema (bool): Probe the header of every workbook before any year is
+                             parsed and stop if a schema column is missing.
+        table (str): Registered table to read (see crime_data_tables), e.g. 'table8' or 'table10'.
+        measures (iterable, optional): Measures to extract, the first being the one rows are
+                                       kept for. Defaults to the table's default measures
+                                       (Violent Crime); 'all' extracts every measure.
+        categorical_cities (bool): Also store the row key (City for Table 8) as a categorical
+                                   shared across years. State and the other block keys
+                                   always are.
+        validate (bool): Run the validation rules (crime_data_validation) over the
+                         consolidated panel and list the flagged rows in the log.
+        previous_output (str, optional): Existing output that incremental mode reuses
+                                         unchanged years from, with its manifest and drop
+                                         log (see find_previous_output). Defaults to
+                                         output_filename.
+    
+    Returns:
+        pd.DataFrame or None: The consolidated panel, or None if nothing was written.
+    """
+    print(f"Starting data extraction from: {data_directory}")
+    
+    # Initialize logger; the drop log is spilled to the output directory as it grows
+    logger = create_logger(processing_log_name(output_filename), spill_directory=output_directory)
+    
+    # Load and validate the compiled schema of the table
+    crime_schema = compile_table_schema(table, measures)
+    
+    years = range(start_year, end_year + 1) if years is None else sorted(years)
+    # Settings stored with the run in the run database
+    run_options = {'years': list(years), 'measures': crime_schema.measure_order, 'workers': workers,
+                   'incremental': incremental, 'validate': validate}
+    year_jobs = resolve_year_jobs(years, data_directory, crime_schema)
+    if year_jobs is None:
+        return None
+    
+    # In incremental mode, reuse years whose source file and schema match the manifest
+    reused_years = {}
+    previous_output = previous_output or output_filename
+    manifest = load_manifest(previous_output) if incremental else None
+    unchanged = find_unchanged_years(year_jobs, manifest)
+    
+    # Unchanged years take their header from the manifest; only the others open their workbook
+    probes = probe_year_headers(year_jobs, unchanged=unchanged) if check_schema and year_jobs else {}
+    if probes and not check_year_headers(probes):
+        return None
+    
+    existing_df = read_existing_panel(previous_output, output_formats, crime_schema.key_columns) if manifest else None
+    if existing_df is not None:
+        existing_log = logger.read_saved_log(output_directory, processing_log_name(previous_output))
+        # Validation flags span years, so they are recomputed over the whole panel
+        existing_log = existing_log[~existing_log['Processing_Step'].str.startswith(VALIDATION_STEP_PREFIX)]
+        logged_counts = existing_log['Year'].value_counts()
+        for year, entry in unchanged.items():
+            reused_years[year] = (
+                entry,
+                existing_df[existing_df['Year'] == year],
+                existing_log[existing_log['Year'] == year]
+            )
+        # The saved log must hold exactly the drop records the manifest recorded for the reused years
+        stale = [year for year, (entry, _, _) in reused_years.items()
+                 if entry.get('dropped') != logged_counts.get(year, 0)]
+        if stale:
+            print(f"Incremental mode: the saved drop log does not match the manifest for "
+                  f"{', '.join(str(year) for year in sorted(stale))}. Running a full rebuild.")
+            reused_years = {}
+        else:
+            print(f"Incremental mode: reusing {len(reused_years)} unchanged years from "
+                  f"{os.path.basename(previous_output)}, processing {len(year_jobs) - len(reused_years)}.")
+    elif incremental:
+        print("Incremental mode: no usable manifest or existing output found, processing all years.")
+    
+    pending_jobs = [job for job in year_jobs if job[0] not in reused_years]
+    cache = CrimeDataCache(cache_directory) if cache_directory else None
+    worker_results = {}
+    
+    if workers > 1 and len(pending_jobs) > 1:
+        print(f"Processing {len(pending_jobs)} years with {workers} worker processes...")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_process_crime_year_worker, *job, cache_directory, profile_directory)
+                       for job in pending_jobs]
+            for future in futures:
+                year, yearly_data, year_stats, dropped_cities, year_timings = future.result()
+                worker_results[year] = (yearly_data, year_stats, dropped_cities, year_timings)
+    
+    # Merge in year order so the output and log match a serial run
+    year_frames = {}
+    manifest_entries = {}
+    for year, full_file_path, year_schema in year_jobs:
+        if year in reused_years:
+            entry, yearly_data, dropped_cities = reused_years[year]
+            print(f"Reusing unchanged {year} from existing output ({len(yearly_data)} rows)")
+            logger.merge_worker_results(year, entry['stats'], dropped_cities)
+            year_frames[year] = yearly_data
+            manifest_entries[year] = entry
+            continue
+        
+        if year in worker_results:
+            yearly_data, year_stats, dropped_cities, year_timings = worker_results[year]
+            logger.merge_worker_results(year, year_stats, dropped_cities, year_timings)
+        else:
+            yearly_data = load_crime_year(year, full_file_path, year_schema, logger, cache, profile_directory)
+        
+        if yearly_data is not None:
+            year_frames[year] = yearly_data
+            manifest_entries[year] = build_year_entry(full_file_path, year_schema, len(yearly_data),
+                                                      logger.processing_stats.get(year, {}), probes.get(year),
+                                                      logger.dropped_count(year))
+    
+    all_data_frames = [year_frames[year] for year in sorted(year_frames)]
+    
+    # Shared categories keep the keys categorical through the concat and later groupbys
+    categorical_columns = crime_schema.key_columns[:-1] + (crime_schema.key_columns[-1:] if categorical_cities else [])
+    share_categories(all_data_frames, categorical_columns)
+    
+    if cache is not None:
+        evicted = cache.evict()
+        if evicted:
+            print(f"Evicted {evicted} stale cache entries from {cache_directory}")
     
     # Final consolidation and output
     if all_data_frames:
         final_df = pd.concat(all_data_frames, ignore_index=True)
-        final_df.to_csv(output_filename, index=False)
-        print(f"\nConsolidation complete. All data has been saved to '{output_filename}'")
+        # Years without some measure add its column at the end; restore the requested order
+        final_df = final_df[crime_schema.key_columns
+                            + [measure for measure in crime_schema.measure_order if measure in final_df.columns]
+                            + ['Year']]
+        if validate:
+            validate_crime_panel(final_df, logger, table, crime_schema.key_columns)
+        written_paths = write_crime_panel(final_df, output_filename, output_formats, crime_schema.key_columns)
+        save_manifest(output_filename, manifest_entries)
+        print(f"\nConsolidation complete. All data has been saved to:")
+        for path in written_paths:
+            print(f"   {path}")
         
         logger.print_final_summary()
         logger.save_log(output_directory)
-        logger.create_summary_report(output_directory)
+        logger.save_timings(output_directory)
+        logger.save_run(os.path.join(output_directory, RUNS_DATABASE_NAME), table, output_filename, run_options)
         
         print(f"\n📊 FINAL DATASET STATISTICS:")
-        print(f"   Total cities: {len(final_df):,}")
+        entity = crime_schema.key_columns[-1]
+        entity_label = 'cities' if entity == 'City' else f"{entity} rows"
+        print(f"   Total {entity_label}: {len(final_df):,}")
         print(f"   Years covered: {final_df['Year'].min()}-{final_df['Year'].max()}")
-        print(f"   States represented: {final_df['State'].nunique()}")
-        print(f"   Average cities per year: {len(final_df) / final_df['Year'].nunique():.1f}")
+        if 'State' in final_df.columns:
+            state_count = final_df['State'].nunique()
+            print(f"   States represented: {state_count}")
+            if state_count > EXPECTED_STATE_COUNT:
+                print(f"   ⚠️ Warning: More than {EXPECTED_STATE_COUNT} State values; "
+                      f"some states are spelled differently across years.")
+        print(f"   Average {entity_label} per year: {len(final_df) / final_df['Year'].nunique():.1f}")
+        return final_df
         
     else:
         print("\nNo data was processed. Check the 'Skipping' or 'Warning' messages above.")
         logger.save_log(output_directory)
-        logger.create_summary_report(output_directory)
+        logger.save_run(os.path.join(output_directory, RUNS_DATABASE_NAME), table, output_filename, run_options)
+        return None
 
-# --- Main execution ---
-if __name__ == "__main__":
-    START_YEAR = 2012
-    END_YEAR = 2023
+def plan_crime_years(years, data_directory, output_filename, cache_directory=None, incremental=False,
+                     table='table8', measures=None, previous_output=None):
+    """
+    Resolves the workbook, header mapping and planned action for every year
+    without reading any data rows.
+    
+    Args:
+        years (iterable): The years to plan.
+        data_directory (str): The path to the folder containing the source Excel files.
+        output_filename (str): The consolidated output whose manifest incremental runs reuse.
+        cache_directory (str, optional): Parse cache that would be checked.
+        incremental (bool): Whether unchanged years would be reused from the existing output.
+        table (str): Registered table to plan for.
+        measures (iterable, optional): Measures that would be extracted.
+        previous_output (str, optional): Existing output unchanged years would be reused
+                                         from. Defaults to output_filename.
+    
+    Returns:
+        list: One dict per planned year with its file, mapping and action.
+    """
+    crime_schema = compile_table_schema(table, measures)
+    year_jobs = resolve_year_jobs(years, data_directory, crime_schema)
+    if year_jobs is None:
+        return []
+    
+    manifest = load_manifest(previous_output or output_filename) if incremental else None
+    cache = CrimeDataCache(cache_directory) if cache_directory and os.path.isdir(cache_directory) else None
+    
+    # Unchanged years take their header from the manifest; only the others open their workbook
+    unchanged = find_unchanged_years(year_jobs, manifest)
+    probes = probe_year_headers(year_jobs, unchanged=unchanged)
     
+    plan = []
+    print(f"\n📋 PROCESSING PLAN ({len(year_jobs)} years):")
+    for year, full_file_path, year_schema in year_jobs:
+        probe = probes[year]
+        if probe['error']:
+            print(f"  {year}: {os.path.basename(full_file_path)} could not be opened ({probe['error']})")
+            plan.append(dict(probe, action='error'))
+            continue
+        
+        if year in unchanged:
+            action = 'reuse from existing output'
+        elif cache is not None and cache.contains(year, full_file_path, year_schema):
+            action = 'load from cache'
+        elif year_schema.field_names[year_schema.total_field] in probe['missing']:
+            action = f"skip (no {year_schema.primary_measure.lower()} column)"
+        else:
+            action = 'parse workbook'
+        plan.append(dict(probe, action=action))
+        
+        header_row = probe['header_row'] + 1 if probe['header_row'] is not None else 'not found'
+        print(f"  {year}: {os.path.basename(full_file_path)} "
+              f"({os.path.getsize(full_file_path) / 1024 / 1024:.1f} MB, header row {header_row}) -> {action}")
+        for name, col in probe['mapping'].items():
+            print(f"      - {name} -> '{col}'")
+        for name in probe['missing']:
+            print(f"      - {name} -> not found")
+    return plan
+
+def ingest_crime_years(years, data_directory, table='table8', measures=None):
+    """
+    Streams every requested workbook through the reader without cleaning, to check
+    that each year parses and to count its rows.
+    
+    Args:
+        years (iterable): The years to read.
+        data_directory (str): The path to the folder containing the source Excel files.
+        table (str): Registered table to read.
+        measures (iterable, optional): Measures whose columns are read.
+    
+    Returns:
+        dict: Year -> number of data rows read.
+    """
+    crime_schema = compile_table_schema(table, measures)
+    year_jobs = resolve_year_jobs(years, data_directory, crime_schema) or []
+    
+    row_counts = {}
+    for year, full_file_path, year_schema in year_jobs:
+        try:
+            with TableStreamReader(full_file_path, year_schema) as reader:
+                for _ in reader.iter_chunks():
+                    pass
+                row_counts[year] = reader.rows_read
+                footnotes = ", stopped at the footnote block" if reader.stopped_at_footnotes else ""
+            print(f"  {year}: {row_counts[year]:,} rows read from {os.path.basename(full_file_path)}{footnotes}")
+        except Exception as e:
+            print(f"  {year}: An error occurred while reading {os.path.basename(full_file_path)}: {e}")
+    return row_counts
+
+def compile_table_schema(table='table8', measures=None):
+    """
+    Compiles the schema for a registered table and the requested measures.
+    
+    Table 8 with its default Violent Crime measure is the original city panel
+    and comes from compile_crime_schema().
+    
+    Args:
+        table (str): Name of the registered table.
+        measures (iterable, optional): Measures to extract, or 'all'.
+    
+    Returns:
+        CompiledCrimeSchema: The compiled schema for every defined year.
+    """
+    if table == 'table8' and measures is None:
+        return compile_crime_schema()
+    return get_table(table).compile(measures)
+
+def processing_log_name(output_filename):
+    """
+    Drop log file name of a consolidated output. Every output has its own log, so an
+    incremental run splices in the drop records of the output it reuses years from.
+    """
+    return os.path.splitext(os.path.basename(output_filename))[0] + "_processing_log.csv"
+
+def default_output_name(years, table='table8', measures=None):
+    """
+    Default consolidated file name for a table, measure selection and year range.
+    The Table 8 violent crime panel keeps its original name.
+    """
+    if table == 'table8' and measures is None:
+        return f"consolidated_violent_crime_data_{years[0]}-{years[-1]}_reconstructed.csv"
+    return f"consolidated_{table}_offenses_{years[0]}-{years[-1]}.csv"
+
+def find_previous_output(output_directory, years, table='table8', measures=None):
+    """
+    Finds an existing default-named output of the same table and measures whose
+    years are all requested, so an incremental run over a longer range (e.g.
+    --years 2012-2024) reuses the years of the 2012-2023 panel.
+    
+    Args:
+        output_directory (str): Folder with the existing outputs.
+        years (iterable): The requested years.
+        table (str): Registered table of the run.
+        measures (iterable, optional): Measures of the run.
+    
+    Returns:
+        str or None: Path of the output with the most reusable years, or None.
+    """
+    if not os.path.isdir(output_directory):
+        return None
+    pattern = re.escape(default_output_name(('0000', '0000'), table, measures)).replace('0000', r'\d{4}')
+    requested = set(years)
+    previous_output, previous_years = None, 0
+    for name in sorted(os.listdir(output_directory)):
+        if not re.fullmatch(pattern, name):
+            continue
+        output_filename = os.path.join(output_directory, name)
+        manifest = load_manifest(output_filename, verbose=False)
+        manifest_years = {int(year) for year in manifest['years']} if manifest else set()
+        if manifest_years and manifest_years <= requested and len(manifest_years) > previous_years:
+            previous_output, previous_years = output_filename, len(manifest_years)
+    return previous_output
+
+def parse_year_selection(selection):
+    """
+    Parses a year selection such as "2012-2015,2018,2020-2023".
+    
+    Args:
+        selection (str): Comma-separated years and inclusive year ranges.
+    
+    Returns:
+        list: The selected years, sorted and without duplicates.
+    
+    Raises:
+        argparse.ArgumentTypeError: If a part is not a year or a range is reversed.
+    """
+    years = set()
+    for part in selection.split(','):
+        part = part.strip()
+        match = re.fullmatch(r'(\d{4})(?:\s*-\s*(\d{4}))?', part)
+        if not match:
+            raise argparse.ArgumentTypeError(f"'{part}' is not a year or a year range like 2012-2015")
+        first, last = int(match.group(1)), int(match.group(2) or match.group(1))
+        if last < first:
+            raise argparse.ArgumentTypeError(f"Year range '{part}' ends before it starts")
+        years.update(range(first, last + 1))
+    return sorted(years)
+
+def build_argument_parser(script_dir):
+    """Build the command-line parser, with defaults relative to the repository's Data folder."""
+    data_directory = os.path.join(script_dir, "Data")
+    parser = argparse.ArgumentParser(
+        description="Consolidate the FBI offense table workbooks (Table 8 by default) into a year panel.")
+    parser.add_argument("--years", type=parse_year_selection, default=list(range(2012, 2024)),
+                        help="Years to process, e.g. 2012-2015,2018 (default: 2012-2023).")
+    parser.add_argument("--table", choices=sorted(TABLE_REGISTRY), default="table8",
+                        help="FBI table to consolidate (default: table8, offenses by city).")
+    parser.add_argument("--measures", nargs="+",
+                        help="Measures to extract, the first deciding which rows are kept, e.g. "
+                             "'Violent Crime' 'Property Crime' Burglary, or 'all' (default: Violent Crime).")
+    parser.add_argument("--input-dir", default=os.path.join(data_directory, "Crime"),
+                        help="Folder with the table's workbooks.")
+    parser.add_argument("--output-dir", default=data_directory,
+                        help="Folder for the panel, manifest, logs and cache.")
+    parser.add_argument("--output-name",
+                        help="Output CSV name (default: consolidated_violent_crime_data_<first>-<last>_reconstructed.csv "
+                             "for the Table 8 violent crime panel, else consolidated_<table>_offenses_<first>-<last>.csv).")
+    parser.add_argument("--formats", nargs="+", choices=list(OUTPUT_FORMATS), default=['csv'],
+                        help="Output formats (default: csv), e.g. --formats csv parquet store. 'parquet' is a "
+                             "Year-partitioned dataset, 'store' the memory-mapped panel store (crime_panel_store.py).")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Worker processes for reading years in parallel.")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the parse cache.")
+    parser.add_argument("--full", action="store_true",
+                        help="Rebuild every selected year instead of reusing unchanged years from the existing output.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile every processed year and write the reports to <output-dir>/profiles.")
+    parser.add_argument("--categorical-cities", action="store_true",
+                        help="Keep City as a categorical shared across years, like State.")
+    parser.add_argument("--no-validation", action="store_true",
+                        help="Don't run the validation rules over the consolidated panel.")
+    parser.add_argument("--skip-schema-check", action="store_true",
+                        help="Process years even if their workbook headers don't match the schema.")
+    parser.add_argument("--stages", nargs="+", choices=["ingest", "clean", "join"], default=["clean"],
+                        help="ingest: only read the workbooks and count rows; clean: build the panel; "
+                             "join: join the panel onto the ACS places.")
+    parser.add_argument("--acs-path", default=os.path.join(data_directory, "ACS", "ready_to_merge.csv"),
+                        help="ACS place-year CSV used by the join stage.")
+    parser.add_argument("--plan", action="store_true",
+                        help="Show the file, column mapping and action for every year without reading any data rows.")
+    return parser
+
+def main(argv=None):
+    """Run the stages selected on the command line."""
     try:
         script_dir = os.path.dirname(os.path.abspath(__file__))
     except NameError:
         script_dir = os.path.abspath('.')
-
-    SOURCE_DATA_DIRECTORY = os.path.join(script_dir, "Data", "Crime")
-    OUTPUT_DIRECTORY = os.path.join(script_dir, "Data")
     
-    OUTPUT_FILENAME = "consolidated_violent_crime_data_2012-2023_reconstructed.csv"
-    FULL_OUTPUT_PATH = os.path.join(OUTPUT_DIRECTORY, OUTPUT_FILENAME)
+    parser = build_argument_parser(script_dir)
+    args = parser.parse_args(argv)
+    measures = args.measures
+    if measures is not None and measures != ['all']:
+        unknown = [measure for measure in measures if measure not in get_table(args.table).measure_names()]
+        if unknown:
+            parser.error(f"{args.table} has no measure(s) {unknown}. "
+                         f"Available: {', '.join(get_table(args.table).measure_names())}")
+    output_name = args.output_name or default_output_name(args.years, args.table, measures)
+    full_output_path = os.path.join(args.output_dir, output_name)
+    cache_directory = None if args.no_cache else os.path.join(args.output_dir, ".crime_cache")
+    profile_directory = os.path.join(args.output_dir, "profiles") if args.profile else None
+    # A new default-named range (e.g. 2012-2024) reuses the years of an earlier panel (2012-2023)
+    previous_output = None
+    if not args.full and not args.output_name and load_manifest(full_output_path, verbose=False) is None:
+        previous_output = find_previous_output(args.output_dir, args.years, args.table, measures)
     
-    if not os.path.exists(SOURCE_DATA_DIRECTORY):
-         print(f"❌ Error: Source data directory not found at the expected path.")
-         print(f"   Checked for: {SOURCE_DATA_DIRECTORY}")
-    else:
+    needs_workbooks = args.plan or 'ingest' in args.stages or 'clean' in args.stages
+    if needs_workbooks and not os.path.exists(args.input_dir):
+        print(f"❌ Error: Source data directory not found at the expected path.")
+        print(f"   Checked for: {args.input_dir}")
+        return 1
+    
+    if args.plan:
+        plan_crime_years(args.years, args.input_dir, full_output_path, cache_directory, incremental=not args.full,
+                         table=args.table, measures=measures, previous_output=previous_output)
+        return 0
+    
+    if 'ingest' in args.stages:
+        print(f"Reading workbooks from: {args.input_dir}")
+        ingest_crime_years(args.years, args.input_dir, args.table, measures)
+    
+    if 'clean' in args.stages:
         try:
-            os.makedirs(OUTPUT_DIRECTORY, exist_ok=True)
-            print(f"✅ Input data found at: {SOURCE_DATA_DIRECTORY}")
-            print(f"✅ Output will be saved to: {FULL_OUTPUT_PATH}")
-            consolidate_crime_data_efficiently(START_YEAR, END_YEAR, SOURCE_DATA_DIRECTORY, FULL_OUTPUT_PATH, OUTPUT_DIRECTORY)
+            os.makedirs(args.output_dir, exist_ok=True)
         except OSError as e:
-            print(f"❌ Error creating output directory '{OUTPUT_DIRECTORY}'. Please check permissions.")
+            print(f"❌ Error creating output directory '{args.output_dir}'. Please check permissions.")
             print(f"   System error: {e}")
+            return 1
+        print(f"✅ Input data found at: {args.input_dir}")
+        print(f"✅ Output will be saved to: {full_output_path}")
+        consolidate_crime_data_efficiently(args.years[0], args.years[-1], args.input_dir, full_output_path,
+                                           args.output_dir, workers=args.workers, cache_directory=cache_directory,
+                                           incremental=not args.full, output_formats=tuple(args.formats),
+                                           profile_directory=profile_directory, years=args.years,
+                                           check_schema=not args.skip_schema_check, table=args.table,
+                                           measures=measures, categorical_cities=args.categorical_cities,
+                                           validate=not args.no_validation, previous_output=previous_output)
+    
+    if 'join' in args.stages and (args.table != 'table8' or (measures and measures[0] != "Violent Crime")):
+        print("⚠️ The join stage needs the Table 8 panel with Violent Crime as its first measure. Skipping the join.")
+    elif 'join' in args.stages:
+        # Imported here so the crime stages don't load the ACS linkage code
+        from crime_acs_join import run_crime_acs_join
+        run_crime_acs_join(full_output_path, args.acs_path, os.path.join(args.output_dir, "ACS"))
+    return 0
+
+# --- Main execution ---
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import pandas as pd
+import numpy as np
+import os
+import re
+import json
+import glob
+import argparse
+from crime_acs_join import normalize_place_names
+
+# Export columns the grants stage reads: name -> accepted header names, first match wins.
+# Everything else in the (very wide) USAspending export is skipped while parsing.
+GRANT_COLUMNS = {
+    'fain': ['award_id_fain'],
+    'funding': ['total_funding_amount', 'total_obligated_amount'],
+    'start_date': ['period_of_performance_start_date'],
+    'city': ['recipient_city_name'],
+    'state': ['recipient_state_name'],
+    'aln': ['assistance_listing_numbers', 'assistance_listings_numbers_and_titles', 'cfda_numbers_and_titles',
+            'cfda_number', 'cfda_numbers'],
+}
+OPTIONAL_GRANT_COLUMNS = {'aln'}
+
+GRANT_FILE_PATTERN = "Assistance_PrimeAwardSummaries_*.csv"
+
+# Grant programs the awards are classified into. An award belongs to a program if
+# characters 16-19 of its FAIN are one of the type codes, its FAIN is listed, or
+# one of its assistance listing numbers (ALN) starts with a listed prefix.
+GRANT_PROGRAMS = {
+    'cvipi': {
+        'title': "Community Based Violence Intervention and Prevention Initiative",
+        'fain_type_codes': {'CVIP'},
+        # CVIPI awards whose FAIN carries a different type code
+        'fains': {'15PBJA23GG05226MUMU', '15PNIJ23GG04270MUMU', '15PBJA22GG04749MUMU',
+                  '15PBJA24GG03106MUMU', '15PBJA24AG00119MUMU'},
+        'aln_prefixes': ('16.045',),
+    },
+}
+
+def resolve_grant_columns(header):
+    """
+    Match the export header to GRANT_COLUMNS.
+
+    Args:
+        header (list): Column names of the export.
+
+    Returns:
+        dict: Grant column name -> export column name.
+
+    Raises:
+        ValueError: If a required column is missing.
+    """
+    available = set(header)
+    resolved = {}
+    for name, candidates in GRANT_COLUMNS.items():
+        match = next((candidate for candidate in candidates if candidate in available), None)
+        if match is not None:
+            resolved[name] = match
+        elif name not in OPTIONAL_GRANT_COLUMNS:
+            raise ValueError(f"No column for '{name}' (expected one of {candidates}).")
+    return resolved
+
+class AwardClassifier:
+    """
+    Assigns awards to GRANT_PROGRAMS with prebuilt lookups: a set of FAIN type
+    codes, a set of listed FAINs and a tuple of ALN prefixes per program. Each
+    test is one vectorized string operation over a chunk, so every listed FAIN
+    is checked, unlike an element-wise == against a recycled vector.
+    """
+
+    def __init__(self, programs=None):
+        """
+        Args:
+            programs (dict, optional): Program -> definition as in GRANT_PROGRAMS. Defaults to GRANT_PROGRAMS.
+        """
+        self.programs = GRANT_PROGRAMS if programs is None else programs
+
+    def classify(self, fains, alns=None):
+        """
+        Flag the awards of every program.
+
+        Args:
+            fains (pd.Series): Award FAINs.
+            alns (pd.Series, optional): Assistance listing numbers, possibly several per
+                                        award separated by ';' or ',' and followed by titles.
+
+        Returns:
+            pd.DataFrame: One boolean column per program, aligned with fains.
+        """
+        fains = fains.fillna('').str.strip().str.upper()
+        type_codes = fains.str[15:19]
+        aln_codes = None
+        if alns is not None:
+            # "16.045: Community Based ...; 16.738: ..." -> ";16.045;16.738"
+            aln_codes = ';' + alns.fillna('').str.findall(r'\d{2}\.\d{3}').str.join(';')
+
+        flags = {}
+        for program, definition in self.programs.items():
+            flagged = type_codes.isin(definition.get('fain_type_codes', ())) | fains.isin(definition.get('fains', ()))
+            prefixes = definition.get('aln_prefixes', ())
+            if aln_codes is not None and prefixes:
+                pattern = '|'.join(';' + re.escape(prefix) for prefix in prefixes)
+                flagged |= aln_codes.str.contains(pattern, regex=True)
+            flags[program] = flagged.to_numpy()
+        return pd.DataFrame(flags, index=fains.index)
+
+def aggregate_grant_chunk(chunk, classifier):
+    """
+    Sum the funding of one chunk of awards by recipient state, city and issue year.
+
+    Args:
+        chunk (pd.DataFrame): Awards with the GRANT_COLUMNS names.
+        classifier (AwardClassifier): Assigns awards to programs.
+
+    Returns:
+        pd.DataFrame: State, City and Year keys with award counts and funding, in total
+                      and per program.
+    """
+    # The issue year is the year the period of performance starts ("2022-10-01")
+    year = pd.to_numeric(chunk['start_date'].str[:4], errors='coerce')
+    funding = pd.to_numeric(chunk['funding'], errors='coerce').fillna(0.0)
+    flags = classifier.classify(chunk['fain'], chunk['aln'] if 'aln' in chunk.columns else None)
+
+    values = pd.DataFrame({'Awards': 1, 'Funding': funding.to_numpy()}, index=chunk.index)
+    for program in flags.columns:
+        values[f'{program}_awards'] = flags[program].astype(int)
+        values[f'{program}_funding'] = funding.where(flags[program], 0.0)
+
+    keys = pd.DataFrame({
+        'State': normalize_place_names(chunk['state']),
+        'City': normalize_place_names(chunk['city']),
+        'Year': year,
+    })
+    valid = keys.notna().all(axis=1)
+    return values[valid].groupby([keys.loc[valid, 'State'], keys.loc[valid, 'City'],
+                                  keys.loc[valid, 'Year'].astype(int)], sort=False).sum()
+
+def read_grant_awards(file_paths, classifier=None, chunk_size=200_000):
+    """
+    Stream USAspending prime award exports and aggregate them per city-year in one pass.
+
+    Only the GRANT_COLUMNS of each file are parsed, as strings, in chunks of
+    chunk_size rows. Each chunk is reduced to its city-year sums right away, so
+    memory follows the number of city-years, not the size of the export.
+
+    Args:
+        file_paths (list): Export CSV files.
+        classifier (AwardClassifier, optional): Defaults to AwardClassifier().
+        chunk_size (int): Rows parsed per chunk.
+
+    Returns:
+        pd.DataFrame: One row per State/City/Year with Awards, Funding and per-program
+                      award counts and funding. State and City are the canonical
+                      (trimmed, case-folded) names also used by the crime/ACS join.
+    """
+    classifier = classifier or AwardClassifier()
+    partials = []
+    rows_read = 0
+    for file_path in file_paths:
+        header = pd.read_csv(file_path, nrows=0).columns.tolist()
+        resolved = resolve_grant_columns(header)
+        renames = {column: name for name, column in resolved.items()}
+        reader = pd.read_csv(file_path, usecols=list(renames), dtype=str, chunksize=chunk_size,
+                             keep_default_na=False, na_values=[''])
+        file_rows = 0
+        for chunk in reader:
+            partials.append(aggregate_grant_chunk(chunk.rename(columns=renames), classifier))
+            file_rows += len(chunk)
+        rows_read += file_rows
+        print(f"Read {file_rows:,} awards from {os.path.basename(file_path)} ({len(resolved)} of {len(header)} columns)")
+
+    if not partials:
+        return None
+    aggregated = pd.concat(partials).groupby(level=[0, 1, 2]).sum().reset_index()
+    aggregated = aggregated.sort_values(['State', 'City', 'Year'], ignore_index=True)
+    print(f"Aggregated {rows_read:,} awards into {len(aggregated):,} city-years.")
+    return aggregated
+
+def _input_signature(file_paths, classifier):
+    """Sizes and modification times of the exports, plus the program definitions."""
+    programs = {program: {key: sorted(value) if isinstance(value, (set, tuple)) else value
+                          for key, value in definition.items()}
+                for program, definition in classifier.programs.items()}
+    return {
+        'files': {os.path.abspath(path): [os.path.getsize(path), os.path.getmtime(path)] for path in file_paths},
+        'programs': programs,
+    }
+
+def consolidate_grant_data(data_directory, output_filename, classifier=None, chunk_size=200_000, force=False):
+    """
+    Aggregate every prime award export in data_directory and save the city-year table.
+
+    The table is written with a JSON sidecar recording the exports it was built
+    from. Later runs reuse it while the exports and program definitions are
+    unchanged, so the export is only parsed when it changes.
+
+    Args:
+        data_directory (str): Folder with the Assistance_PrimeAwardSummaries_*.csv exports.
+        output_filename (str): The full path for the city-year CSV.
+        classifier (AwardClassifier, optional): Defaults to AwardClassifier().
+        chunk_size (int): Rows parsed per chunk.
+        force (bool): Re-read the exports even if the saved table is current.
+
+    Returns:
+        pd.DataFrame or None: The city-year table, or None if there are no exports.
+    """
+    classifier = classifier or AwardClassifier()
+    file_paths = sorted(glob.glob(os.path.join(data_directory, GRANT_FILE_PATTERN)))
+    if not file_paths:
+        print(f"No {GRANT_FILE_PATTERN} exports found in {data_directory}")
+        return None
+
+    signature = _input_signature(file_paths, classifier)
+    signature_path = os.path.splitext(output_filename)[0] + "_inputs.json"
+    if not force and os.path.exists(output_filename) and os.path.exists(signature_path):
+        with open(signature_path) as f:
+            if json.load(f) == json.loads(json.dumps(signature)):
+                print(f"Exports unchanged; using saved grant table {output_filename}")
+                return pd.read_csv(output_filename, keep_default_na=False, dtype={'State': str, 'City': str})
+
+    aggregated = read_grant_awards(file_paths, classifier, chunk_size)
+    aggregated.to_csv(output_filename, index=False)
+    with open(signature_path, 'w') as f:
+        json.dump(signature, f, indent=2)
+    print(f"Grant city-year table saved to: {output_filename}")
+    return aggregated
+
+def add_grant_funding(panel_df, grants_df, program='cvipi', issue_year=2022, column=None,
+                      state_column='state_name', city_column='city_name'):
+    """
+    Add a city's program funding issued in one year to every row of the city, as the R scripts do.
+
+    Grant and panel names are matched on the same canonical form the crime/ACS
+    join uses. Cities without funding get 0.
+
+    Args:
+        panel_df (pd.DataFrame): Merged crime/ACS rows.
+        grants_df (pd.DataFrame): City-year table from consolidate_grant_data.
+        program (str): Program whose funding is added, or None for all awards.
+        issue_year (int): Issue year of the funding.
+        column (str, optional): Name of the new column. Defaults to 'funding<issue_year>'.
+        state_column (str): Panel column with the state name.
+        city_column (str): Panel column with the city name.
+
+    Returns:
+        pd.DataFrame: A copy of the panel with the funding column.
+    """
+    column = column or f"funding{issue_year}"
+    funding_column = f"{program}_funding" if program else 'Funding'
+    issued = grants_df[grants_df['Year'] == issue_year]
+    funding = issued.groupby(['State', 'City'])[funding_column].sum()
+
+    panel_df = panel_df.copy()
+    keys = pd.MultiIndex.from_arrays([normalize_place_names(panel_df[state_column]),
+                                      normalize_place_names(panel_df[city_column])])
+    positions = funding.index.get_indexer(keys)
+    values = np.append(funding.to_numpy(dtype=float), 0.0)
+    panel_df[column] = values[positions]
+    matched = panel_df.loc[positions >= 0, city_column].nunique()
+    print(f"Added {column}: {matched} panel cities with {program or 'any'} funding issued in {issue_year}.")
+    return panel_df
+
+# --- Main execution ---
+if __name__ == "__main__":
+    try:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        script_dir = os.path.abspath('.')
+
+    parser = argparse.ArgumentParser(description="Aggregate USAspending prime award exports per city and year.")
+    parser.add_argument("--input-dir", default=os.path.join(script_dir, "Data", "Grants"),
+                        help=f"Folder with the {GRANT_FILE_PATTERN} exports.")
+    parser.add_argument("--output", default=os.path.join(script_dir, "Data", "Grants", "grants_city_year.csv"),
+                        help="City-year grant table.")
+    parser.add_argument("--chunk-size", type=int, default=200_000, help="Rows parsed per chunk.")
+    parser.add_argument("--full", action="store_true", help="Re-read the exports even if the saved table is current.")
+    parser.add_argument("--panel", help="Merged crime/ACS panel to add the program funding to, e.g. "
+                                        "Data/ACS/merged_crime_acs.csv.")
+    parser.add_argument("--program", default="cvipi", choices=sorted(GRANT_PROGRAMS), help="Program of the funding column.")
+    parser.add_argument("--issue-year", type=int, default=2022, help="Issue year of the funding column.")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input_dir):
+        print(f"❌ Error: Grant data directory not found at the expected path.")
+        print(f"   Checked for: {args.input_dir}")
+    else:
+        grants = consolidate_grant_data(args.input_dir, args.output, chunk_size=args.chunk_size, force=args.full)
+        if grants is not None and args.panel:
+            panel = pd.read_csv(args.panel, dtype={'geo_id': str, 'state_code': str, 'place_code': str, 'place_id': str})
+            panel = add_grant_funding(panel, grants, args.program, args.issue_year)
+            panel_output = os.path.splitext(args.panel)[0] + "_grants.csv"
+            panel.to_csv(panel_output, index=False)
+            print(f"Panel with grant funding saved to: {panel_output}")